@@ -4,15 +4,23 @@ Maneja JWT tokens, hashing de contraseñas y validaciones de seguridad.
 """
 
 import os
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import User
+from services import AsyncReservationService
+from cache import TTLCache, user_cache, USER_CACHE_TTL_SECONDS
+from metrics import PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS
 import logging
 
 # Configuración del logger
@@ -23,9 +31,17 @@ SECRET_KEY = os.getenv("SECRET_KEY", "tu_clave_secreta_jwt_aqui_cambiar_en_produ
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10"))
 
+# Caché de tokens ya verificados (clave: digest SHA-256 del token)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+token_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES)
+
 # Contexto para hashing de contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Pool acotado para bcrypt: hilos dedicados y cola máxima de solicitudes en espera
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
 # Esquema de autenticación Bearer
 security = HTTPBearer()
 
@@ -44,7 +60,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        logger.error(f"Error verificando contraseña: {e}")
+        logger.error("Error verificando contraseña: %s", e)
         return False
 
 
@@ -61,6 +77,127 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasherPool:
+    """
+    Ejecuta el hashing y la verificación bcrypt fuera del event loop.
+    - Hilos dedicados (bcrypt libera el GIL mientras calcula)
+    - Cola acotada: si se llena, se rechaza con 503 en lugar de acumular latencia
+    - Métricas de profundidad de cola, espera y tiempo de cómputo
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self._workers = max(1, workers)
+        self._max_pending = self._workers + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="bcrypt")
+        # Contadores modificados solo desde el event loop
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+        self._max_run_seconds = 0.0
+
+    @staticmethod
+    def _timed_call(fn: Callable, args: tuple):
+        """Ejecuta fn en un hilo del pool y devuelve (resultado, inicio, fin)"""
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started, time.perf_counter()
+
+    async def run(self, fn: Callable, *args):
+        """
+        Ejecuta una operación bcrypt en el pool.
+        
+        Args:
+            fn: Función bloqueante a ejecutar
+            *args: Argumentos de la función
+        
+        Returns:
+            Resultado de la función
+        
+        Raises:
+            HTTPException: 503 si la cola del pool está llena
+        """
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            logger.warning("🚦 Cola de bcrypt llena (%s), solicitud rechazada", self._pending)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado procesando credenciales. Intenta nuevamente en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self._executor, self._timed_call, fn, args
+            )
+        finally:
+            self._pending -= 1
+        
+        run_seconds = finished - started
+        PASSWORD_HASH_SECONDS.observe(run_seconds, fn.__name__)
+        PASSWORD_HASH_WAIT_SECONDS.observe(started - submitted, fn.__name__)
+        self._completed += 1
+        self._total_wait_seconds += started - submitted
+        self._total_run_seconds += run_seconds
+        self._max_run_seconds = max(self._max_run_seconds, run_seconds)
+        return result
+
+    def stats(self) -> dict:
+        """Métricas actuales del pool de hashing"""
+        completed = self._completed or 1
+        return {
+            "workers": self._workers,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self._workers),
+            "max_pending": self._max_pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._total_wait_seconds / completed * 1000, 2),
+            "avg_run_ms": round(self._total_run_seconds / completed * 1000, 2),
+            "max_run_ms": round(self._max_run_seconds * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        """Detiene los hilos del pool"""
+        self._executor.shutdown(wait=False)
+
+
+# Instancia global por worker
+password_hasher = PasswordHasherPool()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versión no bloqueante de verify_password (se ejecuta en el pool bcrypt).
+    
+    Args:
+        plain_password: Contraseña en texto plano
+        hashed_password: Contraseña hasheada
+    
+    Returns:
+        bool: True si coinciden, False en caso contrario
+    """
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Versión no bloqueante de get_password_hash (se ejecuta en el pool bcrypt).
+    
+    Args:
+        password: Contraseña en texto plano
+    
+    Returns:
+        str: Contraseña hasheada
+    """
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Crea un token JWT con los datos del usuario.
@@ -83,10 +220,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     
     try:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        logger.info(f"🔑 Token JWT creado para usuario: {data.get('username', 'unknown')}")
+        logger.info("🔑 Token JWT creado para usuario: %s", data.get('username', 'unknown'))
         return encoded_jwt
     except Exception as e:
-        logger.error(f"Error creando token JWT: {e}")
+        logger.error("Error creando token JWT: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -97,6 +234,11 @@ def verify_token(token: str) -> dict:
     """
     Verifica y decodifica un token JWT.
     
+    Los tokens ya verificados se guardan en una caché LRU (por digest del
+    token) hasta su `exp`, así que la verificación HMAC completa ocurre una
+    sola vez por token y no en cada request. El dict devuelto es compartido:
+    no debe modificarse.
+    
     Args:
         token: Token JWT a verificar
     
@@ -106,6 +248,11 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: Si el token es inválido o ha expirado
     """
+    token_digest = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = token_cache.get(token_digest)
+    if cached is not None:
+        return cached
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -118,10 +265,14 @@ def verify_token(token: str) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return {"username": username, "user_id": user_id}
+        token_data = {"username": username, "user_id": user_id, "exp": payload.get("exp")}
+        if token_data["exp"] is not None:
+            token_cache.set(token_digest, token_data, float(token_data["exp"]))
+        
+        return token_data
         
     except JWTError as e:
-        logger.warning(f"Token JWT inválido: {e}")
+        logger.warning("Token JWT inválido: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
@@ -129,20 +280,64 @@ def verify_token(token: str) -> dict:
         )
 
 
-def get_current_user(
+class UserPrincipal:
+    """
+    Representación liviana del usuario autenticado, cacheable entre requests.
+    Expone los mismos campos que UserResponse; las rutas que modifican al
+    usuario deben cargar el modelo User desde la sesión.
+    """
+
+    __slots__ = ("id", "username", "created_at", "expires_at", "is_premium")
+
+    def __init__(self, id: int, username: str, created_at: datetime, expires_at: datetime, is_premium: bool):
+        self.id = id
+        self.username = username
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.is_premium = is_premium
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        """Crea el principal a partir del modelo User"""
+        return cls(user.id, user.username, user.created_at, user.expires_at, user.is_premium)
+
+    def is_expired(self) -> bool:
+        """Verifica si el usuario ha expirado"""
+        return datetime.utcnow() > self.expires_at
+
+    def __repr__(self):
+        return f"<UserPrincipal(username='{self.username}', premium={self.is_premium})>"
+
+
+def _principal_cache_deadline(user: User, token_exp: Optional[int]) -> float:
+    """
+    Instante (epoch) hasta el que se puede cachear el principal: el menor entre
+    el TTL de la caché, la expiración del token y la expiración del usuario.
+    """
+    user_expires = (user.expires_at - datetime(1970, 1, 1)).total_seconds()
+    deadline = min(time.time() + USER_CACHE_TTL_SECONDS, user_expires)
+    if token_exp is not None:
+        deadline = min(deadline, float(token_exp))
+    return deadline
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
     """
     Dependency para obtener el usuario actual desde el token JWT.
     Verifica que el usuario existe y no ha expirado.
     
+    El principal se cachea por usuario (hasta el TTL, la expiración del token
+    o la del usuario, lo que ocurra primero), evitando una consulta por request.
+    
     Args:
         credentials: Credenciales Bearer del header Authorization
-        db: Sesión de base de datos
+        db: Sesión asíncrona de base de datos
     
     Returns:
-        User: Usuario autenticado
+        UserPrincipal: Usuario autenticado
     
     Raises:
         HTTPException: Si el usuario no existe o ha expirado
@@ -150,11 +345,16 @@ def get_current_user(
     # Verificar token
     token_data = verify_token(credentials.credentials)
     
+    # Consultar primero la caché de usuarios
+    principal = user_cache.get(token_data["user_id"])
+    if principal is not None and principal.username == token_data["username"]:
+        return principal
+    
     # Buscar usuario en base de datos
-    user = db.query(User).filter(User.id == token_data["user_id"]).first()
+    user = await db.get(User, token_data["user_id"])
     
     if user is None:
-        logger.warning(f"Usuario no encontrado: {token_data['username']}")
+        logger.warning("Usuario no encontrado: %s", token_data['username'])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario no encontrado",
@@ -163,66 +363,72 @@ def get_current_user(
     
     # Verificar que el usuario no ha expirado
     if user.is_expired():
-        logger.info(f"👤 Usuario expirado intentó acceder: {user.username}")
-        # Eliminar usuario expirado de la base de datos
-        db.delete(user)
-        db.commit()
+        logger.info("👤 Usuario expirado intentó acceder: %s", user.username)
+        # Eliminar usuario expirado de la base de datos liberando sus asientos
+        await AsyncReservationService.release_user_seats(db, user)
+        await db.delete(user)
+        await db.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Sesión expirada. Por favor, inicia sesión nuevamente",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
+    principal = UserPrincipal.from_user(user)
+    user_cache.set(user.id, principal, _principal_cache_deadline(user, token_data.get("exp")))
+    return principal
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Autentica un usuario con username y password.
     
     Args:
-        db: Sesión de base de datos
+        db: Sesión asíncrona de base de datos
         username: Nombre de usuario
         password: Contraseña en texto plano
     
     Returns:
         User: Usuario autenticado, None si las credenciales son incorrectas
     """
-    user = db.query(User).filter(User.username == username.lower()).first()
+    user = await db.scalar(select(User).where(User.username == username.lower()))
     
     if not user:
-        logger.warning(f"Intento de login con usuario inexistente: {username}")
+        logger.warning("Intento de login con usuario inexistente: %s", username)
         return None
     
     if user.is_expired():
-        logger.info(f"Usuario expirado intentó login: {username}")
-        # Limpiar usuario expirado
-        db.delete(user)
-        db.commit()
+        logger.info("Usuario expirado intentó login: %s", username)
+        # Limpiar usuario expirado liberando sus asientos
+        await AsyncReservationService.release_user_seats(db, user)
+        await db.delete(user)
+        await db.commit()
         return None
     
-    if not verify_password(password, user.password_hash):
-        logger.warning(f"Intento de login con contraseña incorrecta: {username}")
+    if not await verify_password_async(password, user.password_hash):
+        logger.warning("Intento de login con contraseña incorrecta: %s", username)
         return None
     
-    logger.info(f"✅ Usuario autenticado exitosamente: {username}")
+    logger.info("✅ Usuario autenticado exitosamente: %s", username)
     return user
 
 
-def check_user_limit(db: Session) -> bool:
+async def check_user_limit(db: AsyncSession) -> bool:
     """
     Verifica si se puede crear un nuevo usuario (límite de 12).
     
     Args:
-        db: Sesión de base de datos
+        db: Sesión asíncrona de base de datos
     
     Returns:
         bool: True si se puede crear usuario, False si se alcanzó el límite
     """
-    active_users = db.query(User).filter(User.expires_at > datetime.utcnow()).count()
+    active_users = await db.scalar(
+        select(func.count(User.id)).where(User.expires_at > datetime.utcnow())
+    )
     
     if active_users >= 12:
-        logger.warning(f"🚫 Límite de usuarios alcanzado: {active_users}/12")
+        logger.warning("🚫 Límite de usuarios alcanzado: %s/12", active_users)
         return False
     
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,224 @@
+"""
+Índice compacto de disponibilidad de asientos.
+Por función guarda un entero por fila (bit i = asiento número i+1 libre) y los
+bloqueos temporales vigentes; las máscaras premium vienen del layout de la
+función. Se mantiene al día con los cambios confirmados del mapa de asientos
+(listener de seat_maps) y responde conteos, bloques libres y muestras
+aleatorias sin cargar objetos Seat.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import random
+import sys
+import threading
+import time
+import logging
+
+from cache import SeatMapRegistry, seat_maps
+from seat_finder import SeatLayout
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Duración de un bloqueo temporal de asientos durante el checkout
+SEAT_HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", "60"))
+
+
+class SeatAvailability:
+    """
+    Disponibilidad de una función para una versión del mapa de asientos.
+    - _free[fila]: asientos con estado available en la base de datos
+    - _holds: asiento -> vencimiento (epoch) de su bloqueo temporal vigente
+    Un asiento está disponible si está libre y no tiene un bloqueo vigente.
+    """
+
+    def __init__(self, layout: SeatLayout, version: int, seats: Iterable[Tuple[int, Optional[float]]]):
+        """
+        Args:
+            layout: Layout de la función
+            version: Versión del mapa de asientos leída antes de consultar
+            seats: Tuplas (id, vencimiento del bloqueo o None) de los asientos libres
+        """
+        seats = list(seats)
+        self.layout = layout
+        self.version = version
+        self._free: List[int] = layout.availability(seat_id for seat_id, _ in seats)
+        self._holds: Dict[int, float] = {
+            seat_id: expires_at for seat_id, expires_at in seats if expires_at is not None
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def showtime_id(self) -> int:
+        return self.layout.showtime_id
+
+    def apply(self, version: int, changes: Sequence[Dict]) -> None:
+        """
+        Aplica los cambios de una nueva versión del mapa.
+        Un bloqueo nuevo vence SEAT_HOLD_TTL_SECONDS después de recibir el cambio,
+        algunos milisegundos después que en la base de datos (nunca antes).
+        """
+        positions = self.layout.positions
+        expires_at = time.time() + SEAT_HOLD_TTL_SECONDS
+        with self._lock:
+            for change in changes:
+                location = positions.get(change["id"])
+                if location is None:
+                    continue
+                row, bit = location[0], 1 << location[1]
+                status = change["status"]
+                if status == "held":
+                    self._free[row] |= bit
+                    self._holds[change["id"]] = expires_at
+                elif status == "available":
+                    self._free[row] |= bit
+                    self._holds.pop(change["id"], None)
+                else:
+                    self._free[row] &= ~bit
+                    self._holds.pop(change["id"], None)
+            self.version = version
+
+    def rows(self, premium_only: bool = False) -> List[int]:
+        """
+        Mapa de disponibilidad efectiva por fila (descuenta bloqueos vigentes).
+
+        Args:
+            premium_only: Si True, solo asientos premium
+        """
+        now = time.time()
+        with self._lock:
+            rows = list(self._free)
+            if self._holds:
+                expired = [seat_id for seat_id, expires_at in self._holds.items() if expires_at <= now]
+                for seat_id in expired:
+                    del self._holds[seat_id]
+                positions = self.layout.positions
+                for seat_id in self._holds:
+                    row, position = positions[seat_id]
+                    rows[row] &= ~(1 << position)
+        if premium_only:
+            return [bits & mask for bits, mask in zip(rows, self.layout.premium_masks)]
+        return rows
+
+    def available_count(self, premium_only: bool = False) -> int:
+        """Cantidad de asientos disponibles (opcionalmente solo premium)"""
+        return sum(bits.bit_count() for bits in self.rows(premium_only))
+
+    def is_block_free(self, seat_ids: Iterable[int]) -> bool:
+        """Indica si todos los asientos indicados están disponibles"""
+        rows = self.rows()
+        positions = self.layout.positions
+        for seat_id in seat_ids:
+            location = positions.get(seat_id)
+            if location is None or not rows[location[0]] >> location[1] & 1:
+                return False
+        return True
+
+    def available_ids(self, premium_only: bool = False) -> List[int]:
+        """IDs de los asientos disponibles ordenados por fila y número"""
+        seat_ids = []
+        for row, bits in enumerate(self.rows(premium_only)):
+            row_ids = self.layout.seat_ids[row]
+            while bits:
+                lowest = bits & -bits
+                seat_ids.append(row_ids[lowest.bit_length() - 1])
+                bits ^= lowest
+        return seat_ids
+
+    def random_available(self, count: int, premium_only: bool = False) -> List[int]:
+        """
+        Elige al azar hasta count asientos disponibles distintos.
+
+        Returns:
+            List[int]: IDs elegidos (menos que count si no alcanzan)
+        """
+        rows = self.rows(premium_only)
+        counts = [bits.bit_count() for bits in rows]
+        total = sum(counts)
+        if total == 0 or count < 1:
+            return []
+
+        # Convertir rangos globales (0..total-1) en bits de cada fila
+        picks = sorted(random.sample(range(total), min(count, total)))
+        seat_ids = []
+        offset = 0
+        pick_index = 0
+        for row, (bits, row_count) in enumerate(zip(rows, counts)):
+            while pick_index < len(picks) and picks[pick_index] < offset + row_count:
+                remaining = bits
+                for _ in range(picks[pick_index] - offset):
+                    remaining &= remaining - 1
+                seat_ids.append(self.layout.seat_ids[row][(remaining & -remaining).bit_length() - 1])
+                pick_index += 1
+            offset += row_count
+        return seat_ids
+
+    def memory_bytes(self) -> int:
+        """Memoria aproximada del índice (bitsets y bloqueos, sin el layout compartido)"""
+        with self._lock:
+            size = sys.getsizeof(self._free) + sum(sys.getsizeof(bits) for bits in self._free)
+            size += sys.getsizeof(self._holds)
+        return size
+
+
+class AvailabilityIndex:
+    """
+    Índices de disponibilidad por función.
+    - Cada índice corresponde a una versión del mapa de asientos: si la versión
+      vigente es otra (cambio no aplicado o invalidación completa) se descarta
+      y se reconstruye desde la base de datos
+    - on_seat_map_change aplica los cambios confirmados en este y otros workers
+    """
+
+    def __init__(self, registry: SeatMapRegistry):
+        self._registry = registry
+        self._indexes: Dict[int, SeatAvailability] = {}
+        self._lock = threading.Lock()
+
+    def current_version(self, showtime_id: int) -> int:
+        """Versión vigente del mapa de asientos de la función"""
+        return self._registry.for_showtime(showtime_id).version
+
+    def get(self, showtime_id: int) -> Optional[SeatAvailability]:
+        """Índice de la función si refleja la versión vigente del mapa"""
+        availability = self._indexes.get(showtime_id)
+        if availability is None or availability.version != self.current_version(showtime_id):
+            return None
+        return availability
+
+    def store(self, availability: SeatAvailability) -> SeatAvailability:
+        """
+        Guarda un índice construido a partir de su versión. Si la versión cambió
+        mientras se construía, se devuelve pero no se guarda.
+        """
+        with self._lock:
+            if availability.version == self.current_version(availability.showtime_id):
+                self._indexes[availability.showtime_id] = availability
+        return availability
+
+    def invalidate(self, showtime_id: Optional[int] = None) -> None:
+        """Descarta el índice de una función (o todos)"""
+        with self._lock:
+            if showtime_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(showtime_id, None)
+
+    def on_seat_map_change(self, showtime_id: int, version: int, changes: Optional[List[Dict]]) -> None:
+        """
+        Listener de seat_maps: aplica los cambios de una nueva versión.
+        Si el índice no está en la versión anterior (o la invalidación es
+        completa) se descarta y se reconstruye en la próxima consulta.
+        """
+        availability = self._indexes.get(showtime_id)
+        if availability is None or availability.version >= version:
+            return
+        if changes is None or availability.version != version - 1:
+            self.invalidate(showtime_id)
+            return
+        availability.apply(version, changes)
+
+
+# Instancia global por proceso
+availability_index = AvailabilityIndex(seat_maps)
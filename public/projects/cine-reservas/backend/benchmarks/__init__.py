@@ -0,0 +1 @@
+# Benchmarks y pruebas de carga (se ejecutan a mano: python -m benchmarks.<script>)
@@ -0,0 +1,147 @@
+"""
+Benchmark del acceso a datos asíncrono (AsyncSession + asyncpg) frente al
+camino anterior: handlers async def que usaban la sesión síncrona y
+bloqueaban el event loop en cada consulta.
+
+Modo en proceso (por defecto): C coroutines concurrentes ejecutan la misma
+consulta de servicio N veces en total, una vez con AsyncReservationService y
+otra llamando a ReservationService con SessionLocal dentro del event loop.
+Reporta consultas/s, p99 y el retraso máximo del event loop (lo que sufre
+cualquier otro request del worker mientras tanto).
+
+Modo --http: C hilos golpean endpoints de lectura del servidor en ejecución
+durante --duration segundos y reportan requests/s y p99. Para comparar con el
+camino síncrono, correr el mismo modo contra un servidor del commit anterior.
+
+Uso (desde backend/):
+    python -m benchmarks.async_db [--concurrency 1,8,32,64] [--operations 500] [--query seats]
+    python -m benchmarks.async_db --http [--concurrency 8,32] [--duration 15]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+import argparse
+import asyncio
+import threading
+import time
+
+from database import AsyncSessionLocal, SessionLocal, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from services import AsyncReservationService, ReservationService, DEFAULT_SHOWTIME_ID
+
+from benchmarks.common import bench_data, create_bench_users, http_request, percentile, print_table
+
+# Consultas de servicio comparables en ambos caminos
+QUERIES = {
+    "seats": ("get_seats_with_reservation_flag", (DEFAULT_SHOWTIME_ID,)),
+    "showtimes": ("get_showtimes", ()),
+}
+
+
+async def _monitor_loop_lag(stop: asyncio.Event, interval: float = 0.001) -> float:
+    """Retraso máximo observado del event loop (segundos) hasta que se indique stop"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def _run_concurrent(operation: Callable, concurrency: int, operations: int) -> Tuple[List[float], float, float]:
+    """Ejecuta operations llamadas con concurrency coroutines; devuelve latencias, duración y lag"""
+    latencies: List[float] = []
+    remaining = iter(range(operations))
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop_lag(stop))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return latencies, elapsed, await monitor
+
+
+def build_operations(query: str) -> Tuple[Callable, Callable]:
+    """Crea la operación asíncrona y la equivalente síncrona sobre el event loop"""
+    method, args = QUERIES[query]
+    async_method = getattr(AsyncReservationService, method)
+    sync_method = getattr(ReservationService, method)
+
+    async def async_operation():
+        async with AsyncSessionLocal() as db:
+            await async_method(db, *args)
+
+    async def blocking_operation():
+        # Camino anterior: la consulta síncrona corre dentro del event loop
+        with SessionLocal() as db:
+            sync_method(db, *args)
+
+    return async_operation, blocking_operation
+
+
+async def run_in_process(args) -> None:
+    async_operation, blocking_operation = build_operations(args.query)
+    rows = []
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        for label, operation in (("async", async_operation), ("sync en loop", blocking_operation)):
+            await _run_concurrent(operation, concurrency, min(args.operations, 20))  # calentar el pool
+            latencies, elapsed, lag = await _run_concurrent(operation, concurrency, args.operations)
+            rows.append((concurrency, label, round(len(latencies) / elapsed),
+                         round(percentile(latencies, 0.99) * 1000, 2), round(lag * 1000, 2)))
+
+    print(f"Consulta: {args.query} | pool async: {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}")
+    print_table(("concurrencia", "camino", "consultas/s", "p99 ms", "lag máx ms"), rows)
+
+
+def run_http(args) -> None:
+    with bench_data():
+        _, token = create_bench_users(1)[0]
+        paths = ["/api/reservations/showtimes", "/api/reservations/my-reservations"]
+        rows = []
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            latencies: List[float] = []
+            errors = [0]
+            lock = threading.Lock()
+            deadline = time.perf_counter() + args.duration
+
+            def client(index: int):
+                local, failed = [], 0
+                while time.perf_counter() < deadline:
+                    status_code, _, elapsed = http_request("GET", paths[len(local) % len(paths)], token=token)
+                    local.append(elapsed)
+                    failed += status_code != 200
+                with lock:
+                    latencies.extend(local)
+                    errors[0] += failed
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(client, range(concurrency)))
+            rows.append((concurrency, round(len(latencies) / args.duration), round(percentile(latencies, 0.50) * 1000, 2),
+                         round(percentile(latencies, 0.99) * 1000, 2), errors[0]))
+
+    print_table(("concurrencia", "requests/s", "p50 ms", "p99 ms", "errores"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Niveles de concurrencia separados por coma")
+    parser.add_argument("--operations", type=int, default=500, help="Consultas por nivel (modo en proceso)")
+    parser.add_argument("--query", choices=sorted(QUERIES), default="seats")
+    parser.add_argument("--http", action="store_true", help="Carga HTTP contra BENCH_BASE_URL")
+    parser.add_argument("--duration", type=float, default=15, help="Segundos por nivel (modo --http)")
+    args = parser.parse_args()
+
+    if args.http:
+        run_http(args)
+    else:
+        asyncio.run(run_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
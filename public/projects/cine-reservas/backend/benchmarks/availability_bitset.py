@@ -0,0 +1,126 @@
+"""
+Benchmark del índice de disponibilidad por bitsets (availability.SeatAvailability)
+frente al camino ORM que materializaba objetos Seat.
+
+Sobre una función de prueba (por defecto 26 filas x 400 = 10.400 asientos, 30%
+reservados) compara:
+- memoria: Seat disponibles cargados por el ORM vs bitsets + bloqueos del índice
+  (el layout compartido se reporta aparte), medida con tracemalloc en una fase separada
+- latencia de: cantidad disponible, bloque libre, asientos al azar y disponibles premium
+  (ORM: una sesión y una consulta por operación, como un request; índice: vigente en memoria)
+
+Uso (desde backend/):
+    python -m benchmarks.availability_bitset [--rows 26] [--seats-per-row 400] [--iterations 50]
+"""
+
+import argparse
+import random
+import tracemalloc
+
+from database import SessionLocal
+from models import Seat
+from services import ReservationService
+
+from benchmarks.common import (
+    bench_data, create_bench_showtime, create_bench_users, percentile, print_table, reserve_fraction, time_calls
+)
+
+RANDOM_PICK = 4
+
+
+def load_available_seats(showtime_id: int, premium_only: bool = False):
+    """Camino ORM: asientos disponibles como objetos Seat"""
+    with SessionLocal() as db:
+        query = db.query(Seat).filter(Seat.showtime_id == showtime_id, Seat.status == "available")
+        if premium_only:
+            query = query.filter(Seat.is_premium.is_(True))
+        return query.all()
+
+
+def measure_memory(showtime_id: int) -> dict:
+    """Bytes retenidos por cada representación"""
+    tracemalloc.start()
+    with SessionLocal() as db:
+        before = tracemalloc.take_snapshot()
+        seats = db.query(Seat).filter(Seat.showtime_id == showtime_id, Seat.status == "available").all()
+        orm_bytes = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        available = len(seats)
+        del seats
+
+    with SessionLocal() as db:
+        before = tracemalloc.take_snapshot()
+        layout = ReservationService.get_seat_layout(db, showtime_id)
+        layout_bytes = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        before = tracemalloc.take_snapshot()
+        availability = ReservationService.get_seat_availability(db, showtime_id)
+        index_bytes = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    return {
+        "available": available,
+        "orm": orm_bytes,
+        "layout": layout_bytes,
+        "index": index_bytes,
+        "index_reported": availability.memory_bytes(),
+        "seats": len(layout),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=26)
+    parser.add_argument("--seats-per-row", type=int, default=400)
+    parser.add_argument("--reserved", type=float, default=0.3, help="Fracción de asientos reservados")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with bench_data():
+        user_id, _ = create_bench_users(1)[0]
+        showtime_id = create_bench_showtime(args.rows, args.seats_per_row)
+        reserve_fraction(showtime_id, user_id, args.reserved)
+
+        memory = measure_memory(showtime_id)
+        with SessionLocal() as db:
+            availability = ReservationService.get_seat_availability(db, showtime_id)
+        layout = availability.layout
+        middle_row = len(layout.row_letters) // 2
+        block = layout.seat_ids[middle_row][layout.width // 2:layout.width // 2 + RANDOM_PICK]
+
+        operations = {
+            "cantidad disponible": (
+                lambda: len(load_available_seats(showtime_id)),
+                lambda: availability.available_count(),
+            ),
+            "bloque libre": (
+                lambda: set(block) <= {seat.id for seat in load_available_seats(showtime_id)},
+                lambda: availability.is_block_free(block),
+            ),
+            f"{RANDOM_PICK} al azar": (
+                lambda: random.sample(load_available_seats(showtime_id), RANDOM_PICK),
+                lambda: availability.random_available(RANDOM_PICK),
+            ),
+            "premium disponibles": (
+                lambda: len(load_available_seats(showtime_id, premium_only=True)),
+                lambda: availability.available_count(premium_only=True),
+            ),
+        }
+
+        rows = []
+        for name, (orm_operation, index_operation) in operations.items():
+            orm = percentile(time_calls(orm_operation, args.iterations), 0.5)
+            index = percentile(time_calls(index_operation, args.iterations * 100), 0.5)
+            rows.append((name, round(orm * 1e6, 1), round(index * 1e6, 2), f"{orm / index:.0f}x"))
+
+    print(f"Asientos: {memory['seats']} | disponibles: {memory['available']}")
+    print_table(("memoria", "bytes"), [
+        ("Seat disponibles (ORM)", memory["orm"]),
+        ("índice: bitsets + bloqueos", memory["index"]),
+        ("índice: memory_bytes()", memory["index_reported"]),
+        ("layout compartido", memory["layout"]),
+    ])
+    print()
+    print_table(("operación", "ORM p50 µs", "índice p50 µs", "aceleración"), rows)
+
+
+if __name__ == "__main__":
+    main()
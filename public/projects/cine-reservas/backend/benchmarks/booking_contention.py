@@ -0,0 +1,182 @@
+"""
+Benchmark de contención de reservas (ReservationService.reserve_seats).
+
+Cientos de clientes compiten a la vez por un conjunto pequeño de asientos
+"calientes" de una función de prueba: cada usuario lanza varias reservas
+simultáneas de bloques superpuestos. Por ronda se reporta cuántas ganan,
+cuántas pierden por conflicto o por el límite de asientos, errores internos
+y latencias, y se verifica al final:
+- ningún asiento quedó con más de una reserva ni con estado inconsistente
+- ningún usuario superó MAX_SEATS_PER_USER en la función
+
+Por defecto corre en proceso sobre AsyncReservationService (pool asíncrono);
+con --http envía POST /api/reservations/book al servidor en ejecución.
+
+Uso (desde backend/):
+    python -m benchmarks.booking_contention [--clients 100,300] [--hot-seats 12] [--seats 4] [--rounds 3]
+    python -m benchmarks.booking_contention --http --clients 200
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import func, select, update
+
+from database import AsyncSessionLocal, SessionLocal
+from models import Reservation, Seat, SeatHold, User
+from services import AsyncReservationService, MAX_SEATS_PER_USER
+
+from benchmarks.common import (
+    bench_data, create_bench_showtime, create_bench_users, http_request, print_table, summarize
+)
+
+OUTCOMES = ("ok", "conflicto", "límite", "error")
+
+
+def classify(success: bool, message: str) -> str:
+    """Resultado de un intento a partir del mensaje del servicio"""
+    if success:
+        return "ok"
+    if message.startswith("Asientos no disponibles"):
+        return "conflicto"
+    if message.startswith("Límite"):
+        return "límite"
+    return "error"
+
+
+async def attempt_in_process(user_id: int, showtime_id: int, seat_ids: List[int]) -> Tuple[str, float]:
+    """Un intento de reserva con su propia sesión asíncrona"""
+    user = User(id=user_id, username=f"bench_{user_id}")
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        success, message, _ = await AsyncReservationService.reserve_seats(db, showtime_id, user, seat_ids)
+    return classify(success, message), time.perf_counter() - started
+
+
+def attempt_http(token: str, showtime_id: int, seat_ids: List[int]) -> Tuple[str, float]:
+    """Un intento de reserva por HTTP"""
+    status_code, payload, elapsed = http_request(
+        "POST", "/api/reservations/book", {"seat_ids": seat_ids, "showtime_id": showtime_id}, token
+    )
+    if status_code == 200:
+        return "ok", elapsed
+    detail = json.loads(payload).get("detail", "") if status_code == 409 else ""
+    return classify(False, str(detail)), elapsed
+
+
+def reset_showtime(showtime_id: int) -> None:
+    """Libera todos los asientos de la función de prueba entre rondas"""
+    with SessionLocal() as db:
+        db.execute(Reservation.__table__.delete().where(Reservation.showtime_id == showtime_id))
+        db.execute(SeatHold.__table__.delete().where(
+            SeatHold.seat_id.in_(select(Seat.id).where(Seat.showtime_id == showtime_id))
+        ))
+        db.execute(update(Seat).where(Seat.showtime_id == showtime_id).values(status="available"))
+        db.commit()
+
+
+def check_invariants(showtime_id: int) -> List[str]:
+    """Verifica doble reserva, estados de asientos y límite por usuario"""
+    problems = []
+    with SessionLocal() as db:
+        reserved = set(db.scalars(
+            select(Seat.id).where(Seat.showtime_id == showtime_id, Seat.status == "reserved")
+        ).all())
+        booked = db.execute(
+            select(Reservation.seat_id, func.count()).where(Reservation.showtime_id == showtime_id)
+            .group_by(Reservation.seat_id)
+        ).all()
+        per_user = db.execute(
+            select(Reservation.user_id, func.count()).where(Reservation.showtime_id == showtime_id)
+            .group_by(Reservation.user_id)
+        ).all()
+
+    doubles = [seat_id for seat_id, count in booked if count > 1]
+    if doubles:
+        problems.append(f"asientos con más de una reserva: {doubles}")
+    if reserved != {seat_id for seat_id, _ in booked}:
+        problems.append("estado 'reserved' no coincide con las reservas")
+    over_limit = [user_id for user_id, count in per_user if count > MAX_SEATS_PER_USER]
+    if over_limit:
+        problems.append(f"usuarios sobre el límite de {MAX_SEATS_PER_USER}: {over_limit}")
+    return problems
+
+
+def plan_requests(users: List[Tuple[int, str]], hot_seats: List[int], seats: int,
+                  requests_per_user: int) -> List[Tuple[int, str, List[int]]]:
+    """Bloques superpuestos de asientos calientes para cada intento"""
+    plans = []
+    for user_id, token in users:
+        for _ in range(requests_per_user):
+            start = random.randrange(len(hot_seats) - seats + 1)
+            plans.append((user_id, token, hot_seats[start:start + seats]))
+    random.shuffle(plans)
+    return plans
+
+
+async def run_round(plans, showtime_id: int, use_http: bool) -> Tuple[List[str], List[float], float]:
+    """Lanza todos los intentos a la vez y espera sus resultados"""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    if use_http:
+        with ThreadPoolExecutor(max_workers=len(plans)) as executor:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(executor, attempt_http, token, showtime_id, seat_ids)
+                for _, token, seat_ids in plans
+            ))
+    else:
+        results = await asyncio.gather(*(
+            attempt_in_process(user_id, showtime_id, seat_ids) for user_id, _, seat_ids in plans
+        ))
+    elapsed = time.perf_counter() - started
+    return [outcome for outcome, _ in results], [latency for _, latency in results], elapsed
+
+
+async def run(args) -> None:
+    rows, problems = [], []
+    for clients in (int(value) for value in args.clients.split(",")):
+        showtime_id = create_bench_showtime(4, 10)
+        with SessionLocal() as db:
+            hot_seats = db.scalars(
+                select(Seat.id).where(Seat.showtime_id == showtime_id).order_by(Seat.id).limit(args.hot_seats)
+            ).all()
+        users = create_bench_users(clients)
+
+        for round_index in range(args.rounds):
+            reset_showtime(showtime_id)
+            plans = plan_requests(users, hot_seats, args.seats, args.requests_per_user)
+            outcomes, latencies, elapsed = await run_round(plans, showtime_id, args.http)
+            problems.extend(f"{clients} clientes, ronda {round_index + 1}: {problem}"
+                            for problem in check_invariants(showtime_id))
+
+            latency = summarize(latencies)
+            rows.append((clients, round_index + 1, len(plans), *(outcomes.count(outcome) for outcome in OUTCOMES),
+                         latency["p50_ms"], latency["p99_ms"], round(elapsed * 1000)))
+
+    print_table(("clientes", "ronda", "intentos", *OUTCOMES, "p50 ms", "p99 ms", "total ms"), rows)
+    print("Invariantes: OK" if not problems else "\n".join(["Invariantes violadas:", *problems]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="100,300", help="Usuarios concurrentes por escenario, separados por coma")
+    parser.add_argument("--hot-seats", type=int, default=12, help="Asientos por los que compiten")
+    parser.add_argument("--seats", type=int, default=4, help="Asientos por intento")
+    parser.add_argument("--requests-per-user", type=int, default=2, help="Intentos simultáneos de cada usuario")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--http", action="store_true", help="Reservar por HTTP contra BENCH_BASE_URL")
+    args = parser.parse_args()
+
+    if not 1 <= args.seats <= min(args.hot_seats, MAX_SEATS_PER_USER):
+        parser.error(f"--seats debe estar entre 1 y min(--hot-seats, {MAX_SEATS_PER_USER})")
+    with bench_data():
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
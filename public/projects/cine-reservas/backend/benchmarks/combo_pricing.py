@@ -0,0 +1,98 @@
+"""
+Microbenchmark del costeo de canastas de reservas.
+
+Compara, para canastas de distinto tamaño:
+- antes: suma en float con búsqueda lineal del combo (REGULAR_COMBOS + PREMIUM_COMBOS
+  concatenadas en cada reserva)
+- ReservationService.calculate_total_cost: índice por nombre del catálogo
+y verifica que ambos caminos cobran exactamente el mismo total por canasta.
+No usa la base de datos.
+
+Uso (desde backend/):
+    python -m benchmarks.combo_pricing [--basket-sizes 6,100,10000] [--reservations 200000]
+"""
+
+from types import SimpleNamespace
+import argparse
+import random
+import time
+
+from catalog import (
+    BASE_SEAT_PRICE, PREMIUM_COMBOS, PREMIUM_DISCOUNT, PREMIUM_SEAT_PRICE, REGULAR_COMBOS
+)
+from services import ReservationService
+
+from benchmarks.common import print_table
+
+
+def legacy_combo_price(combo_name: str, is_premium: bool = False) -> float:
+    """Búsqueda anterior: concatena los catálogos y los recorre en cada llamada"""
+    all_combos = REGULAR_COMBOS + (PREMIUM_COMBOS if is_premium else [])
+    for combo in all_combos:
+        if combo["name"] == combo_name:
+            return combo["price"]
+    return 0.0
+
+
+def legacy_total_cost(reservations, is_premium: bool = False) -> float:
+    """Costeo anterior (referencia de los totales cobrados)"""
+    total = 0.0
+    for reservation in reservations:
+        total += PREMIUM_SEAT_PRICE if reservation.seat.is_premium else BASE_SEAT_PRICE
+        if reservation.combo:
+            total += legacy_combo_price(reservation.combo, is_premium)
+    if is_premium:
+        total *= (1 - PREMIUM_DISCOUNT)
+    return round(total, 2)
+
+
+def build_baskets(basket_size: int, total_reservations: int):
+    """Canastas aleatorias: 30% asientos premium, 60% con combo, mitad de dueños premium"""
+    combo_names = [combo["name"] for combo in REGULAR_COMBOS + PREMIUM_COMBOS] + ["Combo Inexistente"]
+    rng = random.Random(basket_size)
+    baskets, owners_premium = [], []
+    for _ in range(max(1, total_reservations // basket_size)):
+        baskets.append([
+            SimpleNamespace(seat=SimpleNamespace(is_premium=rng.random() < 0.3),
+                            combo=rng.choice(combo_names) if rng.random() < 0.6 else None)
+            for _ in range(basket_size)
+        ])
+        owners_premium.append(rng.random() < 0.5)
+    return baskets, owners_premium
+
+
+def timed(fn) -> tuple:
+    """Resultado de fn y su duración en segundos"""
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--basket-sizes", default="6,100,10000", help="Reservas por canasta, separadas por coma")
+    parser.add_argument("--reservations", type=int, default=200_000, help="Reservas totales por tamaño")
+    args = parser.parse_args()
+
+    rows = []
+    for basket_size in (int(value) for value in args.basket_sizes.split(",")):
+        baskets, owners_premium = build_baskets(basket_size, args.reservations)
+        pairs = list(zip(baskets, owners_premium))
+        reservations = sum(len(basket) for basket in baskets)
+
+        legacy, legacy_seconds = timed(lambda: [legacy_total_cost(b, p) for b, p in pairs])
+        current, current_seconds = timed(lambda: [ReservationService.calculate_total_cost(b, p) for b, p in pairs])
+
+        if legacy != current:
+            raise AssertionError("calculate_total_cost no coincide con el costeo anterior")
+
+        for label, seconds in (("antes (lineal)", legacy_seconds),
+                               ("calculate_total_cost", current_seconds)):
+            rows.append((basket_size, len(baskets), label, round(seconds * 1e9 / reservations, 1),
+                         f"{legacy_seconds / seconds:.1f}x"))
+
+    print_table(("canasta", "canastas", "camino", "ns/reserva", "aceleración"), rows)
+
+
+if __name__ == "__main__":
+    main()
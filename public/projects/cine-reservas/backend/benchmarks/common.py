@@ -0,0 +1,227 @@
+"""
+Utilidades compartidas por los benchmarks.
+- Estadísticas de latencia (p50/p95/p99) e impresión de tablas
+- Cliente HTTP mínimo (urllib) para medir contra un servidor en ejecución
+- Fixtures en la base de datos: salas de cualquier tamaño y usuarios de prueba
+  que no cuentan para el límite de registro ni expiran durante la corrida
+
+Se ejecutan desde el directorio backend (python -m benchmarks.<script>) con
+DATABASE_URL apuntando a la misma base de datos que el servidor.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import json
+import os
+import statistics
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from sqlalchemy import delete, select, text
+
+from auth import create_access_token, get_password_hash
+from database import SessionLocal
+from models import Auditorium, AuditoriumSeat, Reservation, Seat, User
+
+# Servidor contra el que corren los benchmarks HTTP
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://localhost:8000")
+
+# Prefijo de los datos creados por los benchmarks (para limpiarlos si una corrida se corta)
+BENCH_PREFIX = "bench_"
+
+ROW_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Percentil por rango más cercano (fraction entre 0 y 1)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Resumen de latencias en milisegundos"""
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+    }
+
+
+def time_calls(fn, iterations: int, warmup: int = 1) -> List[float]:
+    """Ejecuta fn varias veces y devuelve la duración de cada llamada (segundos)"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def print_table(headers: Sequence[str], rows: Iterable[Sequence]) -> None:
+    """Imprime una tabla de texto alineada"""
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max([len(str(header))] + [len(row[index]) for row in rows]) for index, header in enumerate(headers)]
+    print("  ".join(str(header).rjust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+# --- Cliente HTTP ---
+
+def http_request(method: str, path: str, body: Optional[Dict] = None,
+                 token: Optional[str] = None, timeout: float = 30) -> Tuple[int, bytes, float]:
+    """
+    Envía un request al servidor de benchmarks.
+
+    Returns:
+        Tuple[int, bytes, float]: (status HTTP, cuerpo, segundos transcurridos)
+    """
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(BASE_URL + path, data=data, headers=headers, method=method)
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            return response.status, payload, time.perf_counter() - started
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), time.perf_counter() - started
+
+
+def scrape_metric(name: str, **labels: str) -> float:
+    """
+    Suma las series de una métrica de /metrics que coinciden con las etiquetas.
+    Con varios workers cada scrape lee un solo worker: correr el servidor con uno.
+    """
+    _, payload, _ = http_request("GET", "/metrics")
+    wanted = [f'{key}="{value}"' for key, value in labels.items()]
+    total = 0.0
+    for line in payload.decode("utf-8").splitlines():
+        if line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        metric = series.split("{", 1)[0]
+        if metric == name and all(label in series for label in wanted):
+            total += float(value)
+    return total
+
+
+# --- Fixtures en la base de datos ---
+
+def _premium_layout(rows: int, seats_per_row: int) -> Iterator[Tuple[str, int, bool]]:
+    """Asientos de la plantilla: premium en las dos filas centrales, mitad central"""
+    premium_rows = {rows // 2 - 1, rows // 2}
+    quarter = seats_per_row // 4
+    for row in range(rows):
+        for number in range(1, seats_per_row + 1):
+            is_premium = row in premium_rows and quarter < number <= seats_per_row - quarter
+            yield ROW_LETTERS[row], number, is_premium
+
+
+def create_bench_showtime(rows: int, seats_per_row: int) -> int:
+    """
+    Crea una sala de rows x seats_per_row y una función en ella
+    (con la función create_showtime de init.sql).
+
+    Returns:
+        int: ID de la función creada
+    """
+    if not 1 <= rows <= len(ROW_LETTERS):
+        raise ValueError(f"rows debe estar entre 1 y {len(ROW_LETTERS)}")
+
+    with SessionLocal() as db:
+        auditorium = Auditorium(name=f"{BENCH_PREFIX}{uuid.uuid4().hex[:12]}", rows=rows, seats_per_row=seats_per_row)
+        db.add(auditorium)
+        db.flush()
+        db.bulk_insert_mappings(AuditoriumSeat, [
+            {"auditorium_id": auditorium.id, "row_letter": row_letter, "number": number, "is_premium": is_premium}
+            for row_letter, number, is_premium in _premium_layout(rows, seats_per_row)
+        ])
+        showtime_id = db.execute(
+            text("SELECT create_showtime(:auditorium_id, :title, :starts_at)"),
+            {"auditorium_id": auditorium.id, "title": f"{BENCH_PREFIX}{rows}x{seats_per_row}",
+             "starts_at": datetime.utcnow() + timedelta(days=1)}
+        ).scalar_one()
+        db.commit()
+    return showtime_id
+
+
+def create_bench_users(count: int, is_premium: bool = False) -> List[Tuple[int, str]]:
+    """
+    Crea usuarios de prueba que expiran en un día y emite un token para cada uno.
+    Se insertan directamente (sin /register) para no chocar con el límite de
+    usuarios simultáneos; todos comparten un hash bcrypt.
+
+    Returns:
+        List[Tuple[int, str]]: (user_id, token JWT) de cada usuario
+    """
+    password_hash = get_password_hash(uuid.uuid4().hex)
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    run_id = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        users = [
+            User(username=f"{BENCH_PREFIX}{run_id}_{index}", password_hash=password_hash,
+                 expires_at=expires_at, is_premium=is_premium)
+            for index in range(count)
+        ]
+        db.add_all(users)
+        db.commit()
+        credentials = [(user.id, user.username) for user in users]
+    return [
+        (user_id, create_access_token({"sub": username, "user_id": user_id}))
+        for user_id, username in credentials
+    ]
+
+
+def reserve_fraction(showtime_id: int, user_id: int, fraction: float) -> int:
+    """
+    Marca como reservada una fracción de los asientos de la función (uno de
+    cada 1/fraction), directamente en la base de datos.
+
+    Returns:
+        int: Cantidad de asientos reservados
+    """
+    step = max(1, round(1 / fraction)) if fraction > 0 else 0
+    if not step:
+        return 0
+    with SessionLocal() as db:
+        seat_ids = db.scalars(
+            select(Seat.id).where(Seat.showtime_id == showtime_id).order_by(Seat.id)
+        ).all()[::step]
+        db.bulk_insert_mappings(Reservation, [
+            {"user_id": user_id, "showtime_id": showtime_id, "seat_id": seat_id} for seat_id in seat_ids
+        ])
+        db.execute(Seat.__table__.update().where(Seat.id.in_(seat_ids)).values(status="reserved"))
+        db.commit()
+    return len(seat_ids)
+
+
+def cleanup_bench_data() -> None:
+    """Elimina las salas (con sus funciones, asientos y reservas) y usuarios de prueba"""
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.username.like(f"{BENCH_PREFIX}%")))
+        db.execute(delete(Auditorium).where(Auditorium.name.like(f"{BENCH_PREFIX}%")))
+        db.commit()
+
+
+@contextmanager
+def bench_data() -> Iterator[None]:
+    """Contexto que limpia los datos de prueba al terminar (aunque la corrida falle)"""
+    try:
+        yield
+    finally:
+        cleanup_bench_data()
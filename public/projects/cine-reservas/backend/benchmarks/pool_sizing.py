@@ -0,0 +1,195 @@
+"""
+Benchmark de throughput según el tamaño del pool de conexiones.
+
+Modo en proceso (por defecto): para cada tamaño de pool crea un engine
+asíncrono propio (misma configuración que database.async_engine, sin
+overflow) y durante --duration segundos C workers concurrentes ejecutan:
+- grid: _build_seats_grid de una función de 1040 asientos (ruta de la grilla sin instantánea)
+- book: reservar y cancelar un asiento propio (rutas /book y /cancel)
+Reporta operaciones/s, p99 y espera promedio para obtener una conexión.
+
+Modo --http: la misma carga contra el servidor en ejecución (GET /seats,
+que sin cambios se sirve desde la instantánea, y POST /book + DELETE /cancel).
+El tamaño del pool se fija al iniciar el
+servidor (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING): reiniciarlo con
+cada configuración; la tabla muestra la que reporta /health/pool.
+
+Uso (desde backend/):
+    python -m benchmarks.pool_sizing [--pool-sizes 2,5,10,20] [--concurrency 32] [--duration 10] [--no-pre-ping]
+    python -m benchmarks.pool_sizing --http [--concurrency 32]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Tuple
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from database import ASYNC_DATABASE_URL, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, SessionLocal
+from metrics import DB_POOL_WAIT_SECONDS, timed_pool_class
+from models import Seat, User
+from routers.reservations import _build_seats_grid
+from services import ReservationService
+
+from benchmarks.common import (
+    bench_data, create_bench_showtime, create_bench_users, http_request, percentile, print_table
+)
+
+WORKLOADS = ("grid", "book")
+
+
+def partition_seats(showtime_id: int, workers: int) -> List[List[int]]:
+    """Reparte los asientos de la función entre los workers (sin conflictos entre ellos)"""
+    with SessionLocal() as db:
+        seat_ids = db.scalars(select(Seat.id).where(Seat.showtime_id == showtime_id).order_by(Seat.id)).all()
+    return [list(seat_ids[index::workers]) for index in range(workers)]
+
+
+async def run_workers(operations: List[Callable[[], Awaitable[None]]], duration: float) -> Tuple[List[float], int]:
+    """Cada worker repite su operación hasta el deadline; devuelve latencias y errores"""
+    latencies: List[float] = []
+    errors = [0]
+    deadline = time.perf_counter() + duration
+
+    async def worker(operation):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                errors[0] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(operation) for operation in operations))
+    return latencies, errors[0]
+
+
+def grid_operation(sessions: async_sessionmaker, showtime_id: int):
+    """Reconstruye la grilla completa de la función (sin instantánea cacheada)"""
+    async def operation():
+        async with sessions() as db:
+            await db.run_sync(_build_seats_grid, showtime_id, 0)
+    return operation
+
+
+def book_operation(sessions: async_sessionmaker, showtime_id: int, user_id: int, seat_ids: List[int]):
+    """Reserva y cancela en ronda los asientos propios del worker"""
+    user = User(id=user_id, username=f"bench_{user_id}")
+    cycle = itertools.cycle(seat_ids)
+
+    def book_and_cancel(db, seat_id):
+        success, message, _ = ReservationService.reserve_seats(db, showtime_id, user, [seat_id])
+        if not success:
+            raise RuntimeError(message)
+        ReservationService.cancel_reservation(db, showtime_id, user, seat_id)
+
+    async def operation():
+        async with sessions() as db:
+            await db.run_sync(book_and_cancel, next(cycle))
+    return operation
+
+
+async def run_in_process(args, showtime_id: int, users) -> None:
+    rows = []
+    partitions = partition_seats(showtime_id, args.concurrency)
+    for pool_size in (int(value) for value in args.pool_sizes.split(",")):
+        engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=timed_pool_class(AsyncAdaptedQueuePool),
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=not args.no_pre_ping,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+        sessions = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        pool_label = engine.sync_engine.pool.metrics_label
+        try:
+            for workload in WORKLOADS:
+                if workload == "grid":
+                    operations = [grid_operation(sessions, showtime_id) for _ in range(args.concurrency)]
+                else:
+                    operations = [book_operation(sessions, showtime_id, user_id, seats)
+                                  for (user_id, _), seats in zip(users, partitions)]
+                await run_workers(operations, min(2.0, args.duration))  # calentar el pool
+                waits_before = DB_POOL_WAIT_SECONDS.summary(pool_label)
+                latencies, errors = await run_workers(operations, args.duration)
+                wait_count, wait_sum = (after - before for after, before in
+                                        zip(DB_POOL_WAIT_SECONDS.summary(pool_label), waits_before))
+                rows.append((pool_size, workload, round(len(latencies) / args.duration),
+                             round(percentile(latencies, 0.99) * 1000, 2),
+                             round(wait_sum / wait_count * 1000, 3) if wait_count else 0.0, errors))
+        finally:
+            await engine.dispose()
+
+    print(f"Concurrencia: {args.concurrency} | pre-ping: {not args.no_pre_ping}")
+    print_table(("pool", "carga", "ops/s", "p99 ms", "espera checkout ms", "errores"), rows)
+
+
+def run_http(args, showtime_id: int, users) -> None:
+    partitions = partition_seats(showtime_id, args.concurrency)
+
+    def grid_client(_, deadline):
+        samples, failed = [], 0
+        while time.perf_counter() < deadline:
+            status_code, _, elapsed = http_request("GET", f"/api/reservations/seats?showtime_id={showtime_id}")
+            samples.append(elapsed)
+            failed += status_code != 200
+        return samples, failed
+
+    def book_client(index, deadline):
+        (_, token), seats = users[index], partitions[index]
+        samples, failed = [], 0
+        while time.perf_counter() < deadline:
+            seat_id = seats[len(samples) % len(seats)]
+            started = time.perf_counter()
+            booked, _, _ = http_request("POST", "/api/reservations/book",
+                                        {"seat_ids": [seat_id], "showtime_id": showtime_id}, token)
+            cancelled, _, _ = http_request("DELETE", f"/api/reservations/cancel/{seat_id}?showtime_id={showtime_id}",
+                                           token=token)
+            samples.append(time.perf_counter() - started)
+            failed += booked != 200 or cancelled != 200
+        return samples, failed
+
+    _, payload, _ = http_request("GET", "/health/pool")
+    pool = json.loads(payload)["data"]["async"]
+    rows = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for workload, client in (("grid", grid_client), ("book", book_client)):
+            deadline = time.perf_counter() + args.duration
+            results = list(executor.map(client, range(args.concurrency), [deadline] * args.concurrency))
+            latencies = [sample for samples, _ in results for sample in samples]
+            rows.append((f"{pool['size']}+{pool['max_overflow']}", workload, round(len(latencies) / args.duration),
+                         round(percentile(latencies, 0.99) * 1000, 2), sum(failed for _, failed in results)))
+
+    print(f"Concurrencia: {args.concurrency}")
+    print_table(("pool servidor", "carga", "ops/s", "p99 ms", "errores"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", default="2,5,10,20", help="Tamaños de pool separados por coma")
+    parser.add_argument("--concurrency", type=int, default=32, help="Workers concurrentes")
+    parser.add_argument("--duration", type=float, default=10, help="Segundos por medición")
+    parser.add_argument("--no-pre-ping", action="store_true", help="Desactivar pre-ping en los engines de prueba")
+    parser.add_argument("--http", action="store_true", help="Carga HTTP contra BENCH_BASE_URL")
+    args = parser.parse_args()
+
+    with bench_data():
+        showtime_id = create_bench_showtime(26, 40)
+        users = create_bench_users(args.concurrency)
+        if args.http:
+            run_http(args, showtime_id, users)
+        else:
+            asyncio.run(run_in_process(args, showtime_id, users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Prueba de carga del canal de tiempo real (SeatEventHub y /ws/seats).
+
+Modo en proceso (por defecto): N suscriptores idle, cada uno una tarea que
+espera su cola como el handler WebSocket, y un hilo que publica eventos como
+lo hacen los listeners de seat_maps tras un commit. Mide:
+- memoria por suscriptor (cola + tarea), con tracemalloc en una fase aparte
+- latencia de publicación hasta que cada suscriptor recibe el mensaje
+
+Modo --ws: abre N conexiones reales a /ws/seats de una función de prueba y
+genera cambios bloqueando y liberando un asiento por HTTP; mide la latencia
+desde el envío del request hasta la recepción en cada cliente. Requiere el
+paquete websockets (incluido en uvicorn[standard]) y un límite de archivos
+abiertos (ulimit -n) mayor que N.
+
+Uso (desde backend/):
+    python -m benchmarks.realtime_fanout [--subscribers 1000,5000,10000] [--events 20]
+    python -m benchmarks.realtime_fanout --ws --subscribers 500
+"""
+
+from typing import List, Tuple
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from realtime import SeatEventHub
+
+from benchmarks.common import (
+    BASE_URL, bench_data, create_bench_showtime, create_bench_users, http_request, print_table, summarize
+)
+
+
+async def _consume(queue: asyncio.Queue, events: int, received: List[Tuple[str, float]]) -> None:
+    """Suscriptor idle: recibe events mensajes y anota cuándo llegó cada uno (sin procesarlo)"""
+    for _ in range(events):
+        message = await queue.get()
+        received.append((message, time.perf_counter()))
+
+
+async def measure_memory(subscribers: int) -> float:
+    """Bytes asignados por suscriptor (cola del hub y tarea que la espera)"""
+    hub = SeatEventHub()
+    hub.bind(asyncio.get_running_loop())
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = [asyncio.create_task(_consume(hub.subscribe(1), 1, [])) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return allocated / subscribers
+
+
+async def measure_fanout(subscribers: int, events: int) -> dict:
+    """Latencia de difusión publicando desde otro hilo (camino de un commit)"""
+    hub = SeatEventHub(queue_size=events + 1)
+    hub.bind(asyncio.get_running_loop())
+    received: List[Tuple[str, float]] = []
+    tasks = [asyncio.create_task(_consume(hub.subscribe(1), events, received)) for _ in range(subscribers)]
+    await asyncio.sleep(0)
+
+    def publisher():
+        for version in range(1, events + 1):
+            hub.publish(1, {"type": "seat_changes", "version": version, "sent_at": time.perf_counter(),
+                            "changes": [{"id": version, "status": "reserved"}]})
+            time.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.to_thread(publisher)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    result = summarize([received_at - json.loads(message)["sent_at"] for message, received_at in received])
+    result["events_per_s"] = round(subscribers * events / elapsed)
+    return result
+
+
+async def measure_websockets(subscribers: int, events: int) -> dict:
+    """Latencia extremo a extremo: request HTTP que cambia un asiento -> mensaje en cada cliente"""
+    import websockets
+
+    showtime_id = create_bench_showtime(4, 10)
+    _, token = create_bench_users(1)[0]
+    status_code, payload, _ = http_request("GET", f"/api/reservations/seats?showtime_id={showtime_id}")
+    if status_code != 200:
+        raise RuntimeError(f"No se pudo leer la grilla de prueba: {status_code}")
+    seat_id = json.loads(payload)["seats"][0]["id"]
+
+    url = f"{BASE_URL.replace('http', 'ws', 1)}/ws/seats?showtime_id={showtime_id}"
+    sockets = []
+    for _ in range(subscribers):
+        socket = await websockets.connect(url, max_queue=events + 2)
+        await socket.recv()  # hello
+        sockets.append(socket)
+
+    latencies: List[float] = []
+    try:
+        for index in range(events):
+            if index % 2 == 0:
+                request = ("POST", "/api/reservations/hold", {"seat_ids": [seat_id], "showtime_id": showtime_id})
+            else:
+                request = ("DELETE", f"/api/reservations/hold?showtime_id={showtime_id}", None)
+            sent_at = time.perf_counter()
+            receivers = [asyncio.create_task(socket.recv()) for socket in sockets]
+            await asyncio.to_thread(http_request, *request, token)
+            for receiver in asyncio.as_completed(receivers):
+                await receiver
+                latencies.append(time.perf_counter() - sent_at)
+    finally:
+        await asyncio.gather(*(socket.close() for socket in sockets), return_exceptions=True)
+    return summarize(latencies)
+
+
+async def run(args) -> None:
+    rows = []
+    for subscribers in (int(value) for value in args.subscribers.split(",")):
+        if args.ws:
+            result = await measure_websockets(subscribers, args.events)
+            rows.append((subscribers, "-", result["p50_ms"], result["p95_ms"], result["p99_ms"], "-"))
+            continue
+        bytes_per_subscriber = await measure_memory(subscribers)
+        result = await measure_fanout(subscribers, args.events)
+        rows.append((subscribers, round(bytes_per_subscriber), result["p50_ms"], result["p95_ms"],
+                     result["p99_ms"], result["events_per_s"]))
+
+    print_table(("suscriptores", "bytes/suscriptor", "p50 ms", "p95 ms", "p99 ms", "mensajes/s"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", default="1000,5000,10000", help="Cantidades de suscriptores separadas por coma")
+    parser.add_argument("--events", type=int, default=20, help="Eventos publicados por corrida")
+    parser.add_argument("--ws", action="store_true", help="Conexiones WebSocket reales contra BENCH_BASE_URL")
+    args = parser.parse_args()
+
+    if args.ws:
+        with bench_data():
+            asyncio.run(run(args))
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de la grilla de asientos (GET /api/reservations/seats).
+
+Para salas de tamaño creciente mide, en proceso y sin la instantánea cacheada:
+- consultas SQL y latencia de _build_seats_grid (una consulta con LEFT JOINs)
+- lo mismo con la construcción anterior (una consulta de reserva por asiento)
+Con --http mide además el endpoint contra un servidor en ejecución
+(consultas por request leídas de /metrics; usar un solo worker).
+
+Uso (desde backend/):
+    python -m benchmarks.seats_grid [--sizes 8x12,20x30,26x100,26x400] [--iterations 20] [--http]
+"""
+
+import argparse
+
+from database import SessionLocal
+from metrics import start_request_query_count
+from models import Reservation
+from routers.reservations import _build_seats_grid
+from services import ReservationService
+
+from benchmarks.common import (
+    bench_data, create_bench_showtime, create_bench_users, http_request, print_table,
+    reserve_fraction, scrape_metric, summarize, time_calls
+)
+
+# Ruta tal como la etiqueta el middleware de métricas
+GRID_ROUTE = "/api/reservations/seats"
+
+
+def legacy_grid(db, showtime_id: int) -> int:
+    """Construcción anterior: todos los asientos y luego una consulta de reserva por asiento"""
+    reserved = 0
+    for seat in ReservationService.get_all_seats(db, showtime_id):
+        if db.query(Reservation).filter(Reservation.seat_id == seat.id).first():
+            reserved += 1
+    return reserved
+
+
+def measure_in_process(showtime_id: int, iterations: int, legacy: bool) -> dict:
+    """Latencia y consultas por construcción de la grilla (sesión nueva en cada llamada)"""
+    query_counts = []
+
+    def build():
+        counter = start_request_query_count()
+        with SessionLocal() as db:
+            if legacy:
+                legacy_grid(db, showtime_id)
+            else:
+                _build_seats_grid(db, showtime_id, 0)
+        query_counts.append(counter[0])
+
+    result = summarize(time_calls(build, iterations))
+    result["queries"] = max(query_counts)
+    return result
+
+
+def measure_http(showtime_id: int, iterations: int) -> dict:
+    """Latencia del endpoint y consultas SQL promedio por request"""
+    path = f"{GRID_ROUTE}?showtime_id={showtime_id}"
+    queries_before = scrape_metric("cinema_db_queries_per_request_sum", route=GRID_ROUTE)
+    requests_before = scrape_metric("cinema_db_queries_per_request_count", route=GRID_ROUTE)
+
+    def fetch():
+        status_code, _, _ = http_request("GET", path)
+        if status_code != 200:
+            raise RuntimeError(f"GET {path} respondió {status_code}")
+
+    result = summarize(time_calls(fetch, iterations))
+    queries = scrape_metric("cinema_db_queries_per_request_sum", route=GRID_ROUTE) - queries_before
+    requests = scrape_metric("cinema_db_queries_per_request_count", route=GRID_ROUTE) - requests_before
+    result["queries"] = round(queries / requests, 2) if requests else "-"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="8x12,20x30,26x100,26x400", help="Salas FILASxASIENTOS separadas por coma")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--reserved", type=float, default=0.3, help="Fracción de asientos reservados")
+    parser.add_argument("--http", action="store_true", help="Medir también el endpoint HTTP")
+    args = parser.parse_args()
+
+    rows = []
+    with bench_data():
+        user_id, _ = create_bench_users(1)[0]
+        for size in args.sizes.split(","):
+            hall_rows, seats_per_row = (int(part) for part in size.lower().split("x"))
+            showtime_id = create_bench_showtime(hall_rows, seats_per_row)
+            reserve_fraction(showtime_id, user_id, args.reserved)
+            seats = hall_rows * seats_per_row
+
+            results = [("join", measure_in_process(showtime_id, args.iterations, legacy=False)),
+                       ("n+1", measure_in_process(showtime_id, max(1, args.iterations // 4), legacy=True))]
+            if args.http:
+                results.append(("http", measure_http(showtime_id, args.iterations)))
+            for label, result in results:
+                rows.append((seats, label, result["queries"], result["mean_ms"], result["p50_ms"], result["p95_ms"]))
+
+    print_table(("asientos", "camino", "consultas", "media ms", "p50 ms", "p95 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Microbenchmark de la verificación de tokens JWT (auth.verify_token).
+
+Mide el tiempo de CPU por request de autenticación:
+- antes: jwt.decode con verificación HMAC completa en cada request
+- verify_token sin caché (primer uso de cada token: decode + guardado)
+- verify_token con caché (token ya verificado: digest + búsqueda LRU)
+y muestra los contadores de aciertos/fallos de token_cache.
+
+Uso (desde backend/):
+    python -m benchmarks.token_cache [--tokens 1000] [--requests 100000]
+"""
+
+import argparse
+import time
+
+from jose import jwt
+
+from auth import ALGORITHM, SECRET_KEY, create_access_token, token_cache, verify_token
+
+from benchmarks.common import print_table
+
+
+def cpu_per_call(fn, tokens, requests: int) -> float:
+    """Tiempo de CPU promedio (microsegundos) de fn sobre requests tokens en ronda"""
+    count = len(tokens)
+    started = time.process_time()
+    for index in range(requests):
+        fn(tokens[index % count])
+    return (time.process_time() - started) / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000, help="Tokens distintos en circulación")
+    parser.add_argument("--requests", type=int, default=100_000, help="Requests simulados por caso")
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": f"bench_{index}", "user_id": index}) for index in range(args.tokens)]
+
+    def decode(token):
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    def verify_uncached(token):
+        token_cache.clear()
+        return verify_token(token)
+
+    before = cpu_per_call(decode, tokens, args.requests)
+    misses = cpu_per_call(verify_uncached, tokens, max(1, args.requests // 10))
+
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    for token in tokens:
+        verify_token(token)  # primer uso: un fallo por token
+    hits = cpu_per_call(verify_token, tokens, args.requests)
+
+    print_table(("caso", "CPU µs/request", "vs decode"), [
+        ("jwt.decode (antes)", round(before, 2), "1.0x"),
+        ("verify_token sin caché", round(misses, 2), f"{before / misses:.1f}x"),
+        ("verify_token con caché", round(hits, 2), f"{before / hits:.1f}x"),
+    ])
+    print(f"token_cache: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
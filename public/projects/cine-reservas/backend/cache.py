@@ -0,0 +1,473 @@
+"""
+Cachés en memoria del backend.
+- Mapa de asientos (uno por función): instantánea pre-serializada de la grilla,
+  asociada a una versión monótona que las rutas de escritura incrementan cuando
+  cambian el estado, y un registro acotado de cambios por versión para servir deltas
+- Usuarios autenticados: principals livianos con expiración por entrada
+Los cambios confirmados también se publican a los demás workers vía NOTIFY.
+"""
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import os
+import threading
+import time
+import uuid
+import logging
+
+from notifications import SEAT_CHANGES_CHANNEL, build_seat_notification
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Cantidad de versiones que conserva el registro de cambios
+SEAT_CHANGE_LOG_SIZE = int(os.getenv("SEAT_CHANGE_LOG_SIZE", "1000"))
+
+# Límite y TTL de la caché de usuarios autenticados
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+# TTL de las estadísticas agregadas del sistema (/stats, /health)
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+
+# Claves usadas en Session.info para cambios pendientes de confirmar
+_PENDING_CHANGES_KEY = "seat_map_changes_pending"
+_PENDING_USERS_KEY = "user_cache_invalidations_pending"
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con expiración individual por entrada.
+    - Cada entrada expira en un instante absoluto (time.time())
+    - Al superar el tamaño máximo se descarta la entrada menos usada
+    - Lleva contadores de aciertos y fallos
+    """
+
+    def __init__(self, max_entries: int):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene un valor si existe y no expiró.
+
+        Returns:
+            Valor cacheado, None si no existe o expiró
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """
+        Guarda un valor hasta el instante indicado.
+
+        Args:
+            key: Clave de la entrada
+            value: Valor a cachear
+            expires_at: Instante de expiración (segundos epoch)
+        """
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Elimina una entrada si existe"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._entries.clear()
+
+    def purge_expired(self) -> int:
+        """
+        Elimina las entradas expiradas.
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def stats(self) -> Dict:
+        """Tamaño y tasa de aciertos de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SeatMapSnapshot:
+    """
+    Instantánea serializada (JSON) de la grilla para una versión concreta.
+    expires_at (epoch) marca el vencimiento del primer bloqueo temporal visible.
+    """
+
+    __slots__ = ("version", "body", "etag", "expires_at")
+
+    def __init__(self, version: int, body: bytes, etag: str, expires_at: Optional[float] = None):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class SeatMapCache:
+    """
+    Caché versionada de la grilla de asientos.
+    - La versión solo crece; cada cambio de estado la incrementa
+    - Solo se guarda una instantánea, válida mientras la versión no cambie
+    - Cada versión conocida guarda los asientos que cambiaron (registro acotado)
+    - El ETag incluye la función y un identificador de proceso para no colisionar
+      entre funciones ni entre workers
+    """
+
+    def __init__(self, showtime_id: int, max_log_versions: int = SEAT_CHANGE_LOG_SIZE,
+                 epoch: Optional[str] = None):
+        self.showtime_id = showtime_id
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[SeatMapSnapshot] = None
+        self._epoch = epoch or uuid.uuid4().hex[:8]
+        # Registro de cambios: versiones consecutivas desde _log_floor + 1
+        self._changes: deque = deque()
+        self._max_log_versions = max(1, max_log_versions)
+        self._log_floor = 0
+        # Suscriptores notificados en cada nueva versión (ej: hub de tiempo real)
+        self._listeners: List[Callable[[int, int, Optional[List[Dict]]], None]] = []
+
+    @property
+    def version(self) -> int:
+        """Versión actual del mapa de asientos"""
+        return self._version
+
+    @property
+    def epoch(self) -> str:
+        """
+        Identificador del proceso que numera las versiones. Cada worker tiene
+        su propio contador: una versión solo tiene sentido junto a su epoch.
+        """
+        return self._epoch
+
+    def etag_for(self, version: int) -> str:
+        """Construye el ETag para una versión del mapa"""
+        return f'W/"seats-{self._epoch}-{self.showtime_id}-{version}"'
+
+    def add_listener(self, listener: Callable[[int, int, Optional[List[Dict]]], None]) -> None:
+        """
+        Registra una función que se llama con (función, versión, cambios) en cada
+        nueva versión del mapa. Los cambios son None cuando la invalidación es completa.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, version: int, changes: Optional[List[Dict]]) -> None:
+        """Notifica una nueva versión a los suscriptores registrados"""
+        for listener in self._listeners:
+            try:
+                listener(self.showtime_id, version, changes)
+            except Exception as e:
+                logger.error("❌ Error notificando cambios del mapa: %s", e)
+
+    def bump(self, expected_version: Optional[int] = None) -> int:
+        """
+        Incrementa la versión e invalida la instantánea actual sin detallar
+        qué asientos cambiaron. Como el delta es desconocido, vacía el registro
+        de cambios y los clientes con versiones anteriores reciben la grilla completa.
+
+        Args:
+            expected_version: Si se indica, solo incrementa si la versión actual coincide
+
+        Returns:
+            int: Versión vigente del mapa
+        """
+        with self._lock:
+            if expected_version is not None and expected_version != self._version:
+                return self._version
+            self._version += 1
+            self._snapshot = None
+            self._changes.clear()
+            self._log_floor = self._version
+            version = self._version
+        self._notify(version, None)
+        return version
+
+    def apply_changes(self, changes: List[Dict]) -> int:
+        """
+        Registra los asientos modificados en una nueva versión del mapa.
+
+        Args:
+            changes: Asientos con su nuevo estado (formato SeatResponse)
+
+        Returns:
+            int: Nueva versión del mapa
+        """
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self._changes.append(tuple(changes))
+            if len(self._changes) > self._max_log_versions:
+                self._changes.popleft()
+                self._log_floor += 1
+            version = self._version
+        self._notify(version, changes)
+        return version
+
+    def changes_since(self, since: int, epoch: Optional[str]) -> Optional[Tuple[int, List[Dict]]]:
+        """
+        Obtiene los asientos cuyo estado cambió después de una versión.
+
+        Args:
+            since: Última versión conocida por el cliente
+            epoch: Epoch con el que se emitió esa versión
+
+        Returns:
+            Tuple[int, List[Dict]]: (versión actual, asientos cambiados con su último estado),
+            None si la versión ya salió del registro o no pertenece a este proceso
+        """
+        if epoch != self._epoch:
+            return None
+        with self._lock:
+            version = self._version
+            if since < self._log_floor or since > version:
+                return None
+            pending = list(islice(self._changes, since - self._log_floor, None))
+
+        # Conservar solo el último estado de cada asiento
+        latest: Dict[int, Dict] = {}
+        for changes in pending:
+            for change in changes:
+                latest[change["id"]] = change
+        return version, list(latest.values())
+
+    def get(self) -> Optional[SeatMapSnapshot]:
+        """
+        Obtiene la instantánea si corresponde a la versión vigente.
+        Si venció un bloqueo temporal incluido en ella, publica una nueva
+        versión (invalidación completa) para que todos recarguen la grilla.
+
+        Returns:
+            SeatMapSnapshot: Instantánea vigente, None si hay que reconstruirla
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self._version:
+            return None
+        if snapshot.expires_at is not None and time.time() >= snapshot.expires_at:
+            self.bump(expected_version=snapshot.version)
+            return None
+        return snapshot
+
+    def store(self, version: int, body: bytes, expires_at: Optional[float] = None) -> SeatMapSnapshot:
+        """
+        Guarda una instantánea construida a partir de la versión indicada.
+        Si la versión cambió mientras se construía, la instantánea se devuelve
+        pero no se cachea (ya estaría desactualizada).
+
+        Args:
+            version: Versión leída antes de consultar la base de datos
+            body: Grilla serializada en JSON
+            expires_at: Epoch en que vence el primer bloqueo temporal de la grilla
+
+        Returns:
+            SeatMapSnapshot: Instantánea construida
+        """
+        snapshot = SeatMapSnapshot(version, body, self.etag_for(version), expires_at)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+        return snapshot
+
+
+class SeatMapRegistry:
+    """
+    Mapas de asientos por función.
+    - Cada función tiene su propia versión, instantánea y registro de cambios:
+      reservar en una función no invalida la grilla de las demás
+    - Los mapas se crean al primer uso y heredan los listeners registrados
+    """
+
+    def __init__(self, max_log_versions: int = SEAT_CHANGE_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._maps: Dict[int, SeatMapCache] = {}
+        self._max_log_versions = max_log_versions
+        self._epoch = uuid.uuid4().hex[:8]
+        self._listeners: List[Callable[[int, int, Optional[List[Dict]]], None]] = []
+
+    @property
+    def epoch(self) -> str:
+        """Epoch compartido por los mapas de este proceso"""
+        return self._epoch
+
+    def for_showtime(self, showtime_id: int) -> SeatMapCache:
+        """
+        Obtiene (o crea) el mapa de asientos de una función.
+
+        Args:
+            showtime_id: ID de la función
+
+        Returns:
+            SeatMapCache: Mapa de la función
+        """
+        seat_map = self._maps.get(showtime_id)
+        if seat_map is None:
+            with self._lock:
+                seat_map = self._maps.get(showtime_id)
+                if seat_map is None:
+                    seat_map = SeatMapCache(showtime_id, self._max_log_versions, self._epoch)
+                    for listener in self._listeners:
+                        seat_map.add_listener(listener)
+                    self._maps[showtime_id] = seat_map
+        return seat_map
+
+    def add_listener(self, listener: Callable[[int, int, Optional[List[Dict]]], None]) -> None:
+        """Registra un listener (función, versión, cambios) en todos los mapas"""
+        with self._lock:
+            self._listeners.append(listener)
+            maps = list(self._maps.values())
+        for seat_map in maps:
+            seat_map.add_listener(listener)
+
+    def apply_changes(self, changes: List[Dict]) -> None:
+        """Publica los cambios en el mapa de la función de cada asiento"""
+        by_showtime: Dict[int, List[Dict]] = {}
+        for change in changes:
+            by_showtime.setdefault(change["showtime_id"], []).append(change)
+        for showtime_id, showtime_changes in by_showtime.items():
+            self.for_showtime(showtime_id).apply_changes(showtime_changes)
+
+    def bump_all(self) -> None:
+        """Invalida por completo todos los mapas conocidos"""
+        with self._lock:
+            maps = list(self._maps.values())
+        for seat_map in maps:
+            seat_map.bump()
+
+
+# Instancias globales por proceso
+seat_maps = SeatMapRegistry()
+user_cache = TTLCache(USER_CACHE_MAX_ENTRIES)
+stats_cache = TTLCache(1)
+
+
+def record_seat_changes_on_commit(db: Session, changes: List[Dict]) -> None:
+    """
+    Acumula cambios de estado de asientos para publicarlos como una nueva
+    versión del mapa cuando la transacción se confirme.
+
+    Args:
+        db: Sesión de base de datos que realiza el cambio
+        changes: Asientos con su nuevo estado (formato SeatResponse)
+    """
+    if changes:
+        db.info.setdefault(_PENDING_CHANGES_KEY, []).extend(changes)
+
+
+def has_pending_seat_changes(db: Session) -> bool:
+    """
+    Indica si la sesión tiene cambios de asientos aún sin confirmar: lo que
+    lea de la base de datos no debe guardarse en cachés compartidas.
+    """
+    return bool(db.info.get(_PENDING_CHANGES_KEY))
+
+
+def invalidate_user_on_commit(db: Session, user_id: int) -> None:
+    """
+    Marca un usuario para eliminarlo de la caché de usuarios (en este y en
+    los demás workers) cuando la transacción se confirme.
+
+    Args:
+        db: Sesión de base de datos que modifica al usuario
+        user_id: ID del usuario modificado o eliminado
+    """
+    db.info.setdefault(_PENDING_USERS_KEY, []).append(user_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_other_workers(session):
+    """
+    Emite un NOTIFY con los cambios pendientes dentro de la misma transacción.
+    PostgreSQL solo lo entrega si la transacción hace commit.
+    """
+    changes = session.info.get(_PENDING_CHANGES_KEY)
+    users = session.info.get(_PENDING_USERS_KEY)
+
+    if not changes and not users:
+        return
+    if session.get_bind().dialect.name != "postgresql":
+        return
+
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": SEAT_CHANGES_CHANNEL, "payload": build_seat_notification(changes, users)}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_seat_map_after_commit(session):
+    """Publica una nueva versión del mapa e invalida usuarios tras el commit"""
+    changes = session.info.pop(_PENDING_CHANGES_KEY, None)
+    users = session.info.pop(_PENDING_USERS_KEY, None)
+
+    for user_id in users or ():
+        user_cache.invalidate(user_id)
+
+    if changes:
+        seat_maps.apply_changes(changes)
+        logger.debug("🗺️ Mapa de asientos actualizado (%s cambios)", len(changes))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session):
+    """Descarta cambios pendientes de una transacción revertida"""
+    session.info.pop(_PENDING_CHANGES_KEY, None)
+    session.info.pop(_PENDING_USERS_KEY, None)
+
+
+def apply_remote_seat_event(event: Dict) -> None:
+    """
+    Aplica a las cachés locales un cambio confirmado por otro worker.
+    La nueva versión del mapa se propaga a los listeners locales (ej: WebSocket).
+
+    Args:
+        event: Payload de la notificación (changes, users)
+    """
+    if event.get("reconnect"):
+        # Pudieron perderse notificaciones: descartar todo lo cacheado
+        user_cache.clear()
+        seat_maps.bump_all()
+        return
+
+    for user_id in event.get("users") or ():
+        user_cache.invalidate(user_id)
+
+    if event.get("changes"):
+        seat_maps.apply_changes(event["changes"])
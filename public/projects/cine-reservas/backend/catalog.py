@@ -0,0 +1,131 @@
+"""
+Catálogo de combos y precios del cine.
+Los índices por nombre y las respuestas de /combos (una por tipo de usuario)
+se construyen una sola vez.
+reload() reemplaza el catálogo completo de forma atómica (recarga en caliente).
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+
+from schemas import ComboResponse
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Configuración de combos disponibles
+REGULAR_COMBOS = [
+    {"name": "Combo Clásico", "description": "Popcorn mediano + Bebida mediana", "price": 12.99},
+    {"name": "Combo Familiar", "description": "Popcorn grande + 2 Bebidas grandes", "price": 19.99},
+    {"name": "Combo Dulce", "description": "Nachos + Bebida + Dulces", "price": 15.99},
+    {"name": "Solo Bebida", "description": "Bebida grande de tu preferencia", "price": 4.99},
+    {"name": "Solo Popcorn", "description": "Popcorn grande con mantequilla", "price": 8.99},
+]
+
+PREMIUM_COMBOS = [
+    {"name": "Combo VIP", "description": "Popcorn gourmet + Bebida premium + Snacks selectos", "price": 24.99},
+    {"name": "Combo Ejecutivo", "description": "Bandeja de sushi + Sake + Postre", "price": 34.99},
+    {"name": "Combo Premium", "description": "Todo incluido + servicio a la butaca", "price": 42.99},
+]
+
+# Precios base
+BASE_SEAT_PRICE = 10.99
+PREMIUM_SEAT_PRICE = 16.99
+PREMIUM_DISCOUNT = 0.15  # 15% de descuento para usuarios premium
+
+_RECOMMENDATIONS = [
+    "Combo Clásico es el más popular",
+    "Combo Familiar perfecto para compartir",
+    "Usuarios premium tienen acceso a combos exclusivos",
+]
+
+
+class _CatalogSnapshot(NamedTuple):
+    """Estado inmutable del catálogo (se reemplaza completo en cada recarga)"""
+    regular_prices: Dict[str, float]
+    all_prices: Dict[str, float]
+    regular_names: Tuple[str, ...]
+    bodies: Dict[bool, bytes]
+
+
+class ComboCatalog:
+    """
+    Catálogo indexado de combos.
+    - Precio por nombre en O(1): un dict para usuarios regulares y otro que
+      además incluye los combos premium
+    - Respuesta de /combos pre-serializada por tipo de usuario
+    - Las lecturas toman una referencia al estado vigente, sin locks
+    """
+
+    def __init__(self, regular: List[Dict], premium: List[Dict]):
+        self._snapshot = self._build(regular, premium)
+
+    @staticmethod
+    def _build(regular: List[Dict], premium: List[Dict]) -> _CatalogSnapshot:
+        """Construye índices y respuestas a partir de las listas de combos"""
+        regular_prices = {combo["name"]: combo["price"] for combo in regular}
+        all_prices = dict(regular_prices)
+        all_prices.update({combo["name"]: combo["price"] for combo in premium})
+
+        premium_options = [dict(combo, is_premium_exclusive=True) for combo in premium]
+        bodies = {}
+        for is_premium in (False, True):
+            recommendations = list(_RECOMMENDATIONS)
+            if is_premium:
+                recommendations.append(f"¡Disfruta tu {PREMIUM_DISCOUNT:.0%} de descuento premium!")
+            bodies[is_premium] = ComboResponse(
+                regular_combos=regular,
+                premium_combos=premium_options if is_premium else [],
+                recommendations=recommendations
+            ).model_dump_json().encode("utf-8")
+
+        return _CatalogSnapshot(
+            regular_prices=regular_prices,
+            all_prices=all_prices,
+            regular_names=tuple(regular_prices),
+            bodies=bodies
+        )
+
+    def reload(self, regular: List[Dict], premium: List[Dict]) -> None:
+        """
+        Reemplaza el catálogo completo. Las peticiones en curso terminan con
+        el estado anterior; las siguientes ven el nuevo.
+
+        Args:
+            regular: Combos regulares (name, description, price)
+            premium: Combos exclusivos premium (name, description, price)
+        """
+        self._snapshot = self._build(regular, premium)
+        logger.info("🍿 Catálogo de combos recargado: %s regulares, %s premium", len(regular), len(premium))
+
+    @property
+    def regular_names(self) -> Tuple[str, ...]:
+        """Nombres de los combos regulares"""
+        return self._snapshot.regular_names
+
+    def price_index(self, is_premium: bool = False) -> Dict[str, float]:
+        """
+        Índice nombre -> precio visible para el tipo de usuario.
+        Los combos premium solo tienen precio para usuarios premium.
+        """
+        snapshot = self._snapshot
+        return snapshot.all_prices if is_premium else snapshot.regular_prices
+
+    def combo_price(self, combo_name: Optional[str], is_premium: bool = False) -> float:
+        """
+        Obtiene el precio de un combo.
+
+        Returns:
+            float: Precio del combo, 0.0 si no existe o no está disponible
+        """
+        if not combo_name:
+            return 0.0
+        return self.price_index(is_premium).get(combo_name, 0.0)
+
+    def response_body(self, is_premium: bool = False) -> bytes:
+        """Respuesta de /combos (ComboResponse) ya serializada en JSON"""
+        return self._snapshot.bodies[is_premium]
+
+
+# Instancia global por proceso
+combo_catalog = ComboCatalog(REGULAR_COMBOS, PREMIUM_COMBOS)
@@ -0,0 +1,318 @@
+"""
+Expiración de usuarios guiada por sus deadlines.
+Un heap con el expires_at de cada usuario despierta la limpieza en el
+momento exacto en que alguien expira, en lugar de barrer cada N minutos.
+Solo un worker (dueño de un advisory lock de PostgreSQL) ejecuta la limpieza;
+los demás le avisan de los nuevos usuarios mediante NOTIFY.
+El mismo worker elimina los bloqueos temporales de asientos al vencer, para
+que la transición held -> available llegue como cambio a todos los clientes.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from database import SessionLocal, cleanup_expired_users, release_expired_holds, engine
+from notifications import SEAT_CHANGES_CHANNEL, WORKER_ID
+from availability import SEAT_HOLD_TTL_SECONDS
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que elige al worker dueño de la expiración
+EXPIRY_LOCK_KEY = int(os.getenv("EXPIRY_LOCK_KEY", "731500"))
+
+# Segundos entre intentos de tomar el lock (workers que no son dueños)
+LOCK_RETRY_SECONDS = int(os.getenv("EXPIRY_LOCK_RETRY_SECONDS", "15"))
+
+# Segundos entre resincronizaciones del heap con la base de datos (red de seguridad)
+RESYNC_SECONDS = int(os.getenv("EXPIRY_RESYNC_SECONDS", "60"))
+
+# Segundos entre verificaciones de que la conexión del lock sigue viva
+LOCK_CHECK_SECONDS = int(os.getenv("EXPIRY_LOCK_CHECK_SECONDS", "5"))
+
+# Margen tras el deadline para que expires_at <= now() se cumpla en la base
+DEADLINE_GRACE_SECONDS = 0.05
+
+
+def _to_epoch(expires_at: datetime) -> float:
+    """Convierte un datetime UTC sin zona horaria (como se guarda en users) a epoch"""
+    return expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ExpiryScheduler:
+    """
+    Planificador de expiración de usuarios.
+    - Heap de (deadline, user_id): el próximo vencimiento siempre está en la cima
+    - Un hilo duerme hasta el próximo deadline y ejecuta la limpieza en lotes
+    - Las entradas obsoletas (usuario ya eliminado) son inofensivas: la limpieza
+      solo elimina usuarios con expires_at vencido en la base de datos
+    - Solo el worker que obtiene el advisory lock ejecuta la limpieza y guarda
+      deadlines: los demás los descartan (al tomar el lock se resiembra desde la base)
+    - También despierta en el vencimiento del próximo bloqueo temporal de asientos
+    """
+
+    def __init__(self, engine, session_factory: Callable, cleanup: Callable,
+                 release_holds: Optional[Callable] = None, lock_key: int = EXPIRY_LOCK_KEY):
+        self._engine = engine
+        self._session_factory = session_factory
+        self._cleanup = cleanup
+        self._release_holds = release_holds
+        self._lock_key = lock_key
+        self._heap: List[Tuple[float, int]] = []
+        # Próximo vencimiento de bloqueos a revisar (0 = revisar en cuanto se pueda)
+        self._next_hold_check = 0.0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_connection = None
+
+    @property
+    def is_owner(self) -> bool:
+        """True si este worker es el dueño de la expiración"""
+        return self._lock_connection is not None
+
+    @property
+    def pending(self) -> int:
+        """Deadlines pendientes en el heap"""
+        return len(self._heap)
+
+    def start(self) -> None:
+        """Inicia el hilo del planificador"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="expiry-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo y libera el advisory lock"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._release_lock()
+
+    def schedule(self, user_id: int, expires_at: datetime) -> None:
+        """
+        Agrega el deadline de un usuario. Si es el más próximo, despierta al hilo.
+        Los workers que no son dueños del lock lo ignoran: nunca lo sacarían del heap.
+
+        Args:
+            user_id: ID del usuario
+            expires_at: Expiración del usuario (UTC sin zona horaria)
+        """
+        if not self.is_owner:
+            return
+        deadline = _to_epoch(expires_at)
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, user_id))
+            if self._heap[0][0] == deadline:
+                self._condition.notify()
+
+    def schedule_hold_check(self, deadline: float) -> None:
+        """
+        Adelanta la próxima revisión de bloqueos vencidos si deadline es anterior.
+
+        Args:
+            deadline: Epoch en que vence un bloqueo
+        """
+        with self._condition:
+            if deadline < self._next_hold_check:
+                self._next_hold_check = deadline
+                self._condition.notify()
+
+    def on_seat_map_change(self, showtime_id: int, version: int, changes: Optional[List[Dict]]) -> None:
+        """
+        Listener de los mapas de asientos: un asiento bloqueado (en este u otro
+        worker) vence a más tardar SEAT_HOLD_TTL_SECONDS después de recibir el cambio.
+        """
+        if not self.is_owner or not changes:
+            return
+        if any(change["status"] == "held" for change in changes):
+            self.schedule_hold_check(time.time() + SEAT_HOLD_TTL_SECONDS + DEADLINE_GRACE_SECONDS)
+
+    def on_remote_event(self, event: dict) -> bool:
+        """
+        Procesa un NOTIFY de usuario registrado en otro worker.
+
+        Returns:
+            bool: True si el evento era de expiración y fue consumido
+        """
+        expiry = event.get("user_expiry")
+        if not expiry:
+            return False
+        self.schedule(expiry["user_id"], datetime.fromisoformat(expiry["expires_at"]))
+        return True
+
+    def _try_acquire_lock(self) -> bool:
+        """Intenta tomar el advisory lock en una conexión dedicada"""
+        connection = None
+        try:
+            connection = self._engine.connect()
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self._lock_key}
+            ).scalar()
+            connection.commit()
+            if acquired:
+                self._lock_connection = connection
+                logger.info("🔑 Worker %s es dueño de la expiración de usuarios", WORKER_ID)
+                return True
+        except Exception as e:
+            logger.error("❌ Error tomando el lock de expiración: %s", e)
+        if connection is not None:
+            connection.close()
+        return False
+
+    def _lock_alive(self) -> bool:
+        """Verifica que la conexión que retiene el lock siga abierta"""
+        try:
+            self._lock_connection.execute(text("SELECT 1"))
+            self._lock_connection.commit()
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Conexión del lock de expiración perdida: %s", e)
+            self._release_lock()
+            # Otro worker tomará el lock y resembrará sus propios deadlines
+            with self._condition:
+                self._heap = []
+            return False
+
+    def _release_lock(self) -> None:
+        """Libera el advisory lock y cierra su conexión"""
+        connection, self._lock_connection = self._lock_connection, None
+        if connection is None:
+            return
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._lock_key})
+            connection.commit()
+        except Exception:
+            pass
+        finally:
+            connection.close()
+
+    def _seed(self) -> None:
+        """Reconstruye el heap con los deadlines actuales de la base de datos"""
+        db = self._session_factory()
+        try:
+            rows = db.execute(text("SELECT id, expires_at FROM users")).all()
+        finally:
+            db.close()
+
+        heap = [(_to_epoch(row.expires_at), row.id) for row in rows if row.expires_at is not None]
+        heapq.heapify(heap)
+        with self._condition:
+            self._heap = heap
+        logger.info("⏰ Expiración sincronizada: %s deadlines pendientes", len(heap))
+
+    def _pop_due(self, now: float) -> int:
+        """Saca del heap los deadlines vencidos y devuelve cuántos había"""
+        due = 0
+        with self._condition:
+            while self._heap and self._heap[0][0] + DEADLINE_GRACE_SECONDS <= now:
+                heapq.heappop(self._heap)
+                due += 1
+        return due
+
+    def _expire_due_users(self) -> None:
+        """Ejecuta la limpieza de los usuarios vencidos"""
+        db = self._session_factory()
+        try:
+            deleted_count = self._cleanup(db)
+            if deleted_count:
+                logger.info("⏰ Expiración puntual: %s usuarios eliminados", deleted_count)
+        finally:
+            db.close()
+
+    def _expire_due_holds(self) -> None:
+        """Libera los bloqueos vencidos y programa la revisión del siguiente"""
+        with self._condition:
+            self._next_hold_check = math.inf
+        db = self._session_factory()
+        try:
+            next_expiry = self._release_holds(db)
+        finally:
+            db.close()
+        if next_expiry is not None:
+            self.schedule_hold_check(_to_epoch(next_expiry) + DEADLINE_GRACE_SECONDS)
+
+    def _run(self) -> None:
+        """Bucle principal: duerme hasta el próximo deadline y expira a los vencidos"""
+        next_resync = 0.0
+        next_lock_check = 0.0
+        while not self._stop.is_set():
+            if not self.is_owner:
+                if not self._try_acquire_lock():
+                    self._stop.wait(LOCK_RETRY_SECONDS)
+                    continue
+                next_resync = 0.0
+                next_lock_check = 0.0
+
+            try:
+                now = time.time()
+                if now >= next_lock_check:
+                    if not self._lock_alive():
+                        continue
+                    next_lock_check = now + LOCK_CHECK_SECONDS
+
+                if now >= next_resync:
+                    self._seed()
+                    # Expirar a quienes vencieron mientras nadie era dueño
+                    self._expire_due_users()
+                    next_resync = now + RESYNC_SECONDS
+                    # Releer el próximo vencimiento de bloqueos desde la base de datos
+                    with self._condition:
+                        self._next_hold_check = 0.0
+
+                if self._pop_due(time.time()):
+                    self._expire_due_users()
+
+                if self._release_holds is not None and time.time() >= self._next_hold_check:
+                    self._expire_due_holds()
+
+                with self._condition:
+                    wait = min(next_resync, next_lock_check) - time.time()
+                    if self._heap:
+                        wait = min(wait, self._heap[0][0] + DEADLINE_GRACE_SECONDS - time.time())
+                    if self._release_holds is not None:
+                        wait = min(wait, self._next_hold_check - time.time())
+                    if wait > 0 and not self._stop.is_set():
+                        self._condition.wait(wait)
+
+            except Exception as e:
+                logger.error("❌ Error en el planificador de expiración: %s", e)
+                self._stop.wait(LOCK_RETRY_SECONDS)
+
+
+# Instancia global por worker
+expiry_scheduler = ExpiryScheduler(engine, SessionLocal, cleanup_expired_users, release_expired_holds)
+
+
+async def announce_user_expiry(db: AsyncSession, user_id: int, expires_at: datetime) -> None:
+    """
+    Avisa del deadline de un usuario al worker dueño de la expiración.
+    Se emite dentro de la transacción que crea al usuario, por lo que solo
+    se entrega si esta hace commit.
+
+    Args:
+        db: Sesión asíncrona que crea al usuario
+        user_id: ID del usuario (ya asignado con flush)
+        expires_at: Expiración del usuario
+    """
+    payload = json.dumps({
+        "origin": WORKER_ID,
+        "user_expiry": {"user_id": user_id, "expires_at": expires_at.isoformat()}
+    }, separators=(",", ":"))
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": SEAT_CHANGES_CHANNEL, "payload": payload}
+    )
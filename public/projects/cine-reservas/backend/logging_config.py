@@ -0,0 +1,171 @@
+"""
+Configuración de logging no bloqueante.
+Los handlers de la aplicación solo encolan registros; un hilo en segundo
+plano (QueueListener) los formatea como JSON y los escribe en consola y archivo.
+"""
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import time
+
+# Configuración por variables de entorno
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+LOG_FILE = os.getenv("LOG_FILE", "cinema_backend.log")  # vacío para desactivar
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Muestreo de mensajes informativos por logger, ej: "services=0.1,routers.reservations=0.25"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+_TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord (el resto se considera "extra" estructurado)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON (incluye los campos de extra=)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo 1 de cada N mensajes INFO/DEBUG de los loggers configurados.
+    Las advertencias y errores nunca se muestrean.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Intervalo de muestreo por prefijo de logger (rate 0.1 -> 1 de cada 10)
+        self._intervals = {
+            name: max(1, round(1 / rate)) if rate > 0 else 0
+            for name, rate in rates.items()
+        }
+        self._counters = {name: itertools.count() for name in rates}
+
+    def _match(self, logger_name: str) -> Optional[str]:
+        """Prefijo configurado más específico que corresponde al logger"""
+        best = None
+        for name in self._intervals:
+            if logger_name == name or logger_name.startswith(name + "."):
+                if best is None or len(name) > len(best):
+                    best = name
+        return best
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        name = self._match(record.name)
+        if name is None:
+            return True
+        interval = self._intervals[name]
+        if interval == 0:
+            return False
+        # next() sobre itertools.count es atómico con el GIL
+        return next(self._counters[name]) % interval == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que nunca bloquea el hilo que loguea.
+    - No formatea el mensaje al encolar: el formateo (%s) ocurre en el hilo escritor
+    - Si la cola está llena, descarta el registro y lo cuenta
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_sampling(spec: str) -> Dict[str, float]:
+    """Convierte "a=0.1,b.c=0.5" en {"a": 0.1, "b.c": 0.5}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging() -> QueueListener:
+    """
+    Configura el logging raíz con la cola y arranca el hilo escritor.
+    Es idempotente: llamadas posteriores devuelven el listener existente.
+
+    Returns:
+        QueueListener: Hilo escritor (se detiene con stop_logging)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(_TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    rates = _parse_sampling(LOG_SAMPLING)
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Registros descartados por cola llena desde el inicio"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            return handler.dropped
+    return 0
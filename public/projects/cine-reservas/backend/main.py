@@ -12,83 +12,85 @@ Características principales:
 - Logging detallado de todas las operaciones
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from apscheduler.schedulers.background import BackgroundScheduler
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import logging
 from datetime import datetime
 import os
+import time
 
 # Imports locales
-from database import create_tables, get_db, cleanup_expired_users, get_database_stats
+from database import (
+    create_tables, get_async_db, get_database_stats, get_pool_status,
+    async_engine, DATABASE_URL
+)
 from routers import auth, reservations
 from schemas import ApiResponse
+from cache import seat_maps, user_cache, stats_cache, apply_remote_seat_event
+from realtime import seat_event_hub
+from availability import availability_index
+from notifications import DatabaseChangeListener, SEAT_CHANGES_CHANNEL, to_asyncpg_dsn
+from auth import password_hasher, token_cache
+from expiry import expiry_scheduler
+from services import DEFAULT_SHOWTIME_ID
+from metrics import registry, HTTP_REQUEST_SECONDS, DB_QUERIES_PER_REQUEST, start_request_query_count
+from logging_config import setup_logging, dropped_records
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('cinema_backend.log')
-    ]
-)
+# Configuración de logging (cola + hilo escritor, registros JSON)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Variables globales para el scheduler
-scheduler = None
+# Variable global para el listener de otros workers
+change_listener = None
 app_start_time = datetime.utcnow()
 
 
-def cleanup_job():
+def on_remote_event(event: dict) -> None:
     """
-    Job programado para limpiar usuarios expirados.
-    Se ejecuta cada 2 minutos en background.
+    Despacha un NOTIFY de otro worker: los deadlines de usuarios nuevos van
+    al planificador de expiración y el resto a las cachés locales.
     """
-    try:
-        from database import SessionLocal
-        db = SessionLocal()
-        
-        deleted_count = cleanup_expired_users(db)
-        stats = get_database_stats(db)
-        
-        if deleted_count > 0 or stats.get("active_users", 0) > 0:
-            logger.info(f"🕒 Limpieza programada - Eliminados: {deleted_count} | "
-                       f"Usuarios activos: {stats.get('active_users', 0)} | "
-                       f"Reservas: {stats.get('active_reservations', 0)}")
-        
-        db.close()
-        
-    except Exception as e:
-        logger.error(f"❌ Error en limpieza programada: {e}")
+    if not expiry_scheduler.on_remote_event(event):
+        apply_remote_seat_event(event)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Context manager para manejar el ciclo de vida de la aplicación.
-    Inicializa la base de datos y el scheduler al inicio.
+    Inicializa la base de datos y el planificador de expiración al inicio.
     """
-    global scheduler
+    global change_listener
     
     try:
         # Inicializar base de datos
         logger.info("🚀 Iniciando sistema de reservas de cine...")
         create_tables()
+        app.state.start_time = app_start_time
+        
+        # Conectar el hub de tiempo real a los cambios del mapa de asientos
+        seat_event_hub.bind(asyncio.get_running_loop(), seat_maps.epoch)
+        seat_maps.add_listener(seat_event_hub.on_seat_map_change)
+        # Mantener el índice de disponibilidad al día sin releer la base de datos
+        seat_maps.add_listener(availability_index.on_seat_map_change)
+        # Despertar la expiración de bloqueos cuando se bloquean asientos
+        seat_maps.add_listener(expiry_scheduler.on_seat_map_change)
         
-        # Inicializar scheduler para limpieza automática
-        scheduler = BackgroundScheduler()
-        scheduler.add_job(
-            cleanup_job, 
-            'interval', 
-            minutes=2,  # Ejecutar cada 2 minutos
-            id='cleanup_expired_users'
+        # Escuchar cambios confirmados por otros workers (LISTEN/NOTIFY)
+        change_listener = DatabaseChangeListener(
+            to_asyncpg_dsn(DATABASE_URL), SEAT_CHANGES_CHANNEL, on_remote_event
         )
-        scheduler.start()
-        logger.info("⏰ Scheduler de limpieza iniciado (cada 2 minutos)")
+        change_listener.start()
+        
+        # Expirar usuarios en su deadline exacto (un solo worker, vía advisory lock)
+        expiry_scheduler.start()
+        logger.info("⏰ Planificador de expiración iniciado")
         
         # Log de inicio exitoso
         logger.info("✅ Sistema de reservas de cine iniciado correctamente")
@@ -98,13 +100,18 @@ async def lifespan(app: FastAPI):
         yield
         
     except Exception as e:
-        logger.error(f"❌ Error durante inicialización: {e}")
+        logger.error("❌ Error durante inicialización: %s", e)
         raise
     finally:
         # Cleanup al cerrar la aplicación
-        if scheduler and scheduler.running:
-            scheduler.shutdown()
-            logger.info("⏰ Scheduler de limpieza detenido")
+        if change_listener:
+            await change_listener.stop()
+        
+        expiry_scheduler.stop()
+        logger.info("⏰ Planificador de expiración detenido")
+        
+        password_hasher.shutdown()
+        await async_engine.dispose()
         
         logger.info("👋 Sistema de reservas de cine detenido")
 
@@ -135,12 +142,12 @@ app = FastAPI(
     - **PostgreSQL** para persistencia
     - **SQLAlchemy** como ORM
     - **JWT** para autenticación
-    - **APScheduler** para tareas en background
+    - **Heap de deadlines** para expirar usuarios a tiempo
 
     ### 📊 Monitoreo
     - Logging detallado de todas las operaciones
     - Estadísticas en tiempo real del sistema
-    - Limpieza automática cada 2 minutos
+    - Limpieza puntual de usuarios al expirar
     """,
     version="1.0.0",
     contact={
@@ -172,6 +179,53 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(reservations.router, prefix="/api")
 
 
+@app.middleware("http")
+async def collect_request_metrics(request: Request, call_next):
+    """
+    Mide la latencia de cada request y las consultas SQL que ejecutó,
+    etiquetadas por la plantilla de la ruta (ej: /api/reservations/cancel/{seat_id}).
+    """
+    queries = start_request_query_count()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, request.method, route_path, str(status_code)
+        )
+        DB_QUERIES_PER_REQUEST.observe(queries[0], route_path)
+
+
+def _cache_lookups():
+    """Aciertos y fallos acumulados de las cachés en memoria"""
+    for name, cache in (("user", user_cache), ("token", token_cache), ("stats", stats_cache)):
+        yield (name, "hit"), cache.hits
+        yield (name, "miss"), cache.misses
+
+
+registry.gauge(
+    "cinema_cache_lookups", "Consultas a las cachés en memoria por resultado",
+    ("cache", "result"), _cache_lookups
+)
+registry.gauge(
+    "cinema_realtime_subscribers", "Clientes WebSocket conectados",
+    (), lambda: [((), seat_event_hub.subscriber_count)]
+)
+registry.gauge(
+    "cinema_log_records_dropped", "Registros de log descartados por cola llena",
+    (), lambda: [((), dropped_records())]
+)
+registry.gauge(
+    "cinema_password_hash_in_flight", "Operaciones bcrypt en curso o en cola",
+    (), lambda: [((), password_hasher.stats()["in_flight"])]
+)
+
+
 # Endpoints principales
 @app.get("/", response_model=ApiResponse)
 async def root():
@@ -190,15 +244,26 @@ async def root():
     )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas del worker en formato de texto de Prometheus: latencia por ruta,
+    consultas SQL, espera del pool, bcrypt, cachés y conflictos de reserva.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health", response_model=ApiResponse)
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """
     Health check endpoint para verificar el estado del sistema.
     Incluye verificación de base de datos y estadísticas básicas.
+    La conexión se verifica en cada llamada; solo las estadísticas salen de la caché.
     """
     try:
-        # Verificar conexión a base de datos
-        stats = get_database_stats(db)
+        # Verificar conexión a base de datos (nunca cacheado)
+        await db.execute(text("SELECT 1"))
+        stats = await db.run_sync(get_database_stats)
         
         return ApiResponse(
             success=True,
@@ -207,12 +272,16 @@ async def health_check(db: Session = Depends(get_db)):
                 "status": "healthy",
                 "database": "connected",
                 "uptime_minutes": round((datetime.utcnow() - app_start_time).total_seconds() / 60, 2),
+                "realtime_subscribers": seat_event_hub.subscriber_count,
+                "password_hashing": password_hasher.stats(),
+                "user_cache": user_cache.stats(),
+                "token_cache": token_cache.stats(),
                 "stats": stats
             }
         )
         
     except Exception as e:
-        logger.error(f"❌ Health check falló: {e}")
+        logger.error("❌ Health check falló: %s", e)
         return JSONResponse(
             status_code=503,
             content={
@@ -226,13 +295,81 @@ async def health_check(db: Session = Depends(get_db)):
         )
 
 
+@app.get("/health/pool", response_model=ApiResponse)
+async def pool_status():
+    """
+    Estado de los pools de conexiones a PostgreSQL: conexiones en uso,
+    overflow, configuración y espera promedio de checkout.
+    """
+    return ApiResponse(
+        success=True,
+        message="Estado de los pools de conexiones",
+        data=get_pool_status()
+    )
+
+
+@app.websocket("/ws/seats")
+async def seats_updates(websocket: WebSocket, showtime_id: int = Query(DEFAULT_SHOWTIME_ID, ge=1)):
+    """
+    Canal WebSocket de actualizaciones del mapa de asientos de una función.
+    
+    Mensajes enviados al cliente:
+    - hello: función y versión actual de su mapa al conectarse
+    - seat_changes: asientos que cambiaron en una nueva versión
+    - invalidate / resync: el cliente debe recargar la grilla completa
+    """
+    await websocket.accept()
+    queue = seat_event_hub.subscribe(showtime_id)
+    tasks = []
+    
+    try:
+        seat_map = seat_maps.for_showtime(showtime_id)
+        await websocket.send_text(json.dumps({
+            "type": "hello", "showtime_id": showtime_id, "version": seat_map.version, "epoch": seat_map.epoch
+        }))
+        
+        # Leer el socket en paralelo: un cliente que cierra sin eventos pendientes
+        # se detecta al instante en lugar de esperar al próximo envío
+        tasks = [
+            asyncio.create_task(_forward_seat_events(websocket, queue)),
+            asyncio.create_task(_wait_for_disconnect(websocket)),
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+            
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning("🔌 Conexión WebSocket cerrada con error: %s", e)
+    finally:
+        for task in tasks:
+            task.cancel()
+        seat_event_hub.unsubscribe(showtime_id, queue)
+
+
+async def _forward_seat_events(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    """Envía al cliente los eventos de la cola de suscripción"""
+    while True:
+        message = await queue.get()
+        await websocket.send_text(message)
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Consume los mensajes del cliente (se ignoran) hasta que cierra la conexión"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
 # Manejador de errores global
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """
     Manejador global de excepciones para logging y respuestas consistentes.
     """
-    logger.error(f"❌ Error no manejado en {request.url}: {exc}")
+    logger.error("❌ Error no manejado en %s: %s", request.url, exc)
     
     return JSONResponse(
         status_code=500,
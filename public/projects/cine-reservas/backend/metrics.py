@@ -0,0 +1,325 @@
+"""
+Métricas de la aplicación en formato de texto de Prometheus.
+Contadores e histogramas sin locks en el camino caliente: cada hilo escribe
+en su propio shard y los shards solo se suman al exportar /metrics.
+"""
+
+from bisect import bisect_left
+import abc
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import time
+
+# Buckets por defecto (segundos), pensados para latencias HTTP y SQL
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Buckets para conteos (ej: consultas SQL por request)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _escape_label_value(value) -> str:
+    """Escapa barra invertida, comillas y saltos de línea según el formato de texto de Prometheus"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Construye el bloque {a="x",b="y"} de una serie"""
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Formatea un valor numérico sin decimales innecesarios"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _ShardedMetric(abc.ABC):
+    """
+    Base de las métricas con shards por hilo.
+    - Cada hilo obtiene su shard la primera vez que escribe (único uso del lock)
+    - Un shard tiene un solo escritor, por lo que las escrituras no requieren lock
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        """Shard del hilo actual"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshot(self) -> List[Tuple[Tuple, object]]:
+        """Copia las series de todos los shards (list() sobre un dict es atómico con el GIL)"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [item for shard in shards for item in list(shard.items())]
+
+    @abc.abstractmethod
+    def render(self) -> List[str]:
+        """Líneas de texto Prometheus de la métrica"""
+
+
+class Counter(_ShardedMetric):
+    """Contador monotónico con etiquetas opcionales"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        """Incrementa el contador de la serie indicada por label_values"""
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """Valor total de una serie"""
+        return sum(value for key, value in self._snapshot() if key == label_values)
+
+    def render(self) -> List[str]:
+        totals: Dict[Tuple, float] = {}
+        for key, value in self._snapshot():
+            totals[key] = totals.get(key, 0) + value
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """Histograma de buckets fijos con suma y conteo por serie"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Registra una observación en la serie indicada por label_values"""
+        shard = self._shard()
+        series = shard.get(label_values)
+        if series is None:
+            # [conteo por bucket..., conteo +Inf, suma]
+            series = [0] * (len(self.buckets) + 2)
+            shard[label_values] = series
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def summary(self, *label_values: str) -> Tuple[int, float]:
+        """Conteo y suma de observaciones de una serie"""
+        count, total = 0, 0.0
+        for key, series in self._snapshot():
+            if key == label_values:
+                series = list(series)
+                count += sum(series[:-1])
+                total += series[-1]
+        return count, total
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Context manager que observa la duración del bloque"""
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        merged: Dict[Tuple, List[float]] = {}
+        for key, series in self._snapshot():
+            total = merged.setdefault(key, [0] * (len(self.buckets) + 2))
+            for index, value in enumerate(list(series)):
+                total[index] += value
+
+        lines = []
+        for key, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.label_names, key)
+            inf_labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    """Mide la duración de un bloque y la registra en un histograma"""
+
+    __slots__ = ("_histogram", "_label_values", "_started")
+
+    def __init__(self, histogram: Histogram, label_values: Tuple):
+        self._histogram = histogram
+        self._label_values = label_values
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started, *self._label_values)
+        return False
+
+
+class CallbackGauge:
+    """Gauge cuyo valor se calcula al exportar (ej: tamaño de cachés, suscriptores)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple, float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self._callback()
+        ]
+
+
+class MetricsRegistry:
+    """Registro de métricas exportadas en /metrics"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        """Agrega una métrica al registro y la devuelve"""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str],
+              callback: Callable[[], Iterable[Tuple[Tuple, float]]]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, label_names, callback))
+
+    def render(self) -> str:
+        """Exporta todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global por worker
+registry = MetricsRegistry()
+
+# --- Métricas del camino caliente ---
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "cinema_http_request_duration_seconds", "Latencia de requests HTTP por ruta",
+    ("method", "route", "status")
+)
+DB_QUERIES = registry.counter(
+    "cinema_db_queries_total", "Consultas SQL ejecutadas", ("engine",)
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "cinema_db_query_duration_seconds", "Duración de consultas SQL", ("engine",)
+)
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "cinema_db_queries_per_request", "Consultas SQL por request HTTP", ("route",), COUNT_BUCKETS
+)
+DB_POOL_WAIT_SECONDS = registry.histogram(
+    "cinema_db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ("pool",)
+)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "cinema_password_hash_duration_seconds", "Tiempo de cómputo bcrypt", ("operation",)
+)
+PASSWORD_HASH_WAIT_SECONDS = registry.histogram(
+    "cinema_password_hash_queue_wait_seconds", "Espera en la cola del pool bcrypt", ("operation",)
+)
+PASSWORD_HASH_REJECTED = registry.counter(
+    "cinema_password_hash_rejected_total", "Operaciones bcrypt rechazadas por cola llena"
+)
+SEAT_SNAPSHOT_LOOKUPS = registry.counter(
+    "cinema_seat_snapshot_lookups_total", "Consultas a la instantánea de la grilla", ("result",)
+)
+BOOKING_CONFLICTS = registry.counter(
+    "cinema_booking_conflicts_total", "Reservas rechazadas porque un asiento ya estaba tomado", ("operation",)
+)
+
+# Consultas SQL del request en curso (lista mutable compartida con las tareas hijas)
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+def start_request_query_count() -> List[int]:
+    """Inicia el conteo de consultas SQL del request actual"""
+    counter = [0]
+    _request_queries.set(counter)
+    return counter
+
+
+def instrument_engine(engine, label: str) -> None:
+    """
+    Registra hooks de SQLAlchemy que cuentan y cronometran cada consulta.
+
+    Args:
+        engine: Engine síncrono (para un AsyncEngine, su .sync_engine)
+        label: Nombre del engine en las métricas
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, label)
+        DB_QUERIES.inc(1, label)
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def timed_pool_class(pool_class):
+    """
+    Crea una subclase del pool que mide la espera de cada checkout.
+
+    Args:
+        pool_class: Clase de pool de SQLAlchemy (ej: QueuePool)
+
+    Returns:
+        type: Subclase instrumentada, usable como poolclass en create_engine
+    """
+    label = pool_class.__name__
+
+    class TimedPool(pool_class):
+        metrics_label = label
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started, label)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    TimedPool.__qualname__ = TimedPool.__name__
+    return TimedPool
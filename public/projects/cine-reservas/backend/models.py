@@ -3,7 +3,9 @@ Modelos de base de datos para el sistema de reservas de cine.
 Utiliza SQLAlchemy ORM para definir las tablas y relaciones.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, ForeignKey, ForeignKeyConstraint, Index, UniqueConstraint
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -39,25 +41,95 @@ class User(Base):
         return f"<User(username='{self.username}', premium={self.is_premium})>"
 
 
+class Auditorium(Base):
+    """
+    Modelo de sala del cine.
+    - Define la distribución de asientos (filas x asientos por fila)
+    - Cada función en la sala genera su propio inventario de asientos
+    """
+    __tablename__ = "auditoriums"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), unique=True, nullable=False)
+    rows = Column(Integer, nullable=False)
+    seats_per_row = Column(Integer, nullable=False)
+
+    # Relación con funciones
+    showtimes = relationship("Showtime", back_populates="auditorium")
+
+    def __repr__(self):
+        return f"<Auditorium(name='{self.name}', {self.rows}x{self.seats_per_row})>"
+
+
+class AuditoriumSeat(Base):
+    """
+    Plantilla de asientos de una sala.
+    - Al crear una función se copia a la tabla seats (inventario de la función)
+    """
+    __tablename__ = "auditorium_seats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    auditorium_id = Column(Integer, ForeignKey("auditoriums.id", ondelete="CASCADE"), nullable=False)
+    row_letter = Column(String(1), nullable=False)
+    number = Column(Integer, nullable=False)
+    is_premium = Column(Boolean, default=False)
+
+    __table_args__ = (UniqueConstraint('auditorium_id', 'row_letter', 'number', name='unique_auditorium_seat'),)
+
+
+class Showtime(Base):
+    """
+    Modelo de función (película en una sala a una hora).
+    - Es la unidad de inventario: asientos, reservas y bloqueos pertenecen a una función
+    """
+    __tablename__ = "showtimes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    auditorium_id = Column(Integer, ForeignKey("auditoriums.id", ondelete="CASCADE"), nullable=False)
+    movie_title = Column(String(200), nullable=False)
+    starts_at = Column(DateTime, nullable=False)
+
+    # Búsqueda de funciones por sala y horario; listado paginado por horario
+    __table_args__ = (
+        Index('idx_showtimes_auditorium_starts_at', 'auditorium_id', 'starts_at'),
+        Index('idx_showtimes_starts_at', 'starts_at', 'id'),
+    )
+
+    # Relaciones
+    auditorium = relationship("Auditorium", back_populates="showtimes")
+    seats = relationship("Seat", back_populates="showtime", passive_deletes=True)
+
+    def __repr__(self):
+        return f"<Showtime(movie='{self.movie_title}', starts_at={self.starts_at})>"
+
+
 class Seat(Base):
     """
-    Modelo de asiento del cine.
-    - Organizados por fila (letra) y número
+    Modelo de asiento de una función.
+    - Organizados por fila (letra) y número dentro de la función
     - Estados: available, reserved, occupied, premium
     - Algunos asientos son premium (mejores ubicaciones)
+    - Todas las consultas filtran por showtime_id: los índices empiezan por esa columna
     """
     __tablename__ = "seats"
 
     id = Column(Integer, primary_key=True, index=True)
+    showtime_id = Column(Integer, ForeignKey("showtimes.id", ondelete="CASCADE"), nullable=False)
     row_letter = Column(String(1), nullable=False)
     number = Column(Integer, nullable=False)
-    status = Column(String(20), default="available", index=True)  # available, reserved, occupied, premium
+    status = Column(String(20), default="available")  # available, reserved, occupied, premium
     is_premium = Column(Boolean, default=False)
 
-    # Constraint de unicidad para fila + número
-    __table_args__ = (UniqueConstraint('row_letter', 'number', name='unique_seat_position'),)
+    # Unicidad de fila + número por función; índice de disponibilidad por función;
+    # (id, showtime_id) es el destino de la clave foránea compuesta de reservations
+    __table_args__ = (
+        UniqueConstraint('showtime_id', 'row_letter', 'number', name='unique_seat_position'),
+        UniqueConstraint('id', 'showtime_id', name='unique_seat_showtime'),
+        Index('idx_seats_showtime_status', 'showtime_id', 'status'),
+    )
 
-    # Relación con reservas
+    # Relaciones
+    showtime = relationship("Showtime", back_populates="seats")
     reservations = relationship("Reservation", back_populates="seat")
 
     @property
@@ -75,21 +147,54 @@ class Reservation(Base):
     - Vincula usuario con asiento
     - Incluye combos seleccionados
     - Se elimina automáticamente cuando expira el usuario
+    - showtime_id se copia del asiento; la clave foránea compuesta
+      (seat_id, showtime_id) garantiza que coincida con la función del asiento
     """
     __tablename__ = "reservations"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), nullable=False)
+    showtime_id = Column(Integer, nullable=False)
+    seat_id = Column(Integer, nullable=False)
     combo = Column(String(100))  # Combo seleccionado (ej: "Popcorn Large + Soda")
     created_at = Column(DateTime, default=func.now())
 
-    # Constraint de unicidad para evitar dobles reservas del mismo asiento
-    __table_args__ = (UniqueConstraint('seat_id', name='unique_seat_reservation'),)
+    # Un asiento (ya propio de una función) solo puede tener una reserva;
+    # las reservas de un usuario se consultan y limitan por función
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['seat_id', 'showtime_id'], ['seats.id', 'seats.showtime_id'],
+            name='fk_reservations_seat_showtime', ondelete="CASCADE"
+        ),
+        UniqueConstraint('seat_id', name='unique_seat_reservation'),
+        Index('idx_reservations_showtime_user', 'showtime_id', 'user_id'),
+        Index('idx_reservations_user_id', 'user_id'),
+    )
 
     # Relaciones
     user = relationship("User", back_populates="reservations")
     seat = relationship("Seat", back_populates="reservations")
 
     def __repr__(self):
-        return f"<Reservation(user_id={self.user_id}, seat={self.seat.seat_name if self.seat else 'N/A'})>"
\ No newline at end of file
+        return f"<Reservation(user_id={self.user_id}, seat={self.seat.seat_name if self.seat else 'N/A'})>"
+
+
+class SeatHold(Base):
+    """
+    Bloqueo temporal de un asiento durante el checkout.
+    - Un asiento solo puede tener un bloqueo (seat_id es la clave primaria)
+    - Expira de forma perezosa: un bloqueo vencido se ignora y se reemplaza
+    - Se elimina al confirmar la reserva, al liberarlo o al expirar el usuario
+    """
+    __tablename__ = "seat_holds"
+
+    seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    def is_expired(self):
+        """Verifica si el bloqueo ha expirado"""
+        return datetime.utcnow() >= self.expires_at
+
+    def __repr__(self):
+        return f"<SeatHold(seat_id={self.seat_id}, user_id={self.user_id}, expires_at={self.expires_at})>"
@@ -0,0 +1,136 @@
+"""
+Propagación de cambios entre workers mediante PostgreSQL LISTEN/NOTIFY.
+Cada transacción que modifica asientos emite un NOTIFY (entregado solo si
+hace commit) y cada worker mantiene un listener asyncpg que aplica los
+cambios de los demás workers a sus cachés locales.
+"""
+
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Canal de PostgreSQL usado para los cambios de asientos
+SEAT_CHANGES_CHANNEL = os.getenv("SEAT_CHANGES_CHANNEL", "seat_changes")
+
+# Identificador único del worker; permite ignorar las notificaciones propias
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+# Límite de PostgreSQL para el payload de NOTIFY (8000 bytes) con margen
+MAX_NOTIFY_PAYLOAD = 7500
+
+# Segundos de espera antes de reconectar el listener
+RECONNECT_DELAY_SECONDS = 2
+
+
+def build_seat_notification(changes: Optional[List[Dict]], users: Optional[List[int]] = None) -> str:
+    """
+    Construye el payload JSON de un NOTIFY de cambios confirmados.
+    Si los cambios no caben en un NOTIFY, se degrada a una invalidación completa.
+
+    Args:
+        changes: Asientos con su nuevo estado (formato SeatResponse)
+        users: IDs de usuarios a eliminar de la caché de usuarios
+
+    Returns:
+        str: Payload JSON listo para pg_notify
+    """
+    payload = json.dumps({
+        "origin": WORKER_ID,
+        "changes": changes,
+        "users": users or []
+    }, separators=(",", ":"))
+
+    if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({"origin": WORKER_ID, "reconnect": True}, separators=(",", ":"))
+    return payload
+
+
+def to_asyncpg_dsn(database_url: str) -> str:
+    """Convierte una URL de SQLAlchemy (postgresql+driver://) en DSN de asyncpg"""
+    scheme, _, rest = database_url.partition("://")
+    return f"{scheme.split('+')[0]}://{rest}"
+
+
+class DatabaseChangeListener:
+    """
+    Listener asyncpg de un canal LISTEN/NOTIFY.
+    - Una conexión dedicada por worker
+    - Ignora las notificaciones emitidas por el propio worker
+    - Reconecta automáticamente; al reconectar pide una invalidación completa
+      (reconnect) porque pudo perder notificaciones mientras estuvo desconectado
+    """
+
+    def __init__(self, dsn: str, channel: str, handler: Callable[[Dict], None]):
+        self._dsn = dsn
+        self._channel = channel
+        self._handler = handler
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia el listener en segundo plano en el event loop actual"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el listener y cierra su conexión"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        """Callback de asyncpg para cada NOTIFY recibido"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("⚠️ Notificación inválida en %s: %s", channel, payload[:100])
+            return
+
+        if event.get("origin") == WORKER_ID:
+            return
+
+        try:
+            self._handler(event)
+        except Exception as e:
+            logger.error("❌ Error aplicando notificación de otro worker: %s", e)
+
+    async def _run(self) -> None:
+        """Mantiene la conexión LISTEN abierta, reconectando ante fallos"""
+        import asyncpg
+
+        first_connection = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _conn: closed.set())
+                await connection.add_listener(self._channel, self._on_notification)
+                logger.info("📡 Escuchando cambios de otros workers en '%s'", self._channel)
+
+                if not first_connection:
+                    self._handler({"origin": None, "reconnect": True})
+                first_connection = False
+
+                await closed.wait()
+                logger.warning("📡 Conexión LISTEN cerrada, reconectando...")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Error en listener de notificaciones: %s", e)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
@@ -0,0 +1,129 @@
+"""
+Canal de actualizaciones en tiempo real del mapa de asientos.
+Hub asyncio que reparte a los clientes WebSocket suscritos a cada función
+las transiciones de estado de sus asientos en cuanto se confirman.
+"""
+
+from typing import Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import os
+import threading
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Mensajes pendientes por suscriptor antes de considerarlo lento
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "32"))
+
+# Mensaje enviado a un suscriptor lento: debe recargar la grilla completa
+_RESYNC_MESSAGE = json.dumps({"type": "resync"})
+
+
+class SeatEventHub:
+    """
+    Hub de difusión de eventos de asientos.
+    - Cada suscriptor es una cola asyncio acotada (memoria constante por conexión)
+    - Los suscriptores se agrupan por función: solo reciben eventos de la suya
+    - El mensaje se serializa una sola vez y se comparte entre todas las colas
+    - Un suscriptor lento no frena a los demás: se vacía su cola y recibe "resync"
+    - publish() es seguro desde cualquier hilo (ej: jobs del scheduler)
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._epoch = ""
+
+    @property
+    def subscriber_count(self) -> int:
+        """Cantidad de clientes conectados"""
+        return sum(len(queues) for queues in list(self._subscribers.values()))
+
+    def bind(self, loop: asyncio.AbstractEventLoop, epoch: str = "") -> None:
+        """
+        Asocia el hub al event loop del worker. Se llama al iniciar la aplicación.
+
+        Args:
+            loop: Event loop en el que viven las conexiones
+            epoch: Epoch de los mapas de asientos del worker (acompaña a cada versión)
+        """
+        self._loop = loop
+        self._epoch = epoch
+        self._loop_thread_id = threading.get_ident()
+
+    def subscribe(self, showtime_id: int) -> asyncio.Queue:
+        """
+        Registra un nuevo suscriptor de una función.
+
+        Args:
+            showtime_id: ID de la función a seguir
+
+        Returns:
+            asyncio.Queue: Cola de la que el suscriptor lee mensajes JSON
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(showtime_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, showtime_id: int, queue: asyncio.Queue) -> None:
+        """Elimina un suscriptor del hub"""
+        queues = self._subscribers.get(showtime_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[showtime_id]
+
+    def publish(self, showtime_id: int, event: Dict) -> None:
+        """
+        Difunde un evento a los suscriptores de una función.
+
+        Args:
+            showtime_id: ID de la función afectada
+            event: Evento serializable a JSON
+        """
+        if self._loop is None or showtime_id not in self._subscribers:
+            return
+
+        message = json.dumps(event, default=str)
+
+        if threading.get_ident() == self._loop_thread_id:
+            self._fan_out(showtime_id, message)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, showtime_id, message)
+
+    def _fan_out(self, showtime_id: int, message: str) -> None:
+        """Encola el mensaje en cada suscriptor de la función (se ejecuta en el event loop)"""
+        for queue in list(self._subscribers.get(showtime_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: descartar lo pendiente y pedirle una recarga completa
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_RESYNC_MESSAGE)
+
+    def on_seat_map_change(self, showtime_id: int, version: int, changes: Optional[List[Dict]]) -> None:
+        """
+        Listener de los mapas de asientos: convierte una nueva versión en evento.
+
+        Args:
+            showtime_id: Función cuyo mapa cambió
+            version: Nueva versión del mapa
+            changes: Asientos cambiados, None si la invalidación fue completa
+        """
+        if changes is None:
+            event = {"type": "invalidate", "showtime_id": showtime_id, "version": version, "epoch": self._epoch}
+        else:
+            event = {
+                "type": "seat_changes", "showtime_id": showtime_id, "version": version,
+                "epoch": self._epoch, "changes": changes
+            }
+        self.publish(showtime_id, event)
+
+
+# Instancia global por worker
+seat_event_hub = SeatEventHub()
@@ -4,20 +4,25 @@ Maneja registro, login y operaciones de usuarios.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 
-from database import get_db, cleanup_expired_users
+from database import get_async_db
 from models import User
 from schemas import UserCreate, UserLogin, UserResponse, Token, ApiResponse
 from auth import (
     authenticate_user, 
     create_access_token, 
-    get_password_hash, 
+    get_password_hash_async, 
     check_user_limit,
     get_current_user,
+    UserPrincipal,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from services import AsyncReservationService
+from cache import invalidate_user_on_commit, user_cache
+from expiry import expiry_scheduler, announce_user_expiry
 import logging
 
 # Configuración del logger
@@ -28,7 +33,7 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/register", response_model=Token)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Registra un nuevo usuario en el sistema.
     
@@ -49,34 +54,32 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         HTTPException: Si hay errores de validación o límites
     """
     try:
-        # Limpiar usuarios expirados antes de verificar límite
-        cleanup_expired_users(db)
-        
         # Verificar límite de usuarios
-        if not check_user_limit(db):
-            logger.warning(f"🚫 Intento de registro rechazado: límite de 12 usuarios alcanzado")
+        if not await check_user_limit(db):
+            logger.warning("🚫 Intento de registro rechazado: límite de 12 usuarios alcanzado")
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Límite máximo de usuarios alcanzado (12). Intenta más tarde."
             )
         
         # Verificar si el username ya existe
-        existing_user = db.query(User).filter(User.username == user_data.username.lower()).first()
+        existing_user = await db.scalar(select(User).where(User.username == user_data.username.lower()))
         if existing_user:
             # Si existe pero ha expirado, eliminarlo
             if existing_user.is_expired():
-                logger.info(f"🗑️ Eliminando usuario expirado: {existing_user.username}")
-                db.delete(existing_user)
-                db.commit()
+                logger.info("🗑️ Eliminando usuario expirado: %s", existing_user.username)
+                await AsyncReservationService.release_user_seats(db, existing_user)
+                await db.delete(existing_user)
+                await db.commit()
             else:
-                logger.warning(f"❌ Intento de registro con username existente: {user_data.username}")
+                logger.warning("❌ Intento de registro con username existente: %s", user_data.username)
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail="El nombre de usuario ya está en uso"
                 )
         
         # Hashear contraseña
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         # Crear nuevo usuario
         new_user = User(
@@ -88,8 +91,13 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.flush()
+        
+        # Avisar del deadline al worker dueño de la expiración (solo si hay commit)
+        await announce_user_expiry(db, new_user.id, new_user.expires_at)
+        await db.commit()
+        await db.refresh(new_user)
+        expiry_scheduler.schedule(new_user.id, new_user.expires_at)
         
         # Crear token JWT
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -98,7 +106,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
             expires_delta=access_token_expires
         )
         
-        logger.info(f"✅ Nuevo usuario registrado: {new_user.username} (ID: {new_user.id})")
+        logger.info("✅ Nuevo usuario registrado: %s (ID: %s)", new_user.username, new_user.id)
         
         return {
             "access_token": access_token,
@@ -110,8 +118,8 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en registro de usuario: {e}")
-        db.rollback()
+        logger.error("Error en registro de usuario: %s", e)
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -119,7 +127,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Autentica un usuario existente.
     
@@ -134,14 +142,11 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
         HTTPException: Si las credenciales son incorrectas
     """
     try:
-        # Limpiar usuarios expirados
-        cleanup_expired_users(db)
-        
         # Autenticar usuario
-        user = authenticate_user(db, user_credentials.username, user_credentials.password)
+        user = await authenticate_user(db, user_credentials.username, user_credentials.password)
         
         if not user:
-            logger.warning(f"❌ Intento de login fallido: {user_credentials.username}")
+            logger.warning("❌ Intento de login fallido: %s", user_credentials.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas o usuario expirado",
@@ -155,7 +160,7 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
             expires_delta=access_token_expires
         )
         
-        logger.info(f"🔑 Login exitoso: {user.username} {'👑' if user.is_premium else '👤'}")
+        logger.info("🔑 Login exitoso: %s %s", user.username, '👑' if user.is_premium else '👤')
         
         return {
             "access_token": access_token,
@@ -167,7 +172,7 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en login: {e}")
+        logger.error("Error en login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -175,7 +180,7 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserPrincipal = Depends(get_current_user)):
     """
     Obtiene información del usuario autenticado actual.
     
@@ -185,12 +190,12 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     Returns:
         UserResponse: Información del usuario
     """
-    logger.info(f"📋 Consulta de perfil: {current_user.username}")
+    logger.info("📋 Consulta de perfil: %s", current_user.username)
     return UserResponse.from_orm(current_user)
 
 
 @router.post("/logout", response_model=ApiResponse)
-async def logout_user(current_user: User = Depends(get_current_user)):
+async def logout_user(current_user: UserPrincipal = Depends(get_current_user)):
     """
     Cierra sesión del usuario actual.
     Nota: En JWT stateless, el logout es principalmente del lado cliente.
@@ -201,7 +206,7 @@ async def logout_user(current_user: User = Depends(get_current_user)):
     Returns:
         ApiResponse: Confirmación del logout
     """
-    logger.info(f"👋 Logout: {current_user.username}")
+    logger.info("👋 Logout: %s", current_user.username)
     
     return ApiResponse(
         success=True,
@@ -211,7 +216,7 @@ async def logout_user(current_user: User = Depends(get_current_user)):
 
 
 @router.delete("/delete-account", response_model=ApiResponse)
-async def delete_user_account(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete_user_account(current_user: UserPrincipal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """
     Elimina la cuenta del usuario actual y todas sus reservas.
     
@@ -221,15 +226,30 @@ async def delete_user_account(current_user: User = Depends(get_current_user), db
         
     Returns:
         ApiResponse: Confirmación de eliminación
+        
+    Raises:
+        HTTPException: 401 si el usuario ya no existe (principal cacheado aún vigente)
     """
     try:
         username = current_user.username
+        user = await db.get(User, current_user.id)
+        
+        if user is None:
+            # Ya eliminado (expiración u otra sesión): descartar el principal cacheado
+            user_cache.invalidate(current_user.id)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Usuario no encontrado",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         
-        # Eliminar usuario (las reservas se eliminan automáticamente por CASCADE)
-        db.delete(current_user)
-        db.commit()
+        # Liberar asientos y eliminar usuario (las reservas se eliminan por CASCADE)
+        await AsyncReservationService.release_user_seats(db, user)
+        invalidate_user_on_commit(db, user.id)
+        await db.delete(user)
+        await db.commit()
         
-        logger.info(f"🗑️ Cuenta eliminada: {username}")
+        logger.info("🗑️ Cuenta eliminada: %s", username)
         
         return ApiResponse(
             success=True,
@@ -237,9 +257,11 @@ async def delete_user_account(current_user: User = Depends(get_current_user), db
             timestamp=datetime.utcnow()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error eliminando cuenta: {e}")
-        db.rollback()
+        logger.error("Error eliminando cuenta: %s", e)
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -1,22 +1,35 @@
 """
 Rutas de reservas para el sistema de cine.
-Maneja operaciones de asientos, reservas y funcionalidades premium.
+Maneja funciones, operaciones de asientos, reservas y funcionalidades premium.
+Las rutas de asientos y reservas operan sobre una función (showtime_id);
+si el cliente no la indica se usa la función principal.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+import time
 
-from database import get_db, cleanup_expired_users
+from database import get_async_db, get_database_stats
 from models import User, Seat, Reservation
 from schemas import (
-    SeatResponse, SeatsGridResponse, ReservationCreate, ReservationResponse, 
+    SeatResponse, SeatsGridResponse, SeatChangesResponse, ShowtimeResponse,
+    ReservationCreate, ReservationResponse, AutoPickRequest,
+    SeatHoldRequest, SeatHoldResponse, ReservationBatchRequest, ReservationBatchResponse,
     ReservationSummary, PremiumUpgrade, PremiumResponse, ComboResponse,
     BotAction, BotResponse, ApiResponse, SystemStats
 )
-from auth import get_current_user
-from services import ReservationService, PremiumService, BotService, get_available_combos
+from auth import get_current_user, UserPrincipal
+from services import (
+    ReservationService, AsyncReservationService, AsyncPremiumService, AsyncBotService,
+    SEAT_HOLD_TTL_SECONDS, DEFAULT_SHOWTIME_ID, SHOWTIMES_PAGE_SIZE, SHOWTIMES_MAX_PAGE_SIZE
+)
+from catalog import combo_catalog, PREMIUM_DISCOUNT
+from cache import seat_maps
+from metrics import SEAT_SNAPSHOT_LOOKUPS
 import logging
 
 # Configuración del logger
@@ -25,15 +38,171 @@ logger = logging.getLogger(__name__)
 # Router para endpoints de reservas
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
+# Parámetro de consulta común para elegir la función
+ShowtimeQuery = Query(DEFAULT_SHOWTIME_ID, ge=1, description="ID de la función")
+
+
+def _resolve_showtime(showtime_id: Optional[int]) -> int:
+    """Función indicada en el cuerpo de la petición o la función principal"""
+    return showtime_id or DEFAULT_SHOWTIME_ID
+
+
+def _seat_response(seat: Seat, seat_status: Optional[str] = None) -> SeatResponse:
+    """Convierte un Seat en SeatResponse (con un estado visible opcional)"""
+    return SeatResponse(
+        id=seat.id,
+        showtime_id=seat.showtime_id,
+        row_letter=seat.row_letter,
+        number=seat.number,
+        status=seat_status or seat.status,
+        is_premium=seat.is_premium,
+        seat_name=seat.seat_name
+    )
+
+
+def _build_seats_grid(db: Session, showtime_id: int, version: int) -> Tuple[SeatsGridResponse, Optional[datetime]]:
+    """
+    Construye la grilla de asientos de una función desde la base de datos.
+    Ruta de solo lectura: no limpia usuarios ni modifica asientos,
+    la reconciliación de estados ocurre en las rutas de escritura.
+    
+    Args:
+        db: Sesión de base de datos
+        showtime_id: ID de la función
+        version: Versión del mapa leída antes de consultar
+        
+    Returns:
+        Tuple[SeatsGridResponse, Optional[datetime]]: Grilla completa de asientos
+        y vencimiento del primer bloqueo temporal visible
+    """
+    # Obtener asientos y estado de reserva en una sola consulta
+    seats_with_flags = ReservationService.get_seats_with_reservation_flag(db, showtime_id)
+    
+    if not seats_with_flags:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No se encontraron asientos para la función"
+        )
+    
+    # Convertir a formato de respuesta y calcular estadísticas en una sola pasada
+    seat_responses = []
+    rows = set()
+    seats_per_row = 0
+    available_seats = 0
+    premium_seats = 0
+    first_hold_expiry = None
+    for seat, has_reservation, held_until in seats_with_flags:
+        # Derivar el estado visible a partir de las reservas actuales (sin escribir)
+        if has_reservation:
+            seat_status = "reserved"
+        elif seat.status == "reserved":
+            seat_status = "available"
+        else:
+            seat_status = seat.status
+        
+        # Un bloqueo vigente solo se muestra sobre asientos libres
+        if held_until is not None and seat_status == "available":
+            seat_status = "held"
+            if first_hold_expiry is None or held_until < first_hold_expiry:
+                first_hold_expiry = held_until
+        
+        seat_responses.append(_seat_response(seat, seat_status))
+        
+        rows.add(seat.row_letter)
+        seats_per_row = max(seats_per_row, seat.number)
+        if seat_status == "available":
+            available_seats += 1
+        if seat.is_premium:
+            premium_seats += 1
+    
+    total_seats = len(seat_responses)
+    logger.info("🎭 Grilla de la función %s reconstruida: %s/%s disponibles", showtime_id, available_seats, total_seats)
+    
+    grid = SeatsGridResponse(
+        showtime_id=showtime_id,
+        seats=seat_responses,
+        rows=sorted(rows),
+        seats_per_row=seats_per_row,
+        total_seats=total_seats,
+        available_seats=available_seats,
+        premium_seats=premium_seats,
+        version=version,
+        epoch=seat_maps.for_showtime(showtime_id).epoch
+    )
+    return grid, first_hold_expiry
+
+
+async def _get_seats_snapshot(db: AsyncSession, showtime_id: int):
+    """
+    Obtiene la instantánea vigente de la grilla de una función, reconstruyéndola
+    si la versión cambió desde la última consulta o si venció un bloqueo temporal.
+    """
+    seat_map = seat_maps.for_showtime(showtime_id)
+    snapshot = seat_map.get()
+    SEAT_SNAPSHOT_LOOKUPS.inc(1, "miss" if snapshot is None else "hit")
+    
+    if snapshot is None:
+        # Leer la versión antes de consultar para no cachear datos viejos
+        version = seat_map.version
+        grid, first_hold_expiry = await db.run_sync(_build_seats_grid, showtime_id, version)
+        expires_at = None
+        if first_hold_expiry is not None:
+            expires_at = time.time() + (first_hold_expiry - datetime.utcnow()).total_seconds()
+        snapshot = seat_map.store(version, grid.model_dump_json().encode("utf-8"), expires_at)
+    
+    return snapshot
+
+
+@router.get("/showtimes", response_model=List[ShowtimeResponse])
+async def get_showtimes(
+    starts_from: Optional[datetime] = Query(None, description="Inicio mínimo (UTC, por defecto ahora)"),
+    starts_until: Optional[datetime] = Query(None, description="Inicio máximo (UTC)"),
+    limit: int = Query(SHOWTIMES_PAGE_SIZE, ge=1, le=SHOWTIMES_MAX_PAGE_SIZE, description="Funciones por página"),
+    offset: int = Query(0, ge=0, description="Funciones a saltar"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lista una página de funciones con su sala y asientos disponibles.
+    
+    Args:
+        starts_from: Inicio mínimo de las funciones (por defecto, las próximas)
+        starts_until: Inicio máximo de las funciones
+        limit: Tamaño de la página
+        offset: Funciones a saltar
+        db: Sesión de base de datos
+    
+    Returns:
+        List[ShowtimeResponse]: Funciones ordenadas por horario
+    """
+    try:
+        showtimes = await AsyncReservationService.get_showtimes(db, starts_from, starts_until, limit, offset)
+        return [ShowtimeResponse.model_validate(showtime) for showtime in showtimes]
+        
+    except Exception as e:
+        logger.error("Error obteniendo funciones: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 
 @router.get("/seats", response_model=SeatsGridResponse)
-async def get_seats_grid(db: Session = Depends(get_db)):
+async def get_seats_grid(
+    request: Request,
+    showtime_id: int = ShowtimeQuery,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Obtiene la grilla completa de asientos del cine con sus estados.
+    Obtiene la grilla completa de asientos de una función con sus estados.
+    
+    La grilla se sirve desde una instantánea pre-serializada que solo se
+    reconstruye cuando cambia la versión del mapa, y admite If-None-Match
+    para responder 304 a clientes que ya tienen la versión vigente.
     
     Estados de asientos:
     - available: Libre para reservar
     - reserved: Reservado por algún usuario
+    - held: Bloqueado temporalmente por un usuario en checkout
     - occupied: Ocupado (simulación)
     - premium: Asiento premium disponible
     
@@ -41,80 +210,132 @@ async def get_seats_grid(db: Session = Depends(get_db)):
         SeatsGridResponse: Grilla completa de asientos organizados
     """
     try:
-        # Limpiar usuarios expirados primero
-        cleanup_expired_users(db)
+        snapshot = await _get_seats_snapshot(db, showtime_id)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
         
-        # Obtener todos los asientos
-        seats = ReservationService.get_all_seats(db)
+        if request.headers.get("if-none-match") == snapshot.etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
-        if not seats:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No se encontraron asientos en el sistema"
-            )
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
         
-        # Convertir a formato de respuesta
-        seat_responses = []
-        for seat in seats:
-            # Actualizar estado basado en reservas actuales
-            has_reservation = db.query(Reservation).filter(Reservation.seat_id == seat.id).first()
-            
-            if has_reservation:
-                seat.status = "reserved"
-            elif seat.status == "reserved" and not has_reservation:
-                seat.status = "available"  # Liberar asiento si no hay reserva
-                db.add(seat)  # Marcar para actualizar
-            
-            seat_responses.append(SeatResponse(
-                id=seat.id,
-                row_letter=seat.row_letter,
-                number=seat.number,
-                status=seat.status,
-                is_premium=seat.is_premium,
-                seat_name=seat.seat_name
-            ))
-        
-        db.commit()  # Guardar cambios de estado
-        
-        # Obtener estadísticas
-        rows = sorted(list(set(seat.row_letter for seat in seats)))
-        seats_per_row = max(seat.number for seat in seats) if seats else 0
-        total_seats = len(seats)
-        available_seats = len([s for s in seat_responses if s.status == "available"])
-        premium_seats = len([s for s in seat_responses if s.is_premium])
-        
-        logger.info(f"🎭 Consulta de asientos: {available_seats}/{total_seats} disponibles")
-        
-        return SeatsGridResponse(
-            seats=seat_responses,
-            rows=rows,
-            seats_per_row=seats_per_row,
-            total_seats=total_seats,
-            available_seats=available_seats,
-            premium_seats=premium_seats
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error obteniendo asientos: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
         )
+
+
+@router.get("/seats/changes", response_model=SeatChangesResponse)
+async def get_seats_changes(
+    since: int = Query(..., ge=0, description="Última versión del mapa conocida por el cliente"),
+    epoch: Optional[str] = Query(None, max_length=32, description="Epoch recibido junto a esa versión"),
+    showtime_id: int = ShowtimeQuery,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtiene solo los asientos de una función cuyo estado cambió desde una versión del mapa.
+    
+    Cada worker numera sus versiones por separado: si el epoch no coincide
+    con el de este proceso (o falta), o la versión ya salió del registro de
+    cambios, responde con la grilla completa en `snapshot`.
+    
+    Args:
+        since: Última versión conocida por el cliente
+        epoch: Epoch de la grilla o evento del que proviene `since`
+        showtime_id: ID de la función
+        db: Sesión de base de datos
+        
+    Returns:
+        SeatChangesResponse: Delta de asientos o grilla completa
+    """
+    try:
+        seat_map = seat_maps.for_showtime(showtime_id)
+        delta = seat_map.changes_since(since, epoch)
+        
+        if delta is not None:
+            version, changes = delta
+            return SeatChangesResponse(
+                version=version,
+                epoch=seat_map.epoch,
+                since=since,
+                full_snapshot=False,
+                changes=changes
+            )
+        
+        # Fallback: embeber la instantánea pre-serializada sin re-serializarla
+        snapshot = await _get_seats_snapshot(db, showtime_id)
+        body = (
+            f'{{"version":{snapshot.version},"epoch":"{seat_map.epoch}","since":{since},'
+            f'"full_snapshot":true,"changes":[],"snapshot":'
+        ).encode("utf-8") + snapshot.body + b"}"
+        
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error obteniendo asientos: {e}")
+        logger.error("Error obteniendo cambios de asientos: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
         )
 
 
+def _build_reservation_summary(current_user: UserPrincipal, reservations: List[Row]) -> ReservationSummary:
+    """
+    Construye el resumen de reservas a partir de filas de la proyección de
+    reservas (reserva + columnas del asiento), sin consultar la base de datos.
+    
+    Args:
+        current_user: Usuario autenticado
+        reservations: Reservas del usuario con los datos de su asiento
+        
+    Returns:
+        ReservationSummary: Reservas del usuario y costo total
+    """
+    reservation_responses = [
+        ReservationResponse(
+            id=row.id,
+            user_id=row.user_id,
+            showtime_id=row.showtime_id,
+            seat_id=row.seat_id,
+            combo=row.combo,
+            created_at=row.created_at,
+            seat=SeatResponse(
+                id=row.seat_id,
+                showtime_id=row.showtime_id,
+                row_letter=row.row_letter,
+                number=row.number,
+                status=row.status,
+                is_premium=row.is_premium,
+                seat_name=f"{row.row_letter}{row.number}"
+            )
+        )
+        for row in reservations
+    ]
+    
+    return ReservationSummary(
+        user=current_user,
+        reservations=reservation_responses,
+        total_seats=len(reservation_responses),
+        total_cost=ReservationService.calculate_total_cost(reservations, current_user.is_premium)
+    )
+
+
 @router.post("/book", response_model=ReservationSummary)
 async def book_seats(
     reservation_data: ReservationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Reserva asientos para el usuario autenticado.
+    Reserva asientos de una función para el usuario autenticado.
     
     Args:
-        reservation_data: Datos de la reserva (asientos y combo)
+        reservation_data: Datos de la reserva (función, asientos y combo)
         current_user: Usuario autenticado
         db: Sesión de base de datos
         
@@ -126,8 +347,9 @@ async def book_seats(
     """
     try:
         # Realizar reserva
-        success, message, new_reservations = ReservationService.reserve_seats(
-            db, current_user, reservation_data.seat_ids, reservation_data.combo
+        showtime_id = _resolve_showtime(reservation_data.showtime_id)
+        success, message, reservations = await AsyncReservationService.reserve_seats(
+            db, showtime_id, current_user, reservation_data.seat_ids, reservation_data.combo
         )
         
         if not success:
@@ -136,44 +358,266 @@ async def book_seats(
                 detail=message
             )
         
-        # Obtener todas las reservas del usuario
-        all_user_reservations = ReservationService.get_user_reservations(db, current_user)
-        
-        # Calcular costo total
-        total_cost = ReservationService.calculate_total_cost(all_user_reservations, current_user.is_premium)
-        
-        # Crear respuestas de reservas
-        reservation_responses = []
-        for reservation in all_user_reservations:
-            reservation_responses.append(ReservationResponse(
-                id=reservation.id,
-                user_id=reservation.user_id,
-                seat_id=reservation.seat_id,
-                combo=reservation.combo,
-                created_at=reservation.created_at,
-                seat=SeatResponse(
-                    id=reservation.seat.id,
-                    row_letter=reservation.seat.row_letter,
-                    number=reservation.seat.number,
-                    status=reservation.seat.status,
-                    is_premium=reservation.seat.is_premium,
-                    seat_name=reservation.seat.seat_name
-                )
-            ))
-        
-        logger.info(f"🎫 Reserva exitosa: {current_user.username} - {len(new_reservations)} nuevos asientos")
-        
-        return ReservationSummary(
-            user=current_user,
-            reservations=reservation_responses,
-            total_seats=len(all_user_reservations),
-            total_cost=total_cost
+        logger.info("🎫 Reserva exitosa: %s - %s nuevos asientos", current_user.username, len(reservation_data.seat_ids))
+        
+        # El servicio devuelve las reservas previas y las recién insertadas: sin re-consultar
+        return _build_reservation_summary(current_user, reservations)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error en reserva: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.post("/auto-pick", response_model=ReservationSummary)
+async def auto_pick_seats(
+    pick: AutoPickRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Reserva automáticamente los mejores asientos contiguos disponibles.
+    
+    El bloque se elige con el puntaje de calidad precalculado de cada asiento
+    (fila y posición central) sobre el mapa de disponibilidad de la función.
+    
+    Args:
+        pick: Cantidad de asientos, función y combo
+        current_user: Usuario autenticado
+        db: Sesión de base de datos
+        
+    Returns:
+        ReservationSummary: Resumen de la reserva realizada
+        
+    Raises:
+        HTTPException: Si no hay un bloque libre o la reserva falla
+    """
+    try:
+        success, message, reservations = await AsyncReservationService.auto_reserve_seats(
+            db, _resolve_showtime(pick.showtime_id), current_user, pick.count, pick.combo
         )
         
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=message
+            )
+        
+        logger.info("🎯 Auto-selección exitosa: %s - %s asientos", current_user.username, pick.count)
+        return _build_reservation_summary(current_user, reservations)
+        
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en reserva: {e}")
+        logger.error("Error en auto-selección: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.post("/batch", response_model=ReservationBatchResponse)
+async def apply_reservation_batch(
+    batch: ReservationBatchRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ejecuta varias reservas y cancelaciones en una sola transacción.
+    
+    Las cancelaciones se aplican primero (liberan cupo del límite por usuario)
+    y cada asiento informa su propio resultado. Con `atomic=true`, cualquier
+    operación fallida revierte el lote completo y responde 409.
+    
+    Args:
+        batch: Asientos a reservar y cancelar
+        current_user: Usuario autenticado
+        db: Sesión de base de datos
+        
+    Returns:
+        ReservationBatchResponse: Conteos y resultado por asiento
+    """
+    try:
+        success, message, results = await AsyncReservationService.apply_batch(
+            db, _resolve_showtime(batch.showtime_id), current_user,
+            batch.reserve, batch.cancel, batch.combo, batch.atomic
+        )
+        
+        if not results:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=message
+            )
+        
+        response = ReservationBatchResponse(
+            success=success,
+            message=message,
+            reserved=sum(1 for r in results if r["operation"] == "reserve" and r["success"]),
+            released=sum(1 for r in results if r["operation"] == "cancel" and r["success"]),
+            results=results
+        )
+        
+        if batch.atomic and not success:
+            return Response(
+                content=response.model_dump_json(),
+                media_type="application/json",
+                status_code=status.HTTP_409_CONFLICT
+            )
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error en lote de reservas: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.post("/hold", response_model=SeatHoldResponse)
+async def hold_seats(
+    hold_data: SeatHoldRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bloquea temporalmente asientos mientras el usuario completa el checkout.
+    
+    El bloqueo reemplaza la selección anterior del usuario, se muestra como
+    "held" en la grilla y expira solo si no se confirma a tiempo.
+    
+    Args:
+        hold_data: Asientos a bloquear
+        current_user: Usuario autenticado
+        db: Sesión de base de datos
+        
+    Returns:
+        SeatHoldResponse: Asientos bloqueados y vencimiento del bloqueo
+        
+    Raises:
+        HTTPException: Si algún asiento no puede bloquearse
+    """
+    try:
+        showtime_id = _resolve_showtime(hold_data.showtime_id)
+        success, message, expires_at = await AsyncReservationService.hold_seats(
+            db, showtime_id, current_user, hold_data.seat_ids
+        )
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=message
+            )
+        
+        return SeatHoldResponse(
+            showtime_id=showtime_id,
+            seat_ids=sorted(hold_data.seat_ids),
+            expires_at=expires_at,
+            ttl_seconds=SEAT_HOLD_TTL_SECONDS
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error bloqueando asientos: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.post("/hold/confirm", response_model=ReservationSummary)
+async def confirm_held_seats(
+    reservation_data: ReservationCreate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Confirma como reserva los asientos bloqueados por el usuario.
+    Cada asiento debe tener un bloqueo vigente del usuario.
+    
+    Args:
+        reservation_data: Asientos bloqueados a confirmar y combo
+        current_user: Usuario autenticado
+        db: Sesión de base de datos
+        
+    Returns:
+        ReservationSummary: Resumen de la reserva realizada
+        
+    Raises:
+        HTTPException: Si el bloqueo expiró o los asientos ya no están disponibles
+    """
+    try:
+        showtime_id = _resolve_showtime(reservation_data.showtime_id)
+        success, message, reservations = await AsyncReservationService.reserve_seats(
+            db, showtime_id, current_user, reservation_data.seat_ids, reservation_data.combo, require_hold=True
+        )
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=message
+            )
+        
+        logger.info("🎫 Bloqueo confirmado: %s - %s nuevos asientos", current_user.username, len(reservation_data.seat_ids))
+        
+        return _build_reservation_summary(current_user, reservations)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error confirmando bloqueo: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.delete("/hold", response_model=ApiResponse)
+async def release_held_seats(
+    showtime_id: int = ShowtimeQuery,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Libera todos los bloqueos temporales del usuario en una función.
+    
+    Args:
+        showtime_id: ID de la función
+        current_user: Usuario autenticado
+        db: Sesión de base de datos
+        
+    Returns:
+        ApiResponse: Cantidad de asientos liberados
+        
+    Raises:
+        HTTPException: Si no se pudieron liberar los bloqueos
+    """
+    try:
+        success, message, released = await AsyncReservationService.release_holds(db, showtime_id, current_user)
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+        
+        return ApiResponse(
+            success=True,
+            message=message,
+            data={"released_seats": released}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error liberando bloqueos: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -183,14 +627,16 @@ async def book_seats(
 @router.delete("/cancel/{seat_id}", response_model=ApiResponse)
 async def cancel_seat_reservation(
     seat_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    showtime_id: int = ShowtimeQuery,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cancela la reserva de un asiento específico.
     
     Args:
         seat_id: ID del asiento a cancelar
+        showtime_id: ID de la función
         current_user: Usuario autenticado
         db: Sesión de base de datos
         
@@ -198,7 +644,7 @@ async def cancel_seat_reservation(
         ApiResponse: Confirmación de cancelación
     """
     try:
-        success, message = ReservationService.cancel_reservation(db, current_user, seat_id)
+        success, message = await AsyncReservationService.cancel_reservation(db, showtime_id, current_user, seat_id)
         
         if not success:
             raise HTTPException(
@@ -215,7 +661,7 @@ async def cancel_seat_reservation(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error cancelando reserva: {e}")
+        logger.error("Error cancelando reserva: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -224,13 +670,15 @@ async def cancel_seat_reservation(
 
 @router.get("/my-reservations", response_model=ReservationSummary)
 async def get_my_reservations(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    showtime_id: Optional[int] = Query(None, ge=1, description="Filtrar por función"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Obtiene todas las reservas activas del usuario autenticado.
+    Obtiene las reservas activas del usuario autenticado (todas o las de una función).
     
     Args:
+        showtime_id: Si se indica, solo las reservas de esa función
         current_user: Usuario autenticado
         db: Sesión de base de datos
         
@@ -238,40 +686,13 @@ async def get_my_reservations(
         ReservationSummary: Resumen de reservas del usuario
     """
     try:
-        # Obtener reservas del usuario
-        user_reservations = ReservationService.get_user_reservations(db, current_user)
-        
-        # Calcular costo total
-        total_cost = ReservationService.calculate_total_cost(user_reservations, current_user.is_premium)
-        
-        # Crear respuestas de reservas
-        reservation_responses = []
-        for reservation in user_reservations:
-            reservation_responses.append(ReservationResponse(
-                id=reservation.id,
-                user_id=reservation.user_id,
-                seat_id=reservation.seat_id,
-                combo=reservation.combo,
-                created_at=reservation.created_at,
-                seat=SeatResponse(
-                    id=reservation.seat.id,
-                    row_letter=reservation.seat.row_letter,
-                    number=reservation.seat.number,
-                    status=reservation.seat.status,
-                    is_premium=reservation.seat.is_premium,
-                    seat_name=reservation.seat.seat_name
-                )
-            ))
-        
-        return ReservationSummary(
-            user=current_user,
-            reservations=reservation_responses,
-            total_seats=len(user_reservations),
-            total_cost=total_cost
-        )
+        # Reservas con las columnas de su asiento en una sola consulta
+        user_reservations = await AsyncReservationService.get_user_reservation_rows(db, current_user, showtime_id)
+        
+        return _build_reservation_summary(current_user, user_reservations)
         
     except Exception as e:
-        logger.error(f"Error obteniendo reservas: {e}")
+        logger.error("Error obteniendo reservas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -281,8 +702,8 @@ async def get_my_reservations(
 @router.post("/premium", response_model=PremiumResponse)
 async def upgrade_to_premium(
     upgrade_data: PremiumUpgrade,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualiza el usuario a premium con beneficios especiales.
@@ -308,9 +729,18 @@ async def upgrade_to_premium(
                 detail="El usuario ya es premium"
             )
         
+        # El upgrade modifica al usuario: cargar el modelo desde la sesión
+        user = await db.get(User, current_user.id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Usuario no encontrado"
+            )
+        
         # Realizar upgrade a premium
-        success, message, selected_seats = PremiumService.upgrade_to_premium(
-            db, current_user, upgrade_data.auto_select_seats, upgrade_data.seats_count
+        success, message, selected_seats = await AsyncPremiumService.upgrade_to_premium(
+            db, user, upgrade_data.auto_select_seats, upgrade_data.seats_count,
+            _resolve_showtime(upgrade_data.showtime_id)
         )
         
         if not success:
@@ -320,20 +750,13 @@ async def upgrade_to_premium(
             )
         
         # Obtener reservas actualizadas
-        user_reservations = ReservationService.get_user_reservations(db, current_user)
+        user_reservations = await AsyncReservationService.get_user_reservation_rows(db, user)
         total_cost = ReservationService.calculate_total_cost(user_reservations, True)  # Con descuento premium
         
         # Preparar respuesta
         selected_seat_responses = []
         for seat in selected_seats:
-            selected_seat_responses.append(SeatResponse(
-                id=seat.id,
-                row_letter=seat.row_letter,
-                number=seat.number,
-                status=seat.status,
-                is_premium=seat.is_premium,
-                seat_name=seat.seat_name
-            ))
+            selected_seat_responses.append(_seat_response(seat))
         
         premium_benefits = [
             "15% de descuento en todas las reservas",
@@ -344,9 +767,9 @@ async def upgrade_to_premium(
         ]
         
         return PremiumResponse(
-            user=current_user,
+            user=user,
             auto_selected_seats=selected_seat_responses,
-            discount_applied=0.15,
+            discount_applied=PREMIUM_DISCOUNT,
             total_cost=total_cost,
             premium_benefits=premium_benefits
         )
@@ -354,7 +777,7 @@ async def upgrade_to_premium(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en upgrade premium: {e}")
+        logger.error("Error en upgrade premium: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -362,9 +785,10 @@ async def upgrade_to_premium(
 
 
 @router.get("/combos", response_model=ComboResponse)
-async def get_available_combos(current_user: User = Depends(get_current_user)):
+async def list_combos(current_user: UserPrincipal = Depends(get_current_user)):
     """
     Obtiene los combos disponibles según el tipo de usuario.
+    La respuesta de cada tipo (regular/premium) está pre-serializada en el catálogo.
     
     Args:
         current_user: Usuario autenticado
@@ -373,12 +797,13 @@ async def get_available_combos(current_user: User = Depends(get_current_user)):
         ComboResponse: Lista de combos disponibles
     """
     try:
-        combos_data = get_available_combos(current_user.is_premium)
-        
-        return ComboResponse(**combos_data)
+        return Response(
+            content=combo_catalog.response_body(current_user.is_premium),
+            media_type="application/json"
+        )
         
     except Exception as e:
-        logger.error(f"Error obteniendo combos: {e}")
+        logger.error("Error obteniendo combos: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -388,7 +813,7 @@ async def get_available_combos(current_user: User = Depends(get_current_user)):
 @router.post("/bot-simulation", response_model=BotResponse)
 async def simulate_bot_action(
     action_data: BotAction,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Simula una acción del bot para demostrar concurrencia.
@@ -405,19 +830,14 @@ async def simulate_bot_action(
         BotResponse: Resultado de la acción simulada
     """
     try:
-        action_type, success, message, affected_seats = BotService.simulate_user_action(db)
+        action_type, success, message, affected_seats = await AsyncBotService.simulate_user_action(
+            db, _resolve_showtime(action_data.showtime_id)
+        )
         
         # Preparar respuesta de asientos afectados
         seat_responses = []
         for seat in affected_seats:
-            seat_responses.append(SeatResponse(
-                id=seat.id,
-                row_letter=seat.row_letter,
-                number=seat.number,
-                status=seat.status,
-                is_premium=seat.is_premium,
-                seat_name=seat.seat_name
-            ))
+            seat_responses.append(_seat_response(seat))
         
         return BotResponse(
             action_type=action_type,
@@ -428,7 +848,7 @@ async def simulate_bot_action(
         )
         
     except Exception as e:
-        logger.error(f"Error en simulación de bot: {e}")
+        logger.error("Error en simulación de bot: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -436,46 +856,43 @@ async def simulate_bot_action(
 
 
 @router.get("/stats", response_model=SystemStats)
-async def get_system_stats(db: Session = Depends(get_db)):
+async def get_system_stats(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Obtiene estadísticas generales del sistema.
     
     Útil para monitoreo y debugging del estado actual del cine.
+    Las cifras salen de una única consulta agregada cacheada unos segundos.
     
     Args:
+        request: Petición HTTP (para leer el inicio de la aplicación)
         db: Sesión de base de datos
         
     Returns:
         SystemStats: Estadísticas del sistema
     """
     try:
-        # Limpiar usuarios expirados
-        cleanup_expired_users(db)
-        
-        # Obtener estadísticas
-        active_users = db.query(User).filter(User.expires_at > datetime.utcnow()).count()
-        premium_users = db.query(User).filter(
-            User.expires_at > datetime.utcnow(), 
-            User.is_premium == True
-        ).count()
+        stats = await db.run_sync(get_database_stats)
+        if "error" in stats:
+            raise RuntimeError(stats["error"])
         
-        total_seats = db.query(Seat).count()
-        available_seats = db.query(Seat).filter(Seat.status == "available").count()
-        reserved_seats = db.query(Seat).filter(Seat.status == "reserved").count()
-        total_reservations = db.query(Reservation).count()
+        seats_by_status = stats["seats"]
+        start_time = getattr(request.app.state, "start_time", None)
+        uptime_minutes = 0.0
+        if start_time is not None:
+            uptime_minutes = round((datetime.utcnow() - start_time).total_seconds() / 60, 2)
         
         return SystemStats(
-            active_users=active_users,
-            total_seats=total_seats,
-            available_seats=available_seats,
-            reserved_seats=reserved_seats,
-            premium_users=premium_users,
-            total_reservations=total_reservations,
-            uptime_minutes=0.0  # Placeholder - se podría implementar un contador real
+            active_users=stats["active_users"],
+            total_seats=sum(seats_by_status.values()),
+            available_seats=seats_by_status.get("available", 0),
+            reserved_seats=seats_by_status.get("reserved", 0),
+            premium_users=stats["premium_users"],
+            total_reservations=stats["active_reservations"],
+            uptime_minutes=uptime_minutes
         )
         
     except Exception as e:
-        logger.error(f"Error obteniendo estadísticas: {e}")
+        logger.error("Error obteniendo estadísticas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -54,6 +54,7 @@ class Token(BaseModel):
 class SeatResponse(BaseModel):
     """Información de un asiento"""
     id: int
+    showtime_id: Optional[int] = None
     row_letter: str
     number: int
     status: str  # available, reserved, occupied
@@ -66,12 +67,40 @@ class SeatResponse(BaseModel):
 
 class SeatsGridResponse(BaseModel):
     """Respuesta con la grilla completa de asientos"""
+    showtime_id: int
     seats: List[SeatResponse]
     rows: List[str]
     seats_per_row: int
     total_seats: int
     available_seats: int
     premium_seats: int
+    version: int = 0  # Versión del mapa, usada para pedir deltas
+    epoch: str = ""  # Proceso que emitió la versión (debe acompañar a since)
+
+
+class SeatChangesResponse(BaseModel):
+    """Asientos que cambiaron desde una versión del mapa"""
+    version: int
+    epoch: str
+    since: int
+    full_snapshot: bool  # True si la versión pedida ya no está en el registro o es de otro proceso
+    changes: List[SeatResponse]
+    snapshot: Optional[SeatsGridResponse] = None
+
+
+# --- Esquemas de Funciones ---
+
+class ShowtimeResponse(BaseModel):
+    """Función de una película en una sala"""
+    id: int
+    movie_title: str
+    starts_at: datetime
+    auditorium_id: int
+    auditorium_name: str
+    available_seats: int
+
+    class Config:
+        from_attributes = True
 
 
 # --- Esquemas de Reservas ---
@@ -79,6 +108,7 @@ class SeatsGridResponse(BaseModel):
 class ReservationCreate(BaseModel):
     """Datos para crear una nueva reserva"""
     seat_ids: List[int] = Field(..., min_items=1, max_items=6, description="IDs de asientos a reservar")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
     combo: Optional[str] = Field(None, max_length=100, description="Combo seleccionado")
 
     @validator('seat_ids')
@@ -88,10 +118,79 @@ class ReservationCreate(BaseModel):
         return v
 
 
+class AutoPickRequest(BaseModel):
+    """Datos para reservar automáticamente los mejores asientos contiguos"""
+    count: int = Field(2, ge=1, le=6, description="Cantidad de asientos juntos")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
+    combo: Optional[str] = Field(None, max_length=100, description="Combo seleccionado")
+
+
+class ReservationBatchRequest(BaseModel):
+    """Operaciones mezcladas de reserva y cancelación a ejecutar en un solo lote"""
+    reserve: List[int] = Field(default_factory=list, max_items=6, description="IDs de asientos a reservar")
+    cancel: List[int] = Field(default_factory=list, max_items=6, description="IDs de asientos a cancelar")
+    combo: Optional[str] = Field(None, max_length=100, description="Combo para las nuevas reservas")
+    atomic: bool = Field(False, description="Si es True, cualquier fallo revierte todo el lote")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
+
+    @validator('reserve', 'cancel')
+    def validate_unique(cls, v):
+        if len(v) != len(set(v)):
+            raise ValueError('No se pueden repetir asientos en la misma operación')
+        return v
+
+    @validator('cancel')
+    def validate_operations(cls, v, values):
+        reserve = values.get('reserve') or []
+        if not v and not reserve:
+            raise ValueError('El lote debe incluir al menos una operación')
+        if set(v) & set(reserve):
+            raise ValueError('Un asiento no puede reservarse y cancelarse en el mismo lote')
+        return v
+
+
+class SeatOperationResult(BaseModel):
+    """Resultado de una operación del lote sobre un asiento"""
+    seat_id: int
+    operation: str  # reserve, cancel
+    success: bool
+    detail: str
+
+
+class ReservationBatchResponse(BaseModel):
+    """Resultado de un lote de operaciones"""
+    success: bool
+    message: str
+    reserved: int
+    released: int
+    results: List[SeatOperationResult]
+
+
+class SeatHoldRequest(BaseModel):
+    """Asientos a bloquear temporalmente durante el checkout"""
+    seat_ids: List[int] = Field(..., min_items=1, max_items=6, description="IDs de asientos a bloquear")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
+
+    @validator('seat_ids')
+    def validate_seat_ids(cls, v):
+        if len(v) != len(set(v)):
+            raise ValueError('No se pueden repetir asientos en el mismo bloqueo')
+        return v
+
+
+class SeatHoldResponse(BaseModel):
+    """Bloqueo temporal vigente del usuario"""
+    showtime_id: int
+    seat_ids: List[int]
+    expires_at: datetime
+    ttl_seconds: int
+
+
 class ReservationResponse(BaseModel):
     """Información de una reserva"""
     id: int
     user_id: int
+    showtime_id: int
     seat_id: int
     combo: Optional[str]
     created_at: datetime
@@ -115,6 +214,7 @@ class PremiumUpgrade(BaseModel):
     """Datos para upgrade a premium"""
     auto_select_seats: bool = Field(True, description="Auto-seleccionar mejores asientos disponibles")
     seats_count: int = Field(2, ge=1, le=4, description="Cantidad de asientos a auto-seleccionar")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
 
 
 class PremiumResponse(BaseModel):
@@ -133,6 +233,7 @@ class BotAction(BaseModel):
     action: str = Field(..., description="Tipo de acción: reserve, cancel, upgrade")
     seat_count: Optional[int] = Field(1, ge=1, le=3, description="Cantidad de asientos para reservar")
     combo: Optional[str] = Field(None, description="Combo a seleccionar")
+    showtime_id: Optional[int] = Field(None, ge=1, description="Función (por defecto la principal)")
 
 
 class BotResponse(BaseModel):
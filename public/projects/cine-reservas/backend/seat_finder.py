@@ -0,0 +1,219 @@
+"""
+Buscador de mejores asientos.
+Cada función tiene un layout inmutable (IDs por posición, puntaje de calidad
+precalculado y máscara premium por fila) y la disponibilidad se representa
+con un entero por fila (bit i = asiento número i+1 libre). El mejor bloque
+contiguo de N asientos sale de un ranking de bloques calculado una sola vez
+por tamaño: se recorre en orden hasta el primero libre.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import logging
+
+# Configuración del logger
+logger = logging.getLogger(__name__)
+
+# Fila ideal como fracción de la profundidad de la sala (0 = pantalla, 1 = fondo)
+IDEAL_ROW_POSITION = 0.5
+
+# Peso de la fila frente a la posición horizontal en el puntaje de calidad
+ROW_WEIGHT = 0.6
+
+
+def seat_quality(row_index: int, position: int, rows: int, width: int) -> float:
+    """
+    Puntaje de calidad de un asiento entre 0 y 1.
+    Premia la cercanía a la fila ideal y al centro de la fila.
+
+    Args:
+        row_index: Índice de fila (0 = más cercana a la pantalla)
+        position: Posición en la fila (número de asiento - 1)
+        rows: Cantidad de filas de la sala
+        width: Asientos por fila
+    """
+    ideal_row = (rows - 1) * IDEAL_ROW_POSITION
+    row_span = max(ideal_row, rows - 1 - ideal_row) or 1
+    center = (width - 1) / 2
+    row_score = 1 - abs(row_index - ideal_row) / row_span
+    column_score = 1 - abs(position - center) / (center or 1)
+    return round(ROW_WEIGHT * row_score + (1 - ROW_WEIGHT) * column_score, 6)
+
+
+class SeatLayout:
+    """
+    Layout inmutable de los asientos de una función.
+    - seat_ids[fila][posición]: ID del asiento (None si la posición no existe)
+    - scores[fila][posición]: calidad precalculada
+    - premium_masks[fila]: bits de los asientos premium
+    - positions: ID -> (fila, posición) para construir mapas de disponibilidad
+    """
+
+    def __init__(self, showtime_id: int, seats: Iterable[Tuple[int, str, int, bool]]):
+        """
+        Args:
+            showtime_id: ID de la función
+            seats: Tuplas (id, row_letter, number, is_premium)
+        """
+        seats = list(seats)
+        self.showtime_id = showtime_id
+        self.row_letters: Tuple[str, ...] = tuple(sorted({row_letter for _, row_letter, _, _ in seats}))
+        self.width = max((number for _, _, number, _ in seats), default=0)
+
+        row_index = {letter: index for index, letter in enumerate(self.row_letters)}
+        rows = len(self.row_letters)
+        self.seat_ids: List[List[Optional[int]]] = [[None] * self.width for _ in range(rows)]
+        self.premium_masks: List[int] = [0] * rows
+        self.positions: Dict[int, Tuple[int, int]] = {}
+        for seat_id, row_letter, number, is_premium in seats:
+            row, position = row_index[row_letter], number - 1
+            self.seat_ids[row][position] = seat_id
+            self.positions[seat_id] = (row, position)
+            if is_premium:
+                self.premium_masks[row] |= 1 << position
+
+        self.scores: List[List[float]] = [
+            [seat_quality(row, position, rows, self.width) for position in range(self.width)]
+            for row in range(rows)
+        ]
+        # Sumas prefijas por fila: puntaje de cualquier bloque en O(1)
+        self._prefix: List[List[float]] = []
+        for row_scores in self.scores:
+            prefix = [0.0]
+            for score in row_scores:
+                prefix.append(prefix[-1] + score)
+            self._prefix.append(prefix)
+
+        self._rankings: Dict[int, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def block_score(self, row: int, start: int, count: int) -> float:
+        """Puntaje total del bloque [start, start + count) de una fila"""
+        prefix = self._prefix[row]
+        return prefix[start + count] - prefix[start]
+
+    def ranking(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Bloques (fila, inicio) de tamaño count ordenados del mejor al peor.
+        Se calcula una vez por tamaño; los empates favorecen filas delanteras
+        y posiciones a la izquierda.
+        """
+        ranking = self._rankings.get(count)
+        if ranking is None:
+            with self._lock:
+                ranking = self._rankings.get(count)
+                if ranking is None:
+                    blocks = [
+                        (row, start)
+                        for row in range(len(self.row_letters))
+                        for start in range(self.width - count + 1)
+                    ]
+                    blocks.sort(key=lambda block: -self.block_score(block[0], block[1], count))
+                    ranking = self._rankings[count] = blocks
+        return ranking
+
+    def availability(self, seat_ids: Iterable[int]) -> List[int]:
+        """
+        Construye el mapa de disponibilidad (un entero por fila) desde IDs libres.
+        Los IDs que no pertenecen a la función se ignoran.
+        """
+        bitmap = [0] * len(self.row_letters)
+        positions = self.positions
+        for seat_id in seat_ids:
+            location = positions.get(seat_id)
+            if location is not None:
+                bitmap[location[0]] |= 1 << location[1]
+        return bitmap
+
+    def _candidate_rows(self, bitmap: Sequence[int], premium_only: bool) -> List[int]:
+        """Disponibilidad efectiva por fila (opcionalmente solo asientos premium)"""
+        if premium_only:
+            return [bits & mask for bits, mask in zip(bitmap, self.premium_masks)]
+        return list(bitmap)
+
+    def best_block(self, bitmap: Sequence[int], count: int, premium_only: bool = False) -> Optional[List[int]]:
+        """
+        Mejor bloque de count asientos contiguos libres en una misma fila.
+
+        Args:
+            bitmap: Disponibilidad por fila (availability)
+            count: Cantidad de asientos
+            premium_only: Si True, solo considera asientos premium
+
+        Returns:
+            Optional[List[int]]: IDs del bloque de izquierda a derecha, None si no hay
+        """
+        if count < 1 or count > self.width:
+            return None
+
+        # starts[fila] tiene el bit i encendido si los asientos i..i+count-1 están libres
+        starts = []
+        for bits in self._candidate_rows(bitmap, premium_only):
+            run = bits
+            for shift in range(1, count):
+                if not run:
+                    break
+                run &= bits >> shift
+            starts.append(run)
+        if not any(starts):
+            return None
+
+        for row, start in self.ranking(count):
+            if starts[row] >> start & 1:
+                return self.seat_ids[row][start:start + count]
+        return None
+
+    def best_seats(self, bitmap: Sequence[int], count: int, premium_only: bool = False) -> List[int]:
+        """
+        Mejores count asientos libres individuales (sin garantía de adyacencia).
+
+        Returns:
+            List[int]: IDs ordenados por calidad (puede haber menos que count)
+        """
+        selected = []
+        rows = self._candidate_rows(bitmap, premium_only)
+        for row, position in self.ranking(1):
+            if rows[row] >> position & 1:
+                selected.append(self.seat_ids[row][position])
+                if len(selected) == count:
+                    break
+        return selected
+
+
+class SeatLayoutRegistry:
+    """
+    Layouts por función. Los asientos de una función no cambian una vez
+    creada (create_showtime), así que cada layout se construye una sola vez.
+    """
+
+    def __init__(self):
+        self._layouts: Dict[int, SeatLayout] = {}
+        self._lock = threading.Lock()
+
+    def get(self, showtime_id: int) -> Optional[SeatLayout]:
+        """Layout de la función si ya fue construido"""
+        return self._layouts.get(showtime_id)
+
+    def store(self, layout: SeatLayout) -> SeatLayout:
+        """Registra un layout (si otro hilo ganó la carrera, conserva el existente)"""
+        with self._lock:
+            current = self._layouts.setdefault(layout.showtime_id, layout)
+        if current is layout:
+            logger.info("🗺️ Layout de la función %s: %s asientos en %s filas",
+                        layout.showtime_id, len(layout), len(layout.row_letters))
+        return current
+
+    def invalidate(self, showtime_id: Optional[int] = None) -> None:
+        """Descarta el layout de una función (o todos)"""
+        with self._lock:
+            if showtime_id is None:
+                self._layouts.clear()
+            else:
+                self._layouts.pop(showtime_id, None)
+
+
+# Instancia global por proceso
+seat_layouts = SeatLayoutRegistry()
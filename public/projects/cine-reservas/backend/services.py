@@ -1,203 +1,955 @@
 """
 Servicios de lógica de negocio para el sistema de reservas.
-Contiene funciones para manejar reservas, premium, combos y simulación de bot.
+Contiene funciones para manejar reservas, premium y simulación de bot
+(los combos y precios viven en catalog.py).
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from models import User, Seat, Reservation
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy import Integer, String, and_, delete, exists, func, literal, or_, select, update
+from models import User, Seat, Reservation, SeatHold, Showtime, Auditorium
 from schemas import ReservationCreate, PremiumUpgrade
-from typing import List, Dict, Optional, Tuple
+from cache import record_seat_changes_on_commit, invalidate_user_on_commit, has_pending_seat_changes
+from metrics import BOOKING_CONFLICTS
+from catalog import combo_catalog, BASE_SEAT_PRICE, PREMIUM_SEAT_PRICE, PREMIUM_DISCOUNT
+from seat_finder import SeatLayout, seat_layouts
+from availability import SeatAvailability, availability_index, SEAT_HOLD_TTL_SECONDS
+from typing import List, Dict, Optional, Sequence, Tuple
+import os
 import random
+import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from operator import attrgetter
 
 # Configuración del logger
 logger = logging.getLogger(__name__)
 
-# Configuración de combos disponibles
-REGULAR_COMBOS = [
-    {"name": "Combo Clásico", "description": "Popcorn mediano + Bebida mediana", "price": 12.99},
-    {"name": "Combo Familiar", "description": "Popcorn grande + 2 Bebidas grandes", "price": 19.99},
-    {"name": "Combo Dulce", "description": "Nachos + Bebida + Dulces", "price": 15.99},
-    {"name": "Solo Bebida", "description": "Bebida grande de tu preferencia", "price": 4.99},
-    {"name": "Solo Popcorn", "description": "Popcorn grande con mantequilla", "price": 8.99},
-]
+# Límite de asientos reservados por usuario en cada función
+MAX_SEATS_PER_USER = 6
 
-PREMIUM_COMBOS = [
-    {"name": "Combo VIP", "description": "Popcorn gourmet + Bebida premium + Snacks selectos", "price": 24.99},
-    {"name": "Combo Ejecutivo", "description": "Bandeja de sushi + Sake + Postre", "price": 34.99},
-    {"name": "Combo Premium", "description": "Todo incluido + servicio a la butaca", "price": 42.99},
-]
+# Función usada cuando el cliente no indica una (datos iniciales de init.sql)
+DEFAULT_SHOWTIME_ID = int(os.getenv("DEFAULT_SHOWTIME_ID", "1"))
 
-# Precios base
-BASE_SEAT_PRICE = 10.99
-PREMIUM_SEAT_PRICE = 16.99
-PREMIUM_DISCOUNT = 0.15  # 15% de descuento para usuarios premium
+# Funciones por página en el listado (y máximo que puede pedir un cliente)
+SHOWTIMES_PAGE_SIZE = int(os.getenv("SHOWTIMES_PAGE_SIZE", "50"))
+SHOWTIMES_MAX_PAGE_SIZE = 200
+
+# Reintentos de la auto-selección cuando otro usuario toma el bloque elegido
+AUTO_PICK_ATTEMPTS = 3
+
+# Tipo de asiento de una reserva: filas de la proyección de resumen o Reservation con su asiento
+_ROW_SEAT_IS_PREMIUM = attrgetter("is_premium")
+_ORM_SEAT_IS_PREMIUM = attrgetter("seat.is_premium")
+
+
+def _seat_change(seat, status: str) -> Dict:
+    """
+    Representa el nuevo estado de un asiento para el registro de cambios.
+    Acepta un Seat o una fila con las mismas columnas (id, showtime_id, row_letter,
+    number, is_premium).
+    """
+    return {
+        "id": seat.id,
+        "showtime_id": seat.showtime_id,
+        "row_letter": seat.row_letter,
+        "number": seat.number,
+        "status": status,
+        "is_premium": seat.is_premium,
+        "seat_name": f"{seat.row_letter}{seat.number}"
+    }
 
 
 class ReservationService:
-    """Servicio para manejo de reservas de asientos"""
+    """
+    Servicio para manejo de reservas de asientos.
+    Todas las operaciones se limitan al inventario de una función (showtime_id).
+    """
+
+    @staticmethod
+    def get_showtimes(db: Session, starts_from: Optional[datetime] = None, starts_until: Optional[datetime] = None,
+                      limit: int = SHOWTIMES_PAGE_SIZE, offset: int = 0) -> List[Row]:
+        """
+        Obtiene una página de funciones con su sala y cantidad de asientos disponibles.
+        La página se elige primero (índice por starts_at) y los asientos
+        disponibles se cuentan solo para las funciones de esa página.
+        
+        Args:
+            db: Sesión de base de datos
+            starts_from: Inicio mínimo (por defecto, ahora)
+            starts_until: Inicio máximo (opcional)
+            limit: Tamaño de la página
+            offset: Funciones a saltar
+            
+        Returns:
+            List[Row]: Funciones (id, movie_title, starts_at, auditorium_id,
+            auditorium_name, available_seats) ordenadas por inicio
+        """
+        window = [Showtime.starts_at >= (starts_from or datetime.utcnow())]
+        if starts_until is not None:
+            window.append(Showtime.starts_at < starts_until)
+        
+        page = select(Showtime.id).where(*window).order_by(
+            Showtime.starts_at, Showtime.id
+        ).limit(limit).offset(offset).subquery("page")
+        
+        available = select(func.count(Seat.id)).where(
+            Seat.showtime_id == Showtime.id,
+            Seat.status == "available"
+        ).scalar_subquery()
+        
+        return db.execute(
+            select(
+                Showtime.id,
+                Showtime.movie_title,
+                Showtime.starts_at,
+                Showtime.auditorium_id,
+                Auditorium.name.label("auditorium_name"),
+                available.label("available_seats")
+            ).join(page, page.c.id == Showtime.id)
+            .join(Auditorium, Auditorium.id == Showtime.auditorium_id)
+            .order_by(Showtime.starts_at, Showtime.id)
+        ).all()
 
     @staticmethod
-    def get_all_seats(db: Session) -> List[Seat]:
+    def get_all_seats(db: Session, showtime_id: int) -> List[Seat]:
         """
-        Obtiene todos los asientos con su estado actual.
+        Obtiene todos los asientos de una función con su estado actual.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
             
         Returns:
             List[Seat]: Lista de todos los asientos
         """
         try:
-            seats = db.query(Seat).order_by(Seat.row_letter, Seat.number).all()
-            logger.info(f"📋 Consultando {len(seats)} asientos del cine")
+            seats = db.query(Seat).filter(
+                Seat.showtime_id == showtime_id
+            ).order_by(Seat.row_letter, Seat.number).all()
+            logger.info("📋 Consultando %s asientos del cine", len(seats))
             return seats
         except Exception as e:
-            logger.error(f"Error obteniendo asientos: {e}")
+            logger.error("Error obteniendo asientos: %s", e)
             return []
 
     @staticmethod
-    def get_available_seats(db: Session, premium_only: bool = False) -> List[Seat]:
+    def get_seats_with_reservation_flag(db: Session, showtime_id: int) -> List[Tuple[Seat, bool, Optional[datetime]]]:
+        """
+        Obtiene los asientos de una función junto con un indicador de reserva
+        activa y la expiración de su bloqueo temporal vigente, si lo tiene.
+        Usa LEFT JOINs contra reservations y seat_holds en lugar de una consulta
+        por asiento, por lo que el costo no crece con el tamaño de la sala.
+
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+
+        Returns:
+            List[Tuple[Seat, bool, Optional[datetime]]]: Tuplas (asiento, tiene_reserva, bloqueado_hasta)
+            ordenadas por fila y número
         """
-        Obtiene asientos disponibles para reserva.
+        try:
+            now = datetime.utcnow()
+            rows = db.query(
+                Seat,
+                Reservation.id.isnot(None).label("has_reservation"),
+                SeatHold.expires_at
+            ).outerjoin(
+                Reservation, Reservation.seat_id == Seat.id
+            ).outerjoin(
+                SeatHold, and_(SeatHold.seat_id == Seat.id, SeatHold.expires_at > now)
+            ).filter(
+                Seat.showtime_id == showtime_id
+            ).order_by(Seat.row_letter, Seat.number).all()
+
+            logger.info("📋 Consultando %s asientos del cine (consulta única)", len(rows))
+            return [(seat, bool(has_reservation), held_until) for seat, has_reservation, held_until in rows]
+        except Exception as e:
+            logger.error("Error obteniendo asientos con reservas: %s", e)
+            return []
+
+    @staticmethod
+    def get_available_seats(db: Session, showtime_id: int, premium_only: bool = False) -> List[Seat]:
+        """
+        Obtiene asientos disponibles para reserva en una función (sin bloqueo
+        temporal vigente). Se leen del índice de disponibilidad: los Seat
+        devueltos son transitorios, no se cargan desde la base de datos.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
             premium_only: Si True, solo devuelve asientos premium
             
         Returns:
-            List[Seat]: Lista de asientos disponibles
+            List[Seat]: Lista de asientos disponibles ordenados por fila y número
         """
-        query = db.query(Seat).filter(Seat.status == "available")
+        availability = ReservationService.get_seat_availability(db, showtime_id)
+        if availability is None:
+            return []
         
-        if premium_only:
-            query = query.filter(Seat.is_premium == True)
-            
-        seats = query.order_by(Seat.row_letter, Seat.number).all()
-        logger.info(f"✅ {len(seats)} asientos disponibles {'premium' if premium_only else ''}")
+        layout = availability.layout
+        seats = []
+        for seat_id in availability.available_ids(premium_only):
+            row, position = layout.positions[seat_id]
+            seats.append(Seat(
+                id=seat_id, showtime_id=showtime_id, row_letter=layout.row_letters[row], number=position + 1,
+                is_premium=bool(layout.premium_masks[row] >> position & 1), status="available"
+            ))
+        logger.info("✅ %s asientos disponibles %s", len(seats), 'premium' if premium_only else '')
         return seats
 
     @staticmethod
-    def reserve_seats(db: Session, user: User, seat_ids: List[int], combo: Optional[str] = None) -> Tuple[bool, str, List[Reservation]]:
+    def get_seat_layout(db: Session, showtime_id: int) -> Optional[SeatLayout]:
+        """
+        Obtiene el layout de asientos de una función (se construye una vez por proceso).
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            
+        Returns:
+            Optional[SeatLayout]: Layout con puntajes de calidad, None si la función no tiene asientos
+        """
+        layout = seat_layouts.get(showtime_id)
+        if layout is None:
+            seats = db.execute(
+                select(Seat.id, Seat.row_letter, Seat.number, Seat.is_premium).where(Seat.showtime_id == showtime_id)
+            ).all()
+            if not seats:
+                return None
+            layout = seat_layouts.store(SeatLayout(showtime_id, seats))
+        return layout
+
+    @staticmethod
+    def get_seat_availability(db: Session, showtime_id: int) -> Optional[SeatAvailability]:
+        """
+        Obtiene el índice de disponibilidad de una función. Si no refleja la
+        versión vigente del mapa de asientos, lo reconstruye con una consulta
+        de IDs y bloqueos (sin cargar objetos Seat).
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            
+        Returns:
+            Optional[SeatAvailability]: Índice vigente, None si la función no tiene asientos
+        """
+        availability = availability_index.get(showtime_id)
+        if availability is not None:
+            return availability
+        
+        layout = ReservationService.get_seat_layout(db, showtime_id)
+        if layout is None:
+            return None
+        
+        # Leer la versión antes de consultar para no guardar datos viejos
+        version = availability_index.current_version(showtime_id)
+        now = datetime.utcnow()
+        rows = db.execute(
+            select(Seat.id, SeatHold.expires_at).outerjoin(
+                SeatHold, and_(SeatHold.seat_id == Seat.id, SeatHold.expires_at > now)
+            ).where(Seat.showtime_id == showtime_id, Seat.status == "available")
+        ).all()
+        
+        # Vencimientos de bloqueos como epoch (misma conversión que la grilla)
+        epoch_now = time.time()
+        seats = [
+            (seat_id, None if expires_at is None else epoch_now + (expires_at - now).total_seconds())
+            for seat_id, expires_at in rows
+        ]
+        availability = SeatAvailability(layout, version, seats)
+        if has_pending_seat_changes(db):
+            # Incluye cambios sin confirmar de esta transacción: no compartirlo
+            return availability
+        return availability_index.store(availability)
+
+    @staticmethod
+    def find_best_seats(db: Session, showtime_id: int, count: int, premium_only: bool = False) -> Optional[List[int]]:
         """
-        Reserva asientos para un usuario.
+        Busca el mejor bloque de asientos contiguos libres de una función.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
+            count: Cantidad de asientos juntos
+            premium_only: Si True, solo considera asientos premium
+            
+        Returns:
+            Optional[List[int]]: IDs del bloque, None si no hay uno libre
+        """
+        availability = ReservationService.get_seat_availability(db, showtime_id)
+        if availability is None:
+            return None
+        return availability.layout.best_block(availability.rows(), count, premium_only)
+
+    @staticmethod
+    def auto_reserve_seats(db: Session, showtime_id: int, user: User, count: int,
+                           combo: Optional[str] = None) -> Tuple[bool, str, List[Row]]:
+        """
+        Elige y reserva el mejor bloque de asientos contiguos para el usuario.
+        
+        Si otro usuario toma el bloque entre la búsqueda y la reserva, vuelve a
+        buscar con la disponibilidad actualizada (hasta AUTO_PICK_ATTEMPTS veces).
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario que realiza la reserva
+            count: Cantidad de asientos juntos
+            combo: Combo seleccionado (opcional)
+            
+        Returns:
+            Tuple[bool, str, List[Row]]: Igual que reserve_seats
+        """
+        previous_block = None
+        message = f"No hay {count} asientos contiguos disponibles"
+        for _ in range(AUTO_PICK_ATTEMPTS):
+            block = ReservationService.find_best_seats(db, showtime_id, count)
+            if block is None:
+                return False, f"No hay {count} asientos contiguos disponibles", []
+            if block == previous_block:
+                # La disponibilidad no cambió: el fallo no fue una carrera
+                break
+            
+            success, message, reservations = ReservationService.reserve_seats(db, showtime_id, user, block, combo)
+            if success:
+                return True, message, reservations
+            # El índice pudo no haber recibido aún un cambio de otro worker: releer
+            availability_index.invalidate(showtime_id)
+            previous_block = block
+        
+        return False, message, []
+
+    @staticmethod
+    def _lock_user_reservation_count(db: Session, showtime_id: int, user: User) -> Optional[int]:
+        """
+        Bloquea la fila del usuario (FOR UPDATE) y cuenta sus reservas en la función.
+        Serializa las reservas concurrentes de un mismo usuario para que el
+        límite de asientos se respete dentro de la transacción.
+        
+        Returns:
+            Optional[int]: Reservas actuales del usuario, None si el usuario no existe
+        """
+        reservation_count = select(func.count(Reservation.id)).where(
+            Reservation.showtime_id == showtime_id,
+            Reservation.user_id == User.id
+        ).scalar_subquery()
+        
+        return db.execute(
+            select(reservation_count).where(User.id == user.id).with_for_update(of=User)
+        ).scalar()
+
+    @staticmethod
+    def _reservation_columns(user_id) -> List:
+        """
+        Columnas de la proyección de reservas (reserva + asiento) usada por los
+        resúmenes: id, user_id, showtime_id, seat_id, combo, created_at,
+        row_letter, number, status, is_premium.
+        
+        Args:
+            user_id: Columna de la que se toma user_id (User.id al bloquear al usuario)
+        """
+        return [
+            Reservation.id,
+            user_id.label("user_id"),
+            Reservation.showtime_id,
+            Reservation.seat_id,
+            Reservation.combo,
+            Reservation.created_at,
+            Seat.row_letter,
+            Seat.number,
+            Seat.status,
+            Seat.is_premium
+        ]
+
+    @staticmethod
+    def _lock_user_reservations(db: Session, showtime_id: int, user: User) -> Optional[List[Row]]:
+        """
+        Bloquea la fila del usuario (FOR UPDATE) y obtiene en la misma consulta
+        sus reservas en la función con las columnas de cada asiento.
+        
+        Returns:
+            Optional[List[Row]]: Reservas actuales (proyección de resumen),
+            None si el usuario no existe
+        """
+        rows = db.execute(
+            select(*ReservationService._reservation_columns(User.id))
+            .select_from(User)
+            .outerjoin(Reservation, and_(
+                Reservation.user_id == User.id,
+                Reservation.showtime_id == showtime_id
+            ))
+            .outerjoin(Seat, Seat.id == Reservation.seat_id)
+            .where(User.id == user.id)
+            .order_by(Reservation.id)
+            .with_for_update(of=User)
+        ).all()
+        
+        if not rows:
+            return None
+        return [row for row in rows if row.id is not None]
+
+    @staticmethod
+    def _claim_seats(db: Session, showtime_id: int, user: User, seat_ids: List[int],
+                     combo: Optional[str] = None, require_hold: bool = False) -> List[Row]:
+        """
+        Reclama asientos en una sola sentencia: bloquea en orden de ID los que
+        siguen disponibles, los marca como reservados e inserta sus reservas (CTE).
+        Los asientos ya tomados por otra transacción, bloqueados temporalmente
+        por otro usuario o de otra función simplemente no aparecen en el
+        resultado. No hace commit.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario que realiza la reserva
+            seat_ids: IDs de asientos a reclamar
+            combo: Combo seleccionado (opcional)
+            require_hold: Si True, solo reclama asientos con un bloqueo vigente del usuario
+            
+        Returns:
+            List[Row]: Reservas creadas (misma proyección que _reservation_columns)
+        """
+        now = datetime.utcnow()
+        held_by_other = exists().where(
+            SeatHold.seat_id == Seat.id,
+            SeatHold.user_id != user.id,
+            SeatHold.expires_at > now
+        )
+        conditions = [
+            Seat.showtime_id == showtime_id,
+            Seat.id.in_(seat_ids),
+            Seat.status == "available",
+            ~held_by_other
+        ]
+        if require_hold:
+            conditions.append(exists().where(
+                SeatHold.seat_id == Seat.id,
+                SeatHold.user_id == user.id,
+                SeatHold.expires_at > now
+            ))
+        
+        # Bloqueo en orden de ID para evitar deadlocks entre reservas multi-asiento
+        claimable = select(Seat.id).where(*conditions).order_by(Seat.id).with_for_update(of=Seat)
+        
+        claimed = update(Seat).where(
+            Seat.id.in_(claimable),
+            Seat.status == "available"
+        ).values(status="reserved").returning(
+            Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium
+        ).cte("claimed")
+        
+        inserted = pg_insert(Reservation).from_select(
+            ["user_id", "showtime_id", "seat_id", "combo"],
+            select(literal(user.id, Integer), claimed.c.showtime_id, claimed.c.id, literal(combo, String))
+        ).on_conflict_do_nothing(index_elements=["seat_id"]).returning(
+            Reservation.id, Reservation.seat_id, Reservation.combo, Reservation.created_at
+        ).cte("inserted")
+        
+        rows = db.execute(
+            select(
+                inserted.c.id,
+                literal(user.id, Integer).label("user_id"),
+                claimed.c.showtime_id,
+                inserted.c.seat_id,
+                inserted.c.combo,
+                inserted.c.created_at,
+                claimed.c.row_letter,
+                claimed.c.number,
+                literal("reserved", String).label("status"),
+                claimed.c.is_premium
+            ).join(claimed, claimed.c.id == inserted.c.seat_id).order_by(inserted.c.seat_id)
+        ).all()
+        
+        return rows
+
+    @staticmethod
+    def _sync_loaded_seats(db: Session, seat_ids: List[int], status: str) -> None:
+        """
+        Actualiza el estado de los Seat ya cargados en la sesión tras una
+        sentencia masiva, sin marcarlos como modificados.
+        """
+        for seat_id in seat_ids:
+            seat = db.identity_map.get(Session.identity_key(Seat, seat_id))
+            if seat is not None:
+                set_committed_value(seat, "status", status)
+
+    @staticmethod
+    def reserve_seats(db: Session, showtime_id: int, user: User, seat_ids: List[int],
+                      combo: Optional[str] = None, require_hold: bool = False) -> Tuple[bool, str, List[Row]]:
+        """
+        Reserva asientos de una función para un usuario de forma atómica.
+        
+        Todos los asientos se reclaman en una única sentencia condicional y el
+        límite de asientos por usuario y función se verifica en la misma transacción.
+        Si algún asiento fue tomado por otro usuario, no se reserva ninguno.
+        Los bloqueos temporales del usuario sobre esos asientos se consumen.
+        Las reservas previas del usuario se leen al bloquear su fila, por lo que
+        el resultado sirve para armar el resumen sin volver a consultar.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
             user: Usuario que realiza la reserva
             seat_ids: Lista de IDs de asientos a reservar
             combo: Combo seleccionado (opcional)
+            require_hold: Si True, exige un bloqueo vigente del usuario en cada asiento
             
         Returns:
-            Tuple[bool, str, List[Reservation]]: (éxito, mensaje, reservas creadas)
+            Tuple[bool, str, List[Row]]: (éxito, mensaje, reservas vigentes del usuario
+            en la función con datos del asiento: las previas seguidas de las nuevas)
         """
         try:
-            # Verificar que los asientos existen y están disponibles
-            seats = db.query(Seat).filter(
-                and_(
-                    Seat.id.in_(seat_ids),
-                    Seat.status == "available"
-                )
-            ).all()
+            # Verificar límite de reservas por usuario (bloqueando su fila)
+            existing_reservations = ReservationService._lock_user_reservations(db, showtime_id, user)
+            if existing_reservations is None:
+                db.rollback()
+                return False, "Usuario no encontrado", []
+            
+            if len(existing_reservations) + len(seat_ids) > MAX_SEATS_PER_USER:
+                db.rollback()
+                return False, f"Límite de reservas excedido. Máximo {MAX_SEATS_PER_USER} asientos por usuario", []
             
-            if len(seats) != len(seat_ids):
-                unavailable_ids = set(seat_ids) - {seat.id for seat in seats}
+            # Reclamar todos los asientos en una sola sentencia
+            claimed = ReservationService._claim_seats(db, showtime_id, user, seat_ids, combo, require_hold)
+            
+            if len(claimed) != len(seat_ids):
+                db.rollback()
+                unavailable_ids = set(seat_ids) - {row.seat_id for row in claimed}
+                logger.info("⚔️ Conflicto de reserva para %s: asientos %s ya tomados", user.username, sorted(unavailable_ids))
+                BOOKING_CONFLICTS.inc(1, "confirm" if require_hold else "book")
+                if require_hold:
+                    return False, f"Bloqueo expirado o asientos no disponibles: {unavailable_ids}", []
                 return False, f"Asientos no disponibles: {unavailable_ids}", []
             
-            # Verificar límite de reservas por usuario (máximo 6 asientos)
-            existing_reservations = db.query(Reservation).filter(Reservation.user_id == user.id).count()
-            if existing_reservations + len(seat_ids) > 6:
-                return False, f"Límite de reservas excedido. Máximo 6 asientos por usuario", []
-            
-            # Crear las reservas
-            new_reservations = []
-            for seat in seats:
-                reservation = Reservation(
-                    user_id=user.id,
-                    seat_id=seat.id,
-                    combo=combo
-                )
-                db.add(reservation)
-                new_reservations.append(reservation)
-                
-                # Actualizar estado del asiento
-                seat.status = "reserved"
+            # Los bloqueos del usuario sobre los asientos reservados ya no son necesarios
+            db.execute(delete(SeatHold).where(
+                SeatHold.user_id == user.id,
+                SeatHold.seat_id.in_(seat_ids)
+            ))
             
+            record_seat_changes_on_commit(db, [
+                _seat_change(ReservationService._claimed_seat(row), "reserved") for row in claimed
+            ])
             db.commit()
+            ReservationService._sync_loaded_seats(db, [row.seat_id for row in claimed], "reserved")
             
             # Log de la acción
-            seat_names = [seat.seat_name for seat in seats]
-            logger.info(f"🎫 Usuario {user.username} reservó asientos: {seat_names} {f'con combo: {combo}' if combo else ''}")
+            seat_names = [f"{row.row_letter}{row.number}" for row in claimed]
+            logger.info("🎫 Usuario %s reservó asientos: %s %s", user.username, seat_names, f'con combo: {combo}' if combo else '')
             
-            return True, f"Reserva exitosa de {len(seats)} asientos", new_reservations
+            return True, f"Reserva exitosa de {len(claimed)} asientos", existing_reservations + claimed
             
         except Exception as e:
             db.rollback()
-            logger.error(f"Error en reserva de asientos: {e}")
+            logger.error("Error en reserva de asientos: %s", e)
             return False, f"Error interno: {str(e)}", []
 
     @staticmethod
-    def cancel_reservation(db: Session, user: User, seat_id: int) -> Tuple[bool, str]:
+    def _claimed_seat(row: Row) -> Seat:
+        """Construye un Seat transitorio (no agregado a la sesión) desde una fila reclamada"""
+        return Seat(id=row.seat_id, showtime_id=row.showtime_id, row_letter=row.row_letter,
+                    number=row.number, is_premium=row.is_premium, status="reserved")
+
+    @staticmethod
+    def hold_seats(db: Session, showtime_id: int, user: User, seat_ids: List[int]) -> Tuple[bool, str, Optional[datetime]]:
+        """
+        Bloquea temporalmente asientos para el usuario mientras completa el checkout.
+        
+        El bloqueo reemplaza la selección anterior del usuario en la función y se adquiere con
+        un único INSERT ... ON CONFLICT: un asiento se toma solo si está disponible
+        y no tiene un bloqueo vigente de otro usuario (los vencidos se sobrescriben).
+        Si algún asiento no puede bloquearse, no se bloquea ninguno.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario que bloquea los asientos
+            seat_ids: IDs de asientos a bloquear
+            
+        Returns:
+            Tuple[bool, str, Optional[datetime]]: (éxito, mensaje, expiración del bloqueo)
+        """
+        try:
+            existing_reservations = ReservationService._lock_user_reservation_count(db, showtime_id, user)
+            if existing_reservations is None:
+                db.rollback()
+                return False, "Usuario no encontrado", None
+            
+            if existing_reservations + len(seat_ids) > MAX_SEATS_PER_USER:
+                db.rollback()
+                return False, f"Límite de reservas excedido. Máximo {MAX_SEATS_PER_USER} asientos por usuario", None
+            
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=SEAT_HOLD_TTL_SECONDS)
+            
+            # Soltar los bloqueos anteriores del usuario que ya no forman parte de la selección
+            released = ReservationService._delete_holds(
+                db, showtime_id, user, SeatHold.seat_id.notin_(seat_ids)
+            )
+            
+            candidates = select(
+                Seat.id, literal(user.id, Integer), literal(expires_at)
+            ).where(
+                Seat.showtime_id == showtime_id,
+                Seat.id.in_(seat_ids),
+                Seat.status == "available"
+            ).order_by(Seat.id)
+            
+            stmt = pg_insert(SeatHold).from_select(["seat_id", "user_id", "expires_at"], candidates)
+            held_ids = db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["seat_id"],
+                    set_={"user_id": stmt.excluded.user_id, "expires_at": stmt.excluded.expires_at},
+                    where=or_(SeatHold.expires_at <= now, SeatHold.user_id == stmt.excluded.user_id)
+                ).returning(SeatHold.seat_id)
+            ).scalars().all()
+            
+            if len(held_ids) != len(seat_ids):
+                db.rollback()
+                BOOKING_CONFLICTS.inc(1, "hold")
+                unavailable_ids = set(seat_ids) - set(held_ids)
+                return False, f"Asientos no disponibles: {unavailable_ids}", None
+            
+            held_seats = db.execute(
+                select(Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium)
+                .where(Seat.id.in_(held_ids))
+            ).all()
+            record_seat_changes_on_commit(
+                db,
+                [_seat_change(seat, "available") for seat in released]
+                + [_seat_change(seat, "held") for seat in held_seats]
+            )
+            db.commit()
+            
+            logger.info("⏳ Usuario %s bloqueó %s asientos por %ss", user.username, len(held_ids), SEAT_HOLD_TTL_SECONDS)
+            return True, f"{len(held_ids)} asientos bloqueados por {SEAT_HOLD_TTL_SECONDS} segundos", expires_at
+            
+        except Exception as e:
+            db.rollback()
+            logger.error("Error bloqueando asientos: %s", e)
+            return False, f"Error interno: {str(e)}", None
+
+    @staticmethod
+    def release_holds(db: Session, showtime_id: int, user: User) -> Tuple[bool, str, int]:
+        """
+        Libera todos los bloqueos temporales del usuario en una función.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario cuyos bloqueos se liberan
+            
+        Returns:
+            Tuple[bool, str, int]: (éxito, mensaje, cantidad de asientos liberados)
+        """
+        try:
+            released = ReservationService._delete_holds(db, showtime_id, user)
+            record_seat_changes_on_commit(db, [_seat_change(seat, "available") for seat in released])
+            db.commit()
+            
+            if released:
+                logger.info("🔓 Usuario %s liberó %s asientos bloqueados", user.username, len(released))
+            return True, f"{len(released)} asientos liberados", len(released)
+            
+        except Exception as e:
+            db.rollback()
+            logger.error("Error liberando bloqueos: %s", e)
+            return False, f"Error interno: {str(e)}", 0
+
+    @staticmethod
+    def _delete_holds(db: Session, showtime_id: int, user: User, *criteria) -> List[Row]:
+        """
+        Elimina bloqueos del usuario en la función (sin commit) y devuelve los
+        asientos de los que seguían vigentes, que son los únicos visibles como bloqueados.
+        """
+        showtime_seats = select(Seat.id).where(Seat.showtime_id == showtime_id)
+        deleted = delete(SeatHold).where(
+            SeatHold.user_id == user.id, SeatHold.seat_id.in_(showtime_seats), *criteria
+        ).returning(SeatHold.seat_id, SeatHold.expires_at).cte("deleted_holds")
+        
+        return db.execute(
+            select(Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium)
+            .join(deleted, deleted.c.seat_id == Seat.id)
+            .where(deleted.c.expires_at > datetime.utcnow(), Seat.status == "available")
+        ).all()
+
+    @staticmethod
+    def _cancel_seats(db: Session, showtime_id: int, user: User, seat_ids: List[int]) -> List[Row]:
+        """
+        Cancela en una sola sentencia las reservas del usuario sobre los asientos
+        indicados y los marca como disponibles (DELETE ... RETURNING + UPDATE).
+        Registra los cambios del mapa, no hace commit.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario propietario de las reservas
+            seat_ids: IDs de asientos a liberar
+            
+        Returns:
+            List[Row]: Asientos liberados (id, showtime_id, row_letter, number, is_premium)
+        """
+        deleted = delete(Reservation).where(
+            Reservation.showtime_id == showtime_id,
+            Reservation.user_id == user.id,
+            Reservation.seat_id.in_(seat_ids)
+        ).returning(Reservation.seat_id).cte("deleted_reservations")
+        
+        released = db.execute(
+            update(Seat)
+            .where(Seat.id == deleted.c.seat_id)
+            .values(status="available")
+            .returning(Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium)
+        ).all()
+        
+        ReservationService._sync_loaded_seats(db, [seat.id for seat in released], "available")
+        record_seat_changes_on_commit(db, [_seat_change(seat, "available") for seat in released])
+        return released
+
+    @staticmethod
+    def cancel_reservations(db: Session, showtime_id: int, user: User, seat_ids: List[int]) -> Tuple[bool, str, List[Row]]:
+        """
+        Cancela varias reservas del usuario en una función, en una sola transacción.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario propietario de las reservas
+            seat_ids: IDs de asientos a cancelar
+            
+        Returns:
+            Tuple[bool, str, List[Row]]: (éxito, mensaje, asientos liberados)
+        """
+        try:
+            released = ReservationService._cancel_seats(db, showtime_id, user, seat_ids)
+            
+            if not released:
+                db.rollback()
+                return False, "Reserva no encontrada", []
+            
+            db.commit()
+            
+            seat_names = [f"{seat.row_letter}{seat.number}" for seat in released]
+            logger.info("❌ Usuario %s canceló reservas de los asientos %s", user.username, seat_names)
+            return True, f"{len(released)} reservas canceladas exitosamente", released
+            
+        except Exception as e:
+            db.rollback()
+            logger.error("Error cancelando reservas: %s", e)
+            return False, f"Error interno: {str(e)}", []
+
+    @staticmethod
+    def cancel_reservation(db: Session, showtime_id: int, user: User, seat_id: int) -> Tuple[bool, str]:
         """
         Cancela una reserva específica del usuario.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
             user: Usuario propietario de la reserva
             seat_id: ID del asiento a cancelar
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
+        success, message, released = ReservationService.cancel_reservations(db, showtime_id, user, [seat_id])
+        
+        if not success:
+            return False, message
+        
+        seat = released[0]
+        return True, f"Reserva del asiento {seat.row_letter}{seat.number} cancelada exitosamente"
+
+    @staticmethod
+    def apply_batch(db: Session, showtime_id: int, user: User, reserve_ids: List[int], cancel_ids: List[int],
+                    combo: Optional[str] = None, atomic: bool = False) -> Tuple[bool, str, List[Dict]]:
+        """
+        Ejecuta cancelaciones y reservas mezcladas de una función en una sola transacción.
+        
+        Primero se cancelan las reservas indicadas (liberando cupo del límite
+        por usuario) y luego se reclaman los asientos a reservar, cada paso con
+        una única sentencia. Cada asiento obtiene su propio resultado.
+        
+        Args:
+            db: Sesión de base de datos
+            showtime_id: ID de la función
+            user: Usuario que realiza las operaciones
+            reserve_ids: IDs de asientos a reservar
+            cancel_ids: IDs de asientos a cancelar
+            combo: Combo para las nuevas reservas (opcional)
+            atomic: Si True, cualquier operación fallida revierte todo el lote
+            
+        Returns:
+            Tuple[bool, str, List[Dict]]: (éxito, mensaje, resultado por asiento
+            con seat_id, operation, success y detail)
+        """
         try:
-            # Buscar la reserva
-            reservation = db.query(Reservation).filter(
-                and_(
-                    Reservation.user_id == user.id,
-                    Reservation.seat_id == seat_id
-                )
-            ).first()
-            
-            if not reservation:
-                return False, "Reserva no encontrada"
-            
-            # Liberar asiento
-            seat = reservation.seat
-            seat.status = "available"
-            
-            # Eliminar reserva
-            db.delete(reservation)
+            results: List[Dict] = []
+            
+            # Bloquear la fila del usuario antes de tocar sus reservas
+            existing_reservations = ReservationService._lock_user_reservation_count(db, showtime_id, user)
+            if existing_reservations is None:
+                db.rollback()
+                return False, "Usuario no encontrado", []
+            
+            released_ids = set()
+            if cancel_ids:
+                released_ids = {seat.id for seat in ReservationService._cancel_seats(db, showtime_id, user, cancel_ids)}
+            for seat_id in cancel_ids:
+                cancelled = seat_id in released_ids
+                results.append({
+                    "seat_id": seat_id,
+                    "operation": "cancel",
+                    "success": cancelled,
+                    "detail": "Reserva cancelada" if cancelled else "Reserva no encontrada"
+                })
+            
+            claimed_ids = set()
+            if reserve_ids:
+                remaining = existing_reservations - len(released_ids)
+                if remaining + len(reserve_ids) > MAX_SEATS_PER_USER:
+                    reserve_detail = f"Límite de reservas excedido. Máximo {MAX_SEATS_PER_USER} asientos por usuario"
+                else:
+                    claimed = ReservationService._claim_seats(db, showtime_id, user, reserve_ids, combo)
+                    claimed_ids = {row.seat_id for row in claimed}
+                    if len(claimed_ids) != len(reserve_ids):
+                        BOOKING_CONFLICTS.inc(1, "batch")
+                    reserve_detail = "Asiento no disponible"
+                    if claimed:
+                        db.execute(delete(SeatHold).where(
+                            SeatHold.user_id == user.id,
+                            SeatHold.seat_id.in_(claimed_ids)
+                        ))
+                        record_seat_changes_on_commit(db, [
+                            _seat_change(ReservationService._claimed_seat(row), "reserved") for row in claimed
+                        ])
+                for seat_id in reserve_ids:
+                    reserved = seat_id in claimed_ids
+                    results.append({
+                        "seat_id": seat_id,
+                        "operation": "reserve",
+                        "success": reserved,
+                        "detail": "Asiento reservado" if reserved else reserve_detail
+                    })
+            
+            failed = sum(1 for result in results if not result["success"])
+            if atomic and failed:
+                db.rollback()
+                for result in results:
+                    if result["success"]:
+                        result["success"] = False
+                        result["detail"] = "Revertido: otra operación del lote falló"
+                return False, f"Lote revertido: {failed} operaciones fallidas", results
+            
             db.commit()
+            ReservationService._sync_loaded_seats(db, list(claimed_ids), "reserved")
             
-            logger.info(f"❌ Usuario {user.username} canceló reserva del asiento {seat.seat_name}")
-            return True, f"Reserva del asiento {seat.seat_name} cancelada exitosamente"
+            logger.info("📦 Lote de %s: %s reservados, %s liberados, %s fallidos", user.username, len(claimed_ids), len(released_ids), failed)
+            return failed == 0, f"{len(claimed_ids)} asientos reservados, {len(released_ids)} liberados", results
             
         except Exception as e:
             db.rollback()
-            logger.error(f"Error cancelando reserva: {e}")
-            return False, f"Error interno: {str(e)}"
+            logger.error("Error en lote de reservas: %s", e)
+            return False, f"Error interno: {str(e)}", []
 
     @staticmethod
-    def get_user_reservations(db: Session, user: User) -> List[Reservation]:
+    def release_user_seats(db: Session, user: User) -> int:
         """
-        Obtiene todas las reservas activas de un usuario.
+        Marca como disponibles los asientos reservados por un usuario en todas las funciones
+        y elimina sus bloqueos temporales.
+        Se usa antes de eliminar al usuario (sus reservas caen por CASCADE),
+        para que seats.status nunca quede desincronizado con reservations y los
+        asientos que tenía bloqueados se publiquen como disponibles.
+        No hace commit: forma parte de la transacción del llamador.
+        
+        Args:
+            db: Sesión de base de datos
+            user: Usuario cuyos asientos se liberan
+            
+        Returns:
+            int: Cantidad de asientos liberados
+        """
+        user_seat_ids = select(Reservation.seat_id).where(Reservation.user_id == user.id)
+        released_seats = db.execute(
+            update(Seat)
+            .where(Seat.id.in_(user_seat_ids))
+            .values(status="available")
+            .returning(Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium)
+            .execution_options(synchronize_session=False)
+        ).all()
+        released = len(released_seats)
+        
+        deleted_holds = delete(SeatHold).where(SeatHold.user_id == user.id).returning(
+            SeatHold.seat_id, SeatHold.expires_at
+        ).cte("deleted_holds")
+        unheld_seats = db.execute(
+            select(Seat.id, Seat.showtime_id, Seat.row_letter, Seat.number, Seat.is_premium)
+            .join(deleted_holds, deleted_holds.c.seat_id == Seat.id)
+            .where(deleted_holds.c.expires_at > datetime.utcnow(), Seat.status == "available")
+        ).all()
+        
+        if released_seats or unheld_seats:
+            record_seat_changes_on_commit(
+                db, [_seat_change(seat, "available") for seat in list(released_seats) + list(unheld_seats)]
+            )
+        if released:
+            logger.info("🔓 Liberados %s asientos del usuario %s", released, user.username)
+        return released
+
+    @staticmethod
+    def get_user_reservations(db: Session, user: User, showtime_id: Optional[int] = None) -> List[Reservation]:
+        """
+        Obtiene las reservas activas de un usuario.
         
         Args:
             db: Sesión de base de datos
             user: Usuario del cual obtener reservas
+            showtime_id: Si se indica, solo las reservas de esa función
             
         Returns:
             List[Reservation]: Lista de reservas del usuario
         """
-        reservations = db.query(Reservation).filter(Reservation.user_id == user.id).all()
-        return reservations
+        # Cargar el asiento junto con la reserva: evita cargas implícitas posteriores
+        query = db.query(Reservation).options(
+            joinedload(Reservation.seat)
+        ).filter(Reservation.user_id == user.id)
+        if showtime_id is not None:
+            query = query.filter(Reservation.showtime_id == showtime_id)
+        return query.populate_existing().all()
+
+    @staticmethod
+    def get_user_reservation_rows(db: Session, user: User, showtime_id: Optional[int] = None) -> List[Row]:
+        """
+        Obtiene las reservas activas de un usuario con las columnas de su asiento
+        en una sola consulta (proyección, sin cargar objetos ORM).
+        
+        Args:
+            db: Sesión de base de datos
+            user: Usuario del cual obtener reservas
+            showtime_id: Si se indica, solo las reservas de esa función
+            
+        Returns:
+            List[Row]: Reservas (misma proyección que _reservation_columns)
+        """
+        query = select(
+            *ReservationService._reservation_columns(Reservation.user_id)
+        ).join(Seat, Seat.id == Reservation.seat_id).where(Reservation.user_id == user.id)
+        if showtime_id is not None:
+            query = query.where(Reservation.showtime_id == showtime_id)
+        return db.execute(query.order_by(Reservation.id)).all()
 
     @staticmethod
-    def calculate_total_cost(reservations: List[Reservation], is_premium: bool = False) -> float:
+    def calculate_total_cost(reservations: List, is_premium: bool = False) -> float:
         """
         Calcula el costo total de las reservas.
+        Acepta Reservation (con su asiento) o filas de la proyección de resumen.
+        Los combos se buscan en el índice por nombre del catálogo; la suma y el
+        descuento siguen el mismo orden de siempre, así los totales no cambian.
         
         Args:
             reservations: Lista de reservas
@@ -206,19 +958,20 @@ class ReservationService:
         Returns:
             float: Costo total calculado
         """
+        if not reservations:
+            return 0.0
+        
+        combo_prices = combo_catalog.price_index(is_premium)
+        seat_is_premium = _ROW_SEAT_IS_PREMIUM if isinstance(reservations[0], Row) else _ORM_SEAT_IS_PREMIUM
         total = 0.0
         
         for reservation in reservations:
             # Precio del asiento
-            if reservation.seat.is_premium:
-                total += PREMIUM_SEAT_PRICE
-            else:
-                total += BASE_SEAT_PRICE
+            total += PREMIUM_SEAT_PRICE if seat_is_premium(reservation) else BASE_SEAT_PRICE
             
             # Precio del combo
             if reservation.combo:
-                combo_price = ReservationService._get_combo_price(reservation.combo, is_premium)
-                total += combo_price
+                total += combo_prices.get(reservation.combo, 0.0)
         
         # Aplicar descuento premium
         if is_premium:
@@ -226,23 +979,13 @@ class ReservationService:
         
         return round(total, 2)
 
-    @staticmethod
-    def _get_combo_price(combo_name: str, is_premium: bool = False) -> float:
-        """Obtiene el precio de un combo por su nombre"""
-        all_combos = REGULAR_COMBOS + (PREMIUM_COMBOS if is_premium else [])
-        
-        for combo in all_combos:
-            if combo["name"] == combo_name:
-                return combo["price"]
-        
-        return 0.0
-
 
 class PremiumService:
     """Servicio para funcionalidades premium"""
 
     @staticmethod
-    def upgrade_to_premium(db: Session, user: User, auto_select_seats: bool = True, seats_count: int = 2) -> Tuple[bool, str, List[Seat]]:
+    def upgrade_to_premium(db: Session, user: User, auto_select_seats: bool = True, seats_count: int = 2,
+                           showtime_id: int = DEFAULT_SHOWTIME_ID) -> Tuple[bool, str, List[Seat]]:
         """
         Actualiza un usuario a premium y opcionalmente auto-selecciona mejores asientos.
         
@@ -251,96 +994,106 @@ class PremiumService:
             user: Usuario a actualizar
             auto_select_seats: Si auto-seleccionar mejores asientos
             seats_count: Cantidad de asientos a auto-seleccionar
+            showtime_id: Función en la que se auto-seleccionan los asientos
             
         Returns:
             Tuple[bool, str, List[Seat]]: (éxito, mensaje, asientos seleccionados)
         """
         try:
-            # Actualizar usuario a premium
+            # Actualizar usuario a premium (invalidando su principal cacheado)
             user.is_premium = True
+            invalidate_user_on_commit(db, user.id)
             
             selected_seats = []
             
             if auto_select_seats:
-                # Cancelar reservas existentes
-                existing_reservations = db.query(Reservation).filter(Reservation.user_id == user.id).all()
-                for reservation in existing_reservations:
-                    reservation.seat.status = "available"
-                    db.delete(reservation)
+                # Bloquear la fila del usuario y leer sus reservas en la función
+                existing_reservations = ReservationService._lock_user_reservations(db, showtime_id, user)
+                if existing_reservations is None:
+                    db.rollback()
+                    return False, "Usuario no encontrado", []
                 
-                # Seleccionar mejores asientos disponibles
-                best_seats = PremiumService._get_best_available_seats(db, seats_count)
+                # Cancelar reservas existentes en la función (registra los cambios del mapa)
+                released = ReservationService._cancel_seats(
+                    db, showtime_id, user, [row.seat_id for row in existing_reservations]
+                ) if existing_reservations else []
                 
-                # Reservar los mejores asientos
-                for seat in best_seats:
-                    reservation = Reservation(
-                        user_id=user.id,
-                        seat_id=seat.id,
-                        combo="Combo VIP"  # Combo premium por defecto
+                # Reclamar los mejores asientos con la misma sentencia que las reservas
+                # normales: respeta bloqueos de otros usuarios y reservas concurrentes
+                released_ids = [seat.id for seat in released]
+                claimed = []
+                for _ in range(AUTO_PICK_ATTEMPTS):
+                    seat_ids = PremiumService._get_best_available_seats(
+                        db, showtime_id, seats_count - len(claimed), released_ids
                     )
-                    db.add(reservation)
-                    seat.status = "reserved"
-                    selected_seats.append(seat)
+                    if not seat_ids:
+                        break
+                    batch = ReservationService._claim_seats(db, showtime_id, user, seat_ids, "Combo VIP")
+                    # Registrar de inmediato: la transacción queda marcada con cambios pendientes
+                    record_seat_changes_on_commit(db, [
+                        _seat_change(ReservationService._claimed_seat(row), "reserved") for row in batch
+                    ])
+                    claimed.extend(batch)
+                    if len(claimed) >= seats_count:
+                        break
+                    # Algún asiento ya estaba tomado: releer la disponibilidad
+                    availability_index.invalidate(showtime_id)
+                    released_ids = []
+                
+                if claimed:
+                    db.execute(delete(SeatHold).where(
+                        SeatHold.user_id == user.id,
+                        SeatHold.seat_id.in_([row.seat_id for row in claimed])
+                    ))
+                    selected_seats = [ReservationService._claimed_seat(row) for row in claimed]
             
             db.commit()
             
-            logger.info(f"⭐ Usuario {user.username} actualizado a PREMIUM con {len(selected_seats)} asientos VIP")
+            logger.info("⭐ Usuario %s actualizado a PREMIUM con %s asientos VIP", user.username, len(selected_seats))
             return True, "Upgrade a Premium exitoso", selected_seats
             
         except Exception as e:
             db.rollback()
-            logger.error(f"Error en upgrade premium: {e}")
+            logger.error("Error en upgrade premium: %s", e)
             return False, f"Error interno: {str(e)}", []
 
     @staticmethod
-    def _get_best_available_seats(db: Session, count: int) -> List[Seat]:
+    def _get_best_available_seats(db: Session, showtime_id: int, count: int,
+                                  released_ids: Sequence[int] = ()) -> List[int]:
         """
-        Obtiene los mejores asientos disponibles (filas D y E, posiciones centrales).
+        Elige los mejores asientos premium disponibles según su puntaje de calidad.
+        Prefiere un bloque contiguo; si no existe, toma los mejores asientos sueltos.
+        Solo elige: la reserva se hace con ReservationService._claim_seats.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
             count: Cantidad de asientos a obtener
+            released_ids: Asientos liberados en esta transacción (aún no visibles en el índice)
             
         Returns:
-            List[Seat]: Lista de mejores asientos disponibles
-        """
-        # Priorizar filas D y E (mejores del cine) y posiciones centrales
-        best_seats = db.query(Seat).filter(
-            and_(
-                Seat.status == "available",
-                or_(Seat.row_letter == "D", Seat.row_letter == "E"),
-                Seat.number.between(4, 9)  # Posiciones centrales
-            )
-        ).order_by(
-            Seat.row_letter,
-            Seat.number
-        ).limit(count).all()
-        
-        # Si no hay suficientes en las mejores filas, completar con otros premium
-        if len(best_seats) < count:
-            additional_seats = db.query(Seat).filter(
-                and_(
-                    Seat.status == "available",
-                    Seat.is_premium == True,
-                    ~Seat.id.in_([s.id for s in best_seats])
-                )
-            ).limit(count - len(best_seats)).all()
-            
-            best_seats.extend(additional_seats)
+            List[int]: IDs de los mejores asientos disponibles (del mejor al peor)
+        """
+        availability = ReservationService.get_seat_availability(db, showtime_id)
+        if availability is None or count < 1:
+            return []
         
-        return best_seats[:count]
+        layout = availability.layout
+        bitmap = [bits | released for bits, released in zip(availability.rows(), layout.availability(released_ids))]
+        return layout.best_block(bitmap, count, premium_only=True) or layout.best_seats(bitmap, count, premium_only=True)
 
 
 class BotService:
     """Servicio para simulación de bot que actúa como usuario concurrente"""
 
     @staticmethod
-    def simulate_user_action(db: Session) -> Tuple[str, bool, str, List[Seat]]:
+    def simulate_user_action(db: Session, showtime_id: int = DEFAULT_SHOWTIME_ID) -> Tuple[str, bool, str, List[Seat]]:
         """
-        Simula una acción aleatoria del bot (reserva, cancelación, etc.).
+        Simula una acción aleatoria del bot (reserva, cancelación, etc.) en una función.
         
         Args:
             db: Sesión de base de datos
+            showtime_id: ID de la función
             
         Returns:
             Tuple[str, bool, str, List[Seat]]: (acción, éxito, mensaje, asientos afectados)
@@ -356,49 +1109,50 @@ class BotService:
             action = random.choice(actions)
             
             if action == "reserve":
-                return BotService._bot_reserve_seats(db, bot_user)
+                return BotService._bot_reserve_seats(db, showtime_id, bot_user)
             elif action == "cancel":
-                return BotService._bot_cancel_reservation(db, bot_user)
+                return BotService._bot_cancel_reservation(db, showtime_id, bot_user)
             
             return "unknown", False, "Acción desconocida", []
             
         except Exception as e:
-            logger.error(f"Error en simulación de bot: {e}")
+            logger.error("Error en simulación de bot: %s", e)
             return "error", False, str(e), []
 
     @staticmethod
-    def _bot_reserve_seats(db: Session, bot_user: User) -> Tuple[str, bool, str, List[Seat]]:
+    def _bot_reserve_seats(db: Session, showtime_id: int, bot_user: User) -> Tuple[str, bool, str, List[Seat]]:
         """Simula reserva de asientos por el bot"""
         try:
-            # Seleccionar 1-3 asientos aleatorios disponibles
-            available_seats = ReservationService.get_available_seats(db)
+            # Seleccionar 1-3 asientos aleatorios disponibles (desde el índice, sin cargar Seat)
+            availability = ReservationService.get_seat_availability(db, showtime_id)
+            seat_ids = availability.random_available(random.randint(1, 3)) if availability else []
             
-            if not available_seats:
+            if not seat_ids:
                 return "reserve", False, "No hay asientos disponibles", []
             
-            seats_to_reserve = random.sample(available_seats, min(random.randint(1, 3), len(available_seats)))
-            seat_ids = [seat.id for seat in seats_to_reserve]
-            
             # Seleccionar combo aleatorio
-            combo = random.choice([combo["name"] for combo in REGULAR_COMBOS] + [None, None])  # 50% sin combo
+            combo = random.choice(combo_catalog.regular_names + (None, None))  # 50% sin combo
             
             success, message, reservations = ReservationService.reserve_seats(
-                db, bot_user, seat_ids, combo
+                db, showtime_id, bot_user, seat_ids, combo
             )
             
-            if success:
-                logger.info(f"🤖 Bot reservó {len(seats_to_reserve)} asientos: {[s.seat_name for s in seats_to_reserve]}")
+            if not success:
+                return "reserve", False, f"Bot: {message}", []
             
-            return "reserve", success, f"Bot: {message}", seats_to_reserve if success else []
+            # Las nuevas reservas van al final del resultado
+            reserved_seats = [ReservationService._claimed_seat(row) for row in reservations[-len(seat_ids):]]
+            logger.info("🤖 Bot reservó %s asientos: %s", len(reserved_seats), [s.seat_name for s in reserved_seats])
+            return "reserve", True, f"Bot: {message}", reserved_seats
             
         except Exception as e:
             return "reserve", False, f"Bot error: {str(e)}", []
 
     @staticmethod
-    def _bot_cancel_reservation(db: Session, bot_user: User) -> Tuple[str, bool, str, List[Seat]]:
+    def _bot_cancel_reservation(db: Session, showtime_id: int, bot_user: User) -> Tuple[str, bool, str, List[Seat]]:
         """Simula cancelación de reserva por el bot"""
         try:
-            bot_reservations = ReservationService.get_user_reservations(db, bot_user)
+            bot_reservations = ReservationService.get_user_reservations(db, bot_user, showtime_id)
             
             if not bot_reservations:
                 return "cancel", False, "Bot no tiene reservas para cancelar", []
@@ -408,11 +1162,11 @@ class BotService:
             seat = reservation_to_cancel.seat
             
             success, message = ReservationService.cancel_reservation(
-                db, bot_user, reservation_to_cancel.seat_id
+                db, showtime_id, bot_user, reservation_to_cancel.seat_id
             )
             
             if success:
-                logger.info(f"🤖 Bot canceló reserva del asiento: {seat.seat_name}")
+                logger.info("🤖 Bot canceló reserva del asiento: %s", seat.seat_name)
             
             return "cancel", success, f"Bot: {message}", [seat] if success else []
             
@@ -420,27 +1174,98 @@ class BotService:
             return "cancel", False, f"Bot error: {str(e)}", []
 
 
-def get_available_combos(is_premium: bool = False) -> Dict:
+class AsyncReservationService:
     """
-    Obtiene los combos disponibles según el tipo de usuario.
-    
-    Args:
-        is_premium: Si el usuario es premium
-        
-    Returns:
-        Dict: Diccionario con combos regulares y premium
+    Versión asíncrona de ReservationService sobre AsyncSession (asyncpg).
+    Reutiliza la misma lógica de negocio mediante AsyncSession.run_sync:
+    las consultas viajan por asyncpg sin bloquear el event loop.
     """
-    response = {
-        "regular_combos": REGULAR_COMBOS,
-        "premium_combos": PREMIUM_COMBOS if is_premium else [],
-        "recommendations": [
-            "Combo Clásico es el más popular",
-            "Combo Familiar perfecto para compartir",
-            "Usuarios premium tienen acceso a combos exclusivos"
-        ]
-    }
-    
-    if is_premium:
-        response["recommendations"].append("¡Disfruta tu 15% de descuento premium!")
-    
-    return response
\ No newline at end of file
+
+    @staticmethod
+    async def get_showtimes(db: AsyncSession, starts_from: Optional[datetime] = None,
+                            starts_until: Optional[datetime] = None,
+                            limit: int = SHOWTIMES_PAGE_SIZE, offset: int = 0) -> List[Row]:
+        """Versión asíncrona de ReservationService.get_showtimes"""
+        return await db.run_sync(ReservationService.get_showtimes, starts_from, starts_until, limit, offset)
+
+    @staticmethod
+    async def get_seats_with_reservation_flag(db: AsyncSession, showtime_id: int) -> List[Tuple[Seat, bool, Optional[datetime]]]:
+        """Versión asíncrona de ReservationService.get_seats_with_reservation_flag"""
+        return await db.run_sync(ReservationService.get_seats_with_reservation_flag, showtime_id)
+
+    @staticmethod
+    async def get_available_seats(db: AsyncSession, showtime_id: int, premium_only: bool = False) -> List[Seat]:
+        """Versión asíncrona de ReservationService.get_available_seats"""
+        return await db.run_sync(ReservationService.get_available_seats, showtime_id, premium_only)
+
+    @staticmethod
+    async def reserve_seats(db: AsyncSession, showtime_id: int, user: User, seat_ids: List[int],
+                            combo: Optional[str] = None, require_hold: bool = False) -> Tuple[bool, str, List[Row]]:
+        """Versión asíncrona de ReservationService.reserve_seats"""
+        return await db.run_sync(ReservationService.reserve_seats, showtime_id, user, seat_ids, combo, require_hold)
+
+    @staticmethod
+    async def hold_seats(db: AsyncSession, showtime_id: int, user: User, seat_ids: List[int]) -> Tuple[bool, str, Optional[datetime]]:
+        """Versión asíncrona de ReservationService.hold_seats"""
+        return await db.run_sync(ReservationService.hold_seats, showtime_id, user, seat_ids)
+
+    @staticmethod
+    async def release_holds(db: AsyncSession, showtime_id: int, user: User) -> Tuple[bool, str, int]:
+        """Versión asíncrona de ReservationService.release_holds"""
+        return await db.run_sync(ReservationService.release_holds, showtime_id, user)
+
+    @staticmethod
+    async def cancel_reservation(db: AsyncSession, showtime_id: int, user: User, seat_id: int) -> Tuple[bool, str]:
+        """Versión asíncrona de ReservationService.cancel_reservation"""
+        return await db.run_sync(ReservationService.cancel_reservation, showtime_id, user, seat_id)
+
+    @staticmethod
+    async def cancel_reservations(db: AsyncSession, showtime_id: int, user: User, seat_ids: List[int]) -> Tuple[bool, str, List[Row]]:
+        """Versión asíncrona de ReservationService.cancel_reservations"""
+        return await db.run_sync(ReservationService.cancel_reservations, showtime_id, user, seat_ids)
+
+    @staticmethod
+    async def apply_batch(db: AsyncSession, showtime_id: int, user: User, reserve_ids: List[int], cancel_ids: List[int],
+                          combo: Optional[str] = None, atomic: bool = False) -> Tuple[bool, str, List[Dict]]:
+        """Versión asíncrona de ReservationService.apply_batch"""
+        return await db.run_sync(ReservationService.apply_batch, showtime_id, user, reserve_ids, cancel_ids, combo, atomic)
+
+    @staticmethod
+    async def release_user_seats(db: AsyncSession, user: User) -> int:
+        """Versión asíncrona de ReservationService.release_user_seats (sin commit)"""
+        return await db.run_sync(ReservationService.release_user_seats, user)
+
+    @staticmethod
+    async def get_user_reservations(db: AsyncSession, user: User, showtime_id: Optional[int] = None) -> List[Reservation]:
+        """Versión asíncrona de ReservationService.get_user_reservations"""
+        return await db.run_sync(ReservationService.get_user_reservations, user, showtime_id)
+
+    @staticmethod
+    async def auto_reserve_seats(db: AsyncSession, showtime_id: int, user: User, count: int,
+                                 combo: Optional[str] = None) -> Tuple[bool, str, List[Row]]:
+        """Versión asíncrona de ReservationService.auto_reserve_seats"""
+        return await db.run_sync(ReservationService.auto_reserve_seats, showtime_id, user, count, combo)
+
+    @staticmethod
+    async def get_user_reservation_rows(db: AsyncSession, user: User, showtime_id: Optional[int] = None) -> List[Row]:
+        """Versión asíncrona de ReservationService.get_user_reservation_rows"""
+        return await db.run_sync(ReservationService.get_user_reservation_rows, user, showtime_id)
+
+
+class AsyncPremiumService:
+    """Versión asíncrona de PremiumService sobre AsyncSession (asyncpg)"""
+
+    @staticmethod
+    async def upgrade_to_premium(db: AsyncSession, user: User, auto_select_seats: bool = True, seats_count: int = 2,
+                                 showtime_id: int = DEFAULT_SHOWTIME_ID) -> Tuple[bool, str, List[Seat]]:
+        """Versión asíncrona de PremiumService.upgrade_to_premium"""
+        return await db.run_sync(PremiumService.upgrade_to_premium, user, auto_select_seats, seats_count, showtime_id)
+
+
+class AsyncBotService:
+    """Versión asíncrona de BotService sobre AsyncSession (asyncpg)"""
+
+    @staticmethod
+    async def simulate_user_action(db: AsyncSession, showtime_id: int = DEFAULT_SHOWTIME_ID) -> Tuple[str, bool, str, List[Seat]]:
+        """Versión asíncrona de BotService.simulate_user_action"""
+        return await db.run_sync(BotService.simulate_user_action, showtime_id)
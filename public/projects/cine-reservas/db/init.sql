@@ -11,33 +11,80 @@ CREATE TABLE IF NOT EXISTS users (
     is_premium BOOLEAN DEFAULT FALSE
 );
 
+CREATE TABLE IF NOT EXISTS auditoriums (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL,
+    rows INTEGER NOT NULL,
+    seats_per_row INTEGER NOT NULL
+);
+
+-- Plantilla de asientos de cada sala (se copia al crear una función)
+CREATE TABLE IF NOT EXISTS auditorium_seats (
+    id SERIAL PRIMARY KEY,
+    auditorium_id INTEGER NOT NULL REFERENCES auditoriums(id) ON DELETE CASCADE,
+    row_letter CHAR(1) NOT NULL,
+    number INTEGER NOT NULL,
+    is_premium BOOLEAN DEFAULT FALSE,
+    CONSTRAINT unique_auditorium_seat UNIQUE(auditorium_id, row_letter, number)
+);
+
+CREATE TABLE IF NOT EXISTS showtimes (
+    id SERIAL PRIMARY KEY,
+    auditorium_id INTEGER NOT NULL REFERENCES auditoriums(id) ON DELETE CASCADE,
+    movie_title VARCHAR(200) NOT NULL,
+    starts_at TIMESTAMP NOT NULL
+);
+
+-- Inventario de asientos por función
 CREATE TABLE IF NOT EXISTS seats (
     id SERIAL PRIMARY KEY,
+    showtime_id INTEGER NOT NULL REFERENCES showtimes(id) ON DELETE CASCADE,
     row_letter CHAR(1) NOT NULL,
     number INTEGER NOT NULL,
     status VARCHAR(20) DEFAULT 'available', -- available, reserved, occupied, premium
     is_premium BOOLEAN DEFAULT FALSE,
-    UNIQUE(row_letter, number)
+    CONSTRAINT unique_seat_position UNIQUE(showtime_id, row_letter, number),
+    CONSTRAINT unique_seat_showtime UNIQUE(id, showtime_id) -- Destino de la FK compuesta de reservations
 );
 
 CREATE TABLE IF NOT EXISTS reservations (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    seat_id INTEGER REFERENCES seats(id) ON DELETE CASCADE,
+    showtime_id INTEGER NOT NULL,
+    seat_id INTEGER NOT NULL,
     combo VARCHAR(100),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(seat_id) -- Un asiento solo puede tener una reserva activa
+    UNIQUE(seat_id), -- Un asiento solo puede tener una reserva activa
+    -- La función de la reserva siempre es la del asiento
+    CONSTRAINT fk_reservations_seat_showtime FOREIGN KEY (seat_id, showtime_id)
+        REFERENCES seats(id, showtime_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS seat_holds (
+    seat_id INTEGER PRIMARY KEY REFERENCES seats(id) ON DELETE CASCADE, -- Un bloqueo por asiento
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP NOT NULL -- Expiración perezosa: un bloqueo vencido se ignora
 );
 
 -- Índices para mejorar rendimiento
 CREATE INDEX idx_users_expires_at ON users(expires_at);
 CREATE INDEX idx_users_username ON users(username);
-CREATE INDEX idx_seats_status ON seats(status);
+-- Todos los índices de inventario empiezan por showtime_id: grilla, reservas
+-- y limpieza solo recorren las filas de una función
+CREATE INDEX idx_showtimes_auditorium_starts_at ON showtimes(auditorium_id, starts_at);
+CREATE INDEX idx_showtimes_starts_at ON showtimes(starts_at, id);
+CREATE INDEX idx_seats_showtime_status ON seats(showtime_id, status);
+CREATE INDEX idx_reservations_showtime_user ON reservations(showtime_id, user_id);
 CREATE INDEX idx_reservations_user_id ON reservations(user_id);
+CREATE INDEX idx_seat_holds_user_id ON seat_holds(user_id);
+
+-- Sala inicial (8 filas x 12 asientos = 96 asientos)
+INSERT INTO auditoriums (id, name, rows, seats_per_row) VALUES (1, 'Sala 1', 8, 12);
+SELECT setval('auditoriums_id_seq', 1);
 
--- Inicializar asientos del cine (8 filas x 12 asientos = 96 asientos)
--- Filas A-H, asientos 1-12
-INSERT INTO seats (row_letter, number, is_premium, status) VALUES
+-- Plantilla de asientos de la sala: filas A-H, asientos 1-12
+INSERT INTO auditorium_seats (auditorium_id, row_letter, number, is_premium)
+SELECT 1, v.row_letter, v.number, v.is_premium FROM (VALUES
 -- Fila A (primera fila, algunos premium)
 ('A', 1, FALSE, 'available'),
 ('A', 2, FALSE, 'available'),
@@ -148,37 +195,31 @@ INSERT INTO seats (row_letter, number, is_premium, status) VALUES
 ('H', 9, FALSE, 'available'),
 ('H', 10, FALSE, 'available'),
 ('H', 11, FALSE, 'available'),
-('H', 12, FALSE, 'available');
+('H', 12, FALSE, 'available')
+) AS v(row_letter, number, is_premium, status);
 
--- Función para limpiar usuarios expirados y sus reservas
-CREATE OR REPLACE FUNCTION cleanup_expired_users()
+-- Crea una función y copia la plantilla de su sala como inventario de asientos
+CREATE OR REPLACE FUNCTION create_showtime(p_auditorium_id INTEGER, p_movie_title VARCHAR, p_starts_at TIMESTAMP)
 RETURNS INTEGER AS $$
 DECLARE
-    deleted_count INTEGER;
+    new_showtime_id INTEGER;
 BEGIN
-    -- Eliminar reservas de usuarios expirados
-    DELETE FROM reservations 
-    WHERE user_id IN (
-        SELECT id FROM users 
-        WHERE expires_at <= CURRENT_TIMESTAMP
-    );
+    INSERT INTO showtimes (auditorium_id, movie_title, starts_at)
+    VALUES (p_auditorium_id, p_movie_title, p_starts_at)
+    RETURNING id INTO new_showtime_id;
     
-    -- Actualizar estado de asientos liberados
-    UPDATE seats 
-    SET status = 'available' 
-    WHERE id NOT IN (
-        SELECT DISTINCT seat_id FROM reservations
-    ) AND status IN ('reserved', 'occupied');
+    INSERT INTO seats (showtime_id, row_letter, number, is_premium, status)
+    SELECT new_showtime_id, row_letter, number, is_premium, 'available'
+    FROM auditorium_seats
+    WHERE auditorium_id = p_auditorium_id;
     
-    -- Eliminar usuarios expirados
-    DELETE FROM users 
-    WHERE expires_at <= CURRENT_TIMESTAMP;
-    
-    GET DIAGNOSTICS deleted_count = ROW_COUNT;
-    RETURN deleted_count;
+    RETURN new_showtime_id;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Función por defecto (id 1), usada cuando un cliente no indica la función
+SELECT create_showtime(1, 'Función principal', CURRENT_TIMESTAMP + INTERVAL '1 day');
+
 -- Crear un usuario bot para simulaciones (no expira)
 INSERT INTO users (username, password_hash, created_at, expires_at, is_premium) 
 VALUES ('cinema_bot', '$2b$12$dummy_hash_for_bot_user', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP + INTERVAL '1 year', FALSE)
@@ -36,6 +36,9 @@ const SeatButton = ({
       case 'reserved':
         return `${baseClasses} bg-gradient-to-br from-red-500 to-red-600 text-white shadow-lg cursor-not-allowed opacity-75`;
       
+      case 'held':
+        return `${baseClasses} bg-gradient-to-br from-amber-500 to-amber-600 text-white shadow-lg cursor-not-allowed opacity-75`;
+      
       case 'occupied':
         return `${baseClasses} bg-gradient-to-br from-gray-600 to-gray-700 text-white shadow-lg cursor-not-allowed opacity-50`;
       
@@ -58,6 +61,7 @@ const SeatButton = ({
       case 'my-reserved':
         return <User className={iconClass} />;
       case 'reserved':
+      case 'held':
       case 'occupied':
         return <Lock className={iconClass} />;
       default:
@@ -79,6 +83,8 @@ const SeatButton = ({
         return `Asiento ${seatName}${premiumText} - Tu reserva`;
       case 'reserved':
         return `Asiento ${seatName}${premiumText} - Reservado`;
+      case 'held':
+        return `Asiento ${seatName}${premiumText} - En proceso de compra`;
       case 'occupied':
         return `Asiento ${seatName}${premiumText} - Ocupado`;
       default:
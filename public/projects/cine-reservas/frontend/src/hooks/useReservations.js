@@ -4,7 +4,7 @@
  */
 
 import { useState, useEffect, useCallback } from 'react';
-import { reservationAPI } from '../services/api';
+import { reservationAPI, subscribeSeatUpdates } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 import toast from 'react-hot-toast';
 
@@ -272,6 +272,20 @@ export const useReservations = () => {
     loadSystemStats();
   }, [loadSeats, loadSystemStats]);
 
+  // Actualizaciones en tiempo real: aplicar cambios de otros usuarios sin sondear
+  useEffect(() => {
+    const unsubscribe = subscribeSeatUpdates((message) => {
+      if (message.type === 'seat_changes') {
+        const changedById = new Map(message.changes.map(seat => [seat.id, seat]));
+        setSeats(prev => prev.map(seat => changedById.get(seat.id) || seat));
+      } else if (message.type === 'invalidate' || message.type === 'resync') {
+        loadSeats();
+      }
+    });
+
+    return unsubscribe;
+  }, [loadSeats]);
+
   useEffect(() => {
     if (isAuthenticated) {
       loadMyReservations();
@@ -103,22 +103,89 @@ export const authAPI = {
  */
 export const reservationAPI = {
   /**
-   * Obtener grilla completa de asientos
+   * Obtener funciones disponibles (película, sala, horario y asientos libres)
+   * @param {Object} [params] - {starts_from?, starts_until?, limit?, offset?}
    */
-  getSeats: async () => {
-    const response = await apiClient.get('/reservations/seats');
+  getShowtimes: async (params = {}) => {
+    const response = await apiClient.get('/reservations/showtimes', { params });
+    return response.data;
+  },
+
+  /**
+   * Obtener grilla completa de asientos de una función
+   * @param {number} [showtimeId] - ID de la función (por defecto la principal)
+   */
+  getSeats: async (showtimeId) => {
+    const response = await apiClient.get('/reservations/seats', { params: { showtime_id: showtimeId } });
+    return response.data;
+  },
+
+  /**
+   * Obtener solo los asientos que cambiaron desde una versión del mapa
+   * @param {number} since - Última versión conocida (campo `version` de la grilla)
+   * @param {string} epoch - Campo `epoch` recibido junto a esa versión
+   * @param {number} [showtimeId] - ID de la función (por defecto la principal)
+   */
+  getSeatChanges: async (since, epoch, showtimeId) => {
+    const response = await apiClient.get('/reservations/seats/changes', {
+      params: { since, epoch, showtime_id: showtimeId }
+    });
     return response.data;
   },
 
   /**
    * Reservar asientos
-   * @param {Object} reservationData - {seat_ids: [], combo?: string}
+   * @param {Object} reservationData - {seat_ids: [], combo?: string, showtime_id?: number}
    */
   bookSeats: async (reservationData) => {
     const response = await apiClient.post('/reservations/book', reservationData);
     return response.data;
   },
 
+  /**
+   * Reservar automáticamente los mejores asientos contiguos
+   * @param {Object} pickData - {count: number, combo?: string, showtime_id?: number}
+   */
+  autoPickSeats: async (pickData) => {
+    const response = await apiClient.post('/reservations/auto-pick', pickData);
+    return response.data;
+  },
+
+  /**
+   * Reservar y cancelar varios asientos en una sola transacción
+   * @param {Object} batchData - {reserve: [], cancel: [], combo?: string, atomic?: boolean}
+   */
+  applyBatch: async (batchData) => {
+    const response = await apiClient.post('/reservations/batch', batchData);
+    return response.data;
+  },
+
+  /**
+   * Bloquear asientos temporalmente durante el checkout
+   * @param {number[]} seatIds - IDs de asientos a bloquear
+   */
+  holdSeats: async (seatIds) => {
+    const response = await apiClient.post('/reservations/hold', { seat_ids: seatIds });
+    return response.data;
+  },
+
+  /**
+   * Confirmar como reserva los asientos bloqueados
+   * @param {Object} reservationData - {seat_ids: [], combo?: string}
+   */
+  confirmHold: async (reservationData) => {
+    const response = await apiClient.post('/reservations/hold/confirm', reservationData);
+    return response.data;
+  },
+
+  /**
+   * Liberar los asientos bloqueados
+   */
+  releaseHold: async () => {
+    const response = await apiClient.delete('/reservations/hold');
+    return response.data;
+  },
+
   /**
    * Cancelar reserva de un asiento
    * @param {number} seatId - ID del asiento a cancelar
@@ -171,6 +238,50 @@ export const reservationAPI = {
   }
 };
 
+/**
+ * Suscripción a actualizaciones de asientos en tiempo real (WebSocket)
+ * @param {Function} onMessage - Recibe cada evento: hello, seat_changes, invalidate, resync
+ * @param {number} [showtimeId] - ID de la función (por defecto la principal)
+ * @returns {Function} Función para cerrar la suscripción
+ */
+export const subscribeSeatUpdates = (onMessage, showtimeId) => {
+  const query = showtimeId ? `?showtime_id=${showtimeId}` : '';
+  const wsUrl = `${API_BASE_URL.replace(/^http/, 'ws')}/ws/seats${query}`;
+  let socket = null;
+  let reconnectTimer = null;
+  let closed = false;
+
+  const connect = () => {
+    socket = new WebSocket(wsUrl);
+
+    socket.onmessage = (event) => {
+      try {
+        onMessage(JSON.parse(event.data));
+      } catch (error) {
+        console.error('❌ Mensaje de tiempo real inválido:', error);
+      }
+    };
+
+    socket.onclose = () => {
+      if (!closed) {
+        // Reintentar y pedir una recarga completa al reconectar
+        reconnectTimer = setTimeout(connect, 3000);
+        onMessage({ type: 'resync' });
+      }
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(reconnectTimer);
+    if (socket) {
+      socket.close();
+    }
+  };
+};
+
 /**
  * Servicios generales del sistema
  */